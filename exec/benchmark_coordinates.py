@@ -0,0 +1,56 @@
+import argparse, math, timeit
+import numpy as np
+from modular_robot_task_allocator.core.coodinate_utils import distance, is_within_range, make_coodinate_to_tuple, step_toward
+
+
+def legacy_make_coodinate_to_tuple(coordinate):
+    """ 変更前の変換 (isinstance の分岐を必ず通る) """
+    if isinstance(coordinate, np.ndarray):
+        x, y = coordinate
+        return (float(x), float(y))
+    elif isinstance(coordinate, list):
+        x, y = coordinate
+        return (float(x), float(y))
+    elif isinstance(coordinate, tuple):
+        if len(coordinate) == 2 and all(isinstance(x, (float, int, np.float64)) for x in coordinate):
+            x, y = coordinate
+            return (float(x), float(y))
+    raise TypeError(coordinate)
+
+def legacy_is_within_range(coordinate1, coordinate2):
+    """ 変更前の一致判定 """
+    return np.allclose(coordinate1, coordinate2, atol=1e-8)
+
+def legacy_step_toward(coordinate, target, step):
+    """ 変更前の Robot.travel の移動計算 """
+    v = np.array(target) - np.array(coordinate)
+    norm = distance(target, coordinate)
+    if norm < step:
+        return legacy_make_coodinate_to_tuple(target)
+    return legacy_make_coodinate_to_tuple(coordinate + step * v / norm)
+
+
+def main():
+    """座標演算の1呼び出しあたりの時間を変更前の実装と比較"""
+    parser = argparse.ArgumentParser(description="Micro-benchmark of coordinate helpers.")
+    parser.add_argument("--number", type=int, default=100000, help="Number of calls per measurement")
+    parser.add_argument("--repeat", type=int, default=5, help="Number of measurements (the best is reported)")
+    args = parser.parse_args()
+
+    a, b = (1.0, 2.0), (4.5, -3.25)
+    cases = [
+        ("make_coodinate_to_tuple", lambda: legacy_make_coodinate_to_tuple(a), lambda: make_coodinate_to_tuple(a)),
+        ("is_within_range (same)", lambda: legacy_is_within_range(a, a), lambda: is_within_range(a, a)),
+        ("is_within_range (apart)", lambda: legacy_is_within_range(a, b), lambda: is_within_range(a, b)),
+        ("step_toward", lambda: legacy_step_toward(a, b, 0.5), lambda: step_toward(a, b, 0.5)),
+    ]
+    print(f"{'kernel':<26}{'legacy [ns]':>14}{'fast [ns]':>12}{'speedup':>10}")
+    for name, legacy, fast in cases:
+        assert legacy() == fast(), name  # 結果が一致すること
+        times = [min(timeit.repeat(func, number=args.number, repeat=args.repeat)) / args.number * 1e9
+                 for func in (legacy, fast)]
+        print(f"{name:<26}{times[0]:>14.1f}{times[1]:>12.1f}{times[0] / times[1]:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
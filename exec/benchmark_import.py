@@ -0,0 +1,51 @@
+import argparse, os, subprocess, sys
+
+# シミュレーションだけを行うプロセス (ワーカーなど) で読み込まれてはならない重い依存
+HEAVY_MODULES = ("pandas", "matplotlib", "sklearn", "pymoo", "networkx")
+TARGETS = (
+    "modular_robot_task_allocator.core",
+    "modular_robot_task_allocator.simulator.simulation",
+    "modular_robot_task_allocator.simulator.parallel",
+    "run_simulator",
+)
+
+
+def measure(target: str) -> tuple[float, list[str]]:
+    """ target を新しいプロセスで import したときの読み込み時間 (ミリ秒) と読み込まれたモジュール """
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [os.path.dirname(os.path.abspath(__file__)),
+                                                      env.get("PYTHONPATH")]))
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {target}"],
+                            env=env, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"Failed to import {target}:\n{result.stderr}")
+    total_us, modules = 0, []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        total_us += int(self_us)
+        modules.append(name.strip())
+    return total_us / 1000.0, modules
+
+
+def main():
+    """各エントリーポイントの import 時間と重い依存の読み込みを検査 (予算超過なら終了コード1)"""
+    parser = argparse.ArgumentParser(description="Import-time budget check.")
+    parser.add_argument("--budget_ms", type=float, default=400.0, help="Import-time budget per target [ms]")
+    parser.add_argument("--targets", nargs="*", default=list(TARGETS), help="Modules to import")
+    args = parser.parse_args()
+
+    failed = False
+    for target in args.targets:
+        elapsed, modules = measure(target)
+        heavy = sorted({name.split(".")[0] for name in modules} & set(HEAVY_MODULES))
+        ok = elapsed <= args.budget_ms and not heavy
+        failed |= not ok
+        print(f"{'ok' if ok else 'NG':2} {target:55} {elapsed:8.1f} ms {len(modules):5} modules"
+              + (f"  heavy: {', '.join(heavy)}" if heavy else ""))
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+import argparse, gc, tracemalloc
+from modular_robot_task_allocator.core import *
+
+
+def build_world(num_robots: int, modules_per_robot: int) -> tuple[list[Module], list[Robot], list[BaseTask]]:
+    """ 同じ種類のロボットだけからなるワールド (タスクはロボットと同数の加工タスク) """
+    module_type = ModuleType(name="body", max_battery=100.0)
+    robot_type = RobotType(name="worker", required_modules={module_type: modules_per_robot},
+                           performance={PerformanceAttributes.MOBILITY: 1}, power_consumption=1.0, recharge_trigger=10.0)
+    modules, robots, tasks = [], [], []
+    for r in range(num_robots):
+        coordinate = (float(r % 1000), float(r // 1000))
+        component = [Module(module_type, f"m{r}_{k}", coordinate, 100.0, 0.0, ModuleState.ACTIVE)
+                     for k in range(modules_per_robot)]
+        modules.extend(component)
+        robots.append(Robot(robot_type, f"r{r}", coordinate, component))
+    for t in range(num_robots):
+        task = Manufacture(name=f"t{t}", coordinate=(float(t % 1000), 0.0), total_workload=10.0, completed_workload=0.0)
+        task.initialize_task_dependency([])
+        tasks.append(task)
+    return modules, robots, tasks
+
+
+def measure(factory) -> tuple[int, object]:
+    """ factory が確保したメモリ量 (tracemalloc による計測) """
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = factory()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return after - before, result
+
+
+def main():
+    """モジュール・ロボット・タスク1つあたりのメモリ量を計測"""
+    parser = argparse.ArgumentParser(description="Memory benchmark of simulation entities.")
+    parser.add_argument("--robots", type=int, default=20000, help="Number of robots (and tasks)")
+    parser.add_argument("--modules_per_robot", type=int, default=5, help="Number of modules per robot")
+    args = parser.parse_args()
+
+    n, k = args.robots, args.modules_per_robot
+    module_type = ModuleType(name="body", max_battery=100.0)
+    module_bytes, modules = measure(lambda: [Module(module_type, f"m{i}", (0.0, 0.0), 100.0, 0.0, ModuleState.ACTIVE)
+                                             for i in range(n * k)])
+    name_bytes, _ = measure(lambda: [f"m{i}" for i in range(n * k)])  # 名前文字列とリスト自体の分は除く
+    world_bytes, world = measure(lambda: build_world(n, k))
+    task_bytes, _ = measure(lambda: [Manufacture(name=f"t{t}", coordinate=(float(t), 0.0), total_workload=10.0,
+                                                 completed_workload=0.0) for t in range(n)])
+    task_name_bytes, _ = measure(lambda: [f"t{t}" for t in range(n)])
+
+    per_module = (module_bytes - name_bytes) / (n * k)
+    per_task = (task_bytes - task_name_bytes) / n
+    per_robot = (world_bytes - module_bytes - task_bytes) / n
+    print(f"robots={n} modules={n * k} tasks={n}")
+    print(f"bytes per module : {per_module:10.1f}")
+    print(f"bytes per robot  : {per_robot:10.1f} (excluding its modules)")
+    print(f"bytes per task   : {per_task:10.1f}")
+    print(f"total world      : {world_bytes / 2**20:10.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+import argparse, json, os, pickle, platform, resource, subprocess, sys, tempfile, time
+from typing import Any
+import numpy as np
+from modular_robot_task_allocator.io.compiled_world import compile_world, load_compiled_world
+from modular_robot_task_allocator.io.synthetic import generate_world
+from modular_robot_task_allocator.simulator.simulation import Simulator
+
+# 規模ごとの合成ワールドのパラメータ (モジュール数 = ロボット数 × 3 × modules_per_type)
+SCALES: dict[str, dict[str, int]] = {
+    "tiny": dict(num_robots=10, modules_per_type=1, num_tasks=20, num_stations=2, num_scenarios=2, steps=200),
+    "small": dict(num_robots=100, modules_per_type=2, num_tasks=200, num_stations=10, num_scenarios=4, steps=100),
+    "medium": dict(num_robots=1000, modules_per_type=3, num_tasks=500, num_stations=30, num_scenarios=4, steps=50),
+    "large": dict(num_robots=4000, modules_per_type=3, num_tasks=1000, num_stations=60, num_scenarios=4, steps=30),
+    "xlarge": dict(num_robots=10000, modules_per_type=4, num_tasks=1000, num_stations=100, num_scenarios=4, steps=20),
+}
+# 値が大きいほど良い指標 (比較時の改善・悪化の向き)
+HIGHER_IS_BETTER = ("steps_per_second",)
+
+
+def _timed(function: Any) -> tuple[float, Any]:
+    start = time.perf_counter()
+    result = function()
+    return time.perf_counter() - start, result
+
+
+def run_scale(scale: str, backends: list[str], seed: int) -> dict[str, Any]:
+    """ 1つの規模を計測 (ピークメモリはプロセス単位のため、規模ごとに別プロセスで呼ぶ) """
+    params = dict(SCALES[scale])
+    steps = params.pop("steps")
+    result: dict[str, Any] = {"scale": scale, "params": params, "steps": steps}
+
+    result["generate_time"], world = _timed(lambda: generate_world(seed=seed, **params))
+    result["num_modules"], result["num_tasks"] = len(world.modules), len(world.tasks)
+
+    # 読み込み (コンパイル済みワールドを開いてエンティティを構築)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "world.bin")
+        result["compile_time"], _ = _timed(lambda: compile_world(
+            path, world.tasks, world.robots, world.simulation_map, world.risk_scenarios, world.modules.values()))
+        result["file_size"] = os.path.getsize(path)
+        compiled = load_compiled_world(path)
+        result["load_time"], _ = _timed(lambda: (compiled.tasks, compiled.simulation_map))
+
+    # 複製 (並列評価でワーカーへ渡すときと同じ直列化・復元)
+    payload = (world.tasks, world.robots, world.simulation_map, world.risk_scenarios)
+    result["clone_time"], _ = _timed(lambda: pickle.loads(pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL)))
+
+    for backend in backends:
+        # バックエンドごとに未使用のワールドと故障シナリオ (先頭の1つ) を用意
+        tasks, robots, simulation_map, risk_scenarios = pickle.loads(pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL))
+        scenarios = list(risk_scenarios.values())[:1]
+        total_workload = sum(task.total_workload for task in tasks.values())
+        construct_time, simulator = _timed(lambda: Simulator(tasks, robots, world.task_priorities, scenarios,
+                                                             simulation_map, backend=backend))
+        snapshot_time, snapshot = _timed(simulator.snapshot)
+        run_time, _ = _timed(lambda: simulator.run(steps))
+        remaining_workload = simulator.total_remaining_workload()
+        restore_time, _ = _timed(lambda: simulator.restore(snapshot))
+        # 仕事が進まないワールドでは作業・充電・組み立ての処理が計測されないため失敗とする
+        if total_workload - remaining_workload <= 0.0:
+            raise RuntimeError(f"No task progress in {scale} with the {backend} backend after {steps} steps.")
+        result[backend] = {
+            "construct_time": construct_time,
+            "snapshot_time": snapshot_time,
+            "restore_time": restore_time,
+            "run_time": run_time,
+            "steps_per_second": steps / run_time if run_time > 0 else float("inf"),
+            "total_remaining_workload": remaining_workload,
+            "completed_workload": total_workload - remaining_workload,
+        }
+    # ru_maxrss は Linux では KiB、macOS ではバイト
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    result["peak_memory"] = maxrss if sys.platform == "darwin" else maxrss * 1024
+    return result
+
+
+def _revision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        return ""
+
+
+def _flatten(record: dict[str, Any], prefix: str = "") -> dict[str, float]:
+    """ 入れ子の計測値を "backend.metric" 形式の数値だけの辞書にする """
+    values = {}
+    for key, value in record.items():
+        if isinstance(value, dict) and key != "params":
+            values.update(_flatten(value, f"{prefix}{key}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool) and key != "steps":
+            values[f"{prefix}{key}"] = float(value)
+    return values
+
+
+def compare(baseline: dict[str, Any], current: dict[str, Any], threshold: float) -> bool:
+    """ 2つの結果ファイルを規模・指標ごとに比較し、threshold を超えて悪化した指標があれば False """
+    ok = True
+    base = {record["scale"]: _flatten(record) for record in baseline["results"]}
+    for record in current["results"]:
+        if record["scale"] not in base:
+            continue
+        for metric, value in _flatten(record).items():
+            before = base[record["scale"]].get(metric)
+            if before is None or before == 0 or metric.endswith(("total_remaining_workload", "completed_workload",
+                                                                 "num_modules", "num_tasks", "file_size")):
+                continue
+            change = value / before - 1.0
+            worse = -change if metric.endswith(HIGHER_IS_BETTER) else change
+            flag = "REGRESSION" if worse > threshold else ""
+            ok &= not flag
+            print(f"{record['scale']:7} {metric:32} {before:14.6g} -> {value:14.6g} {change:+8.1%} {flag}")
+    return ok
+
+
+def main():
+    """合成ワールドの規模ごとに読み込み・複製・シミュレーション速度・ピークメモリを計測し JSON に書き出す"""
+    parser = argparse.ArgumentParser(description="Benchmark suite on synthetic worlds.")
+    parser.add_argument("--scales", nargs="*", default=list(SCALES), choices=list(SCALES), help="Scales to run")
+    parser.add_argument("--backends", nargs="*", default=["object", "array"], choices=["object", "array"])
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the world generator")
+    parser.add_argument("--output", type=str, default="benchmark_results.json", help="Path to the result file")
+    parser.add_argument("--compare", type=str, help="Baseline result file to compare with")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Relative change reported as a regression")
+    parser.add_argument("--single", type=str, help=argparse.SUPPRESS)  # 1規模を計測して標準出力に JSON を書く (内部用)
+    args = parser.parse_args()
+
+    if args.single is not None:
+        print(json.dumps(run_scale(args.single, args.backends, args.seed)))
+        return
+
+    results = []
+    for scale in args.scales:
+        # ピークメモリを規模ごとに測るため別プロセスで実行
+        process = subprocess.run([sys.executable, os.path.abspath(__file__), "--single", scale, "--seed", str(args.seed),
+                                  "--backends", *args.backends], capture_output=True, text=True)
+        if process.returncode != 0:
+            print(process.stderr, file=sys.stderr)
+            sys.exit(process.returncode)
+        record = json.loads(process.stdout.strip().splitlines()[-1])
+        results.append(record)
+        speeds = ", ".join(f"{backend} {record[backend]['steps_per_second']:.1f} steps/s "
+                           f"({record[backend]['completed_workload']:.0f} done)" for backend in args.backends)
+        print(f"{scale:7} {record['num_modules']:7} modules  load {record['load_time']:.3f} s  "
+              f"clone {record['clone_time']:.3f} s  {speeds}  peak {record['peak_memory'] / 2**20:.0f} MiB")
+
+    output = {
+        "revision": _revision(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "results": results,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(output, f, indent=2)
+
+    if args.compare is not None:
+        with open(args.compare, 'r') as f:
+            baseline = json.load(f)
+        if not compare(baseline, output, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
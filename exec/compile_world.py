@@ -0,0 +1,37 @@
+import argparse, logging
+from modular_robot_task_allocator.core import *
+from modular_robot_task_allocator.io import *
+from modular_robot_task_allocator.io.compiled_world import compile_world, load_capabilities
+
+logger = logging.getLogger(__name__)
+
+
+def main():
+    """YAML/CSV の入力を1つのバイナリファイルにまとめる (run_simulator.py の --world で読み込む)"""
+    parser = argparse.ArgumentParser(description="Compile the input files into a single binary world file.")
+    parser.add_argument("--property_file", type=str, help="Path to the property file")
+    parser.add_argument("--output", type=str, help="Path to the compiled world file")
+    args = parser.parse_args()
+
+    prop = load_property(file_path=args.property_file)
+
+    tasks = load_tasks(file_path=prop["load"]["task"])
+    tasks = load_task_dependency(file_path=prop["load"]['task_dependency'], tasks=tasks)
+    module_types = load_module_types(file_path=prop["load"]['module_type'])
+    modules = load_modules(file_path=prop["load"]['module'], module_types=module_types)
+    robot_types = load_robot_types(file_path=prop["load"]['robot_type'], module_types=module_types)
+    robots = load_robots(file_path=prop["load"]['robot'], robot_types=robot_types, modules=modules)
+    check_fleet(robots=robots, modules=modules.values(), tasks=tasks)  # 不整合をまとめて報告
+    combined_tasks = add_assembly_task(tasks=tasks, robots=robots)
+    simulation_map = load_simulation_map(file_path=prop["load"]['map'])
+    risk_scenarios = load_risk_scenarios(file_path=prop["load"]['risk_scenario'])
+    capabilities = None
+    if "task_capabilities" in prop["load"]:
+        capabilities = load_capabilities(file_path=prop["load"]["task_capabilities"])
+
+    compile_world(args.output, tasks=combined_tasks, robots=robots, simulation_map=simulation_map,
+                  risk_scenarios=risk_scenarios, modules=modules.values(), capabilities=capabilities)
+
+
+if __name__ == '__main__':
+    main()
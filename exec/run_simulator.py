@@ -1,9 +1,13 @@
 import random
 import numpy as np
-import argparse, yaml, pickle, os, logging
+import argparse, yaml, pickle, os, logging, copy
 from modular_robot_task_allocator.simulator.simulation import Simulator
+from modular_robot_task_allocator.simulator.batch import BatchSimulator
+from modular_robot_task_allocator.simulator.parallel import evaluate_scenarios
+from modular_robot_task_allocator.simulator.recorder import TrajectoryRecorder
 from modular_robot_task_allocator.core import *
 from modular_robot_task_allocator.io import *
+from modular_robot_task_allocator.io.compiled_world import load_compiled_world
 from modular_robot_task_allocator.utils import raise_with_log
 
 logger = logging.getLogger(__name__)
@@ -13,26 +17,35 @@ def main():
     """シミュレータの実行"""
     parser = argparse.ArgumentParser(description="Run the robotic system simulator.")
     parser.add_argument("--property_file", type=str, help="Path to the property file")
+    parser.add_argument("--batch", action="store_true", help="Evaluate all training scenarios in one lock-step run")
+    parser.add_argument("--workers", type=int, default=1, help="Number of worker processes for scenario evaluation")
+    parser.add_argument("--event_driven", action="store_true", help="Skip uneventful steps (array backend only)")
+    parser.add_argument("--world", type=str, help="Path to a compiled world file (replaces the input files in load)")
+    parser.add_argument("--record", type=str, help="Directory to record trajectories of the sequential evaluation")
     args = parser.parse_args()
 
-    try:
-        with open(args.property_file, 'r') as f:
-            prop = yaml.safe_load(f)
-    except FileNotFoundError as e:
-        raise_with_log(FileNotFoundError, f"File not found: {e}.")
+    prop = load_property(file_path=args.property_file)
 
     random.seed(prop['simulation']['seed'])
 
-    tasks = load_tasks(file_path=prop["load"]["task"])
-    tasks = load_task_dependency(file_path=prop["load"]['task_dependency'], tasks=tasks)
-    module_types = load_module_types(file_path=prop["load"]['module_type'])
-    modules = load_modules(file_path=prop["load"]['module'], module_types=module_types)
-    robot_types = load_robot_types(file_path=prop["load"]['robot_type'], module_types=module_types)
-    robots = load_robots(file_path=prop["load"]['robot'], robot_types=robot_types, modules=modules)
-    has_duplicate_module(robots=robots)
-    combined_tasks = add_assembly_task(tasks=tasks, robots=robots)
-    simulation_map = load_simulation_map(file_path=prop["load"]['map'])
-    risk_scenarios = load_risk_scenarios(file_path=prop["load"]['risk_scenario'])
+    if args.world is not None:
+        # compile_world.py で書き出したワールド (組み立てタスクを含む)
+        world = load_compiled_world(args.world)
+        combined_tasks = world.tasks
+        robots = world.robots
+        simulation_map = world.simulation_map
+        risk_scenarios = world.risk_scenarios()
+    else:
+        tasks = load_tasks(file_path=prop["load"]["task"])
+        tasks = load_task_dependency(file_path=prop["load"]['task_dependency'], tasks=tasks)
+        module_types = load_module_types(file_path=prop["load"]['module_type'])
+        modules = load_modules(file_path=prop["load"]['module'], module_types=module_types)
+        robot_types = load_robot_types(file_path=prop["load"]['robot_type'], module_types=module_types)
+        robots = load_robots(file_path=prop["load"]['robot'], robot_types=robot_types, modules=modules)
+        check_fleet(robots=robots, modules=modules.values(), tasks=tasks)  # 不整合をまとめて報告
+        combined_tasks = add_assembly_task(tasks=tasks, robots=robots)
+        simulation_map = load_simulation_map(file_path=prop["load"]['map'])
+        risk_scenarios = load_risk_scenarios(file_path=prop["load"]['risk_scenario'])
     task_priorities = {}
     for r_name in robots.keys():
         shuffled_array = list(combined_tasks.keys())
@@ -49,24 +62,54 @@ def main():
     variance_remaining_workload = []
     variance_operating_time = []
 
-    for scenario_names in training_scenarios:
-        local_modules = clone_module(modules=modules)
-        local_robots = clone_robots(robots=robots, modules=local_modules)
-        local_tasks = clone_tasks(tasks=combined_tasks, modules=local_modules, robots=local_robots)
-        local_scenarios = clone_risk_scenarios(risk_scenarios=risk_scenarios)
-        local_map = clone_simulation_map(simulation_map=simulation_map)
+    if args.batch:
+        simulator = BatchSimulator(
+            tasks=combined_tasks, 
+            robots=robots, 
+            task_priorities=task_priorities, 
+            scenario_sets=[[risk_scenarios[scenario_name] for scenario_name in scenario_names] 
+                           for scenario_names in training_scenarios],
+            simulation_map=simulation_map,
+            )
+        simulator.run(max_step, event_driven=args.event_driven)
+        total_remaining_workload = simulator.total_remaining_workload().tolist()
+        variance_remaining_workload = simulator.variance_remaining_workload().tolist()
+        variance_operating_time = simulator.variance_operating_time().tolist()
+    elif args.workers != 1:
+        results = evaluate_scenarios(
+            tasks=combined_tasks, 
+            robots=robots, 
+            task_priorities=task_priorities, 
+            risk_scenarios=risk_scenarios, 
+            scenario_lists=training_scenarios, 
+            simulation_map=simulation_map, 
+            max_step=max_step, 
+            max_workers=args.workers if args.workers > 0 else None,
+            backend="array" if args.event_driven else "object",
+            event_driven=args.event_driven,
+            )
+        total_remaining_workload, variance_remaining_workload, variance_operating_time = map(list, zip(*results))
+    else:
+        # 初期状態を1度だけ保存し、シナリオごとに復元して評価
         simulator = Simulator(
-            tasks=local_tasks, 
-            robots=local_robots, 
+            tasks=combined_tasks, 
+            robots=robots, 
             task_priorities=task_priorities, 
-            scenarios=[local_scenarios[scenario_name] for scenario_name in scenario_names],
-            simulation_map=local_map,
+            scenarios=[],
+            simulation_map=simulation_map,
+            backend="array" if args.event_driven else "object",
             )
-        for current_step in range(max_step):
-            simulator.run_simulation()
-        total_remaining_workload.append(simulator.total_remaining_workload())
-        variance_remaining_workload.append(simulator.variance_remaining_workload())
-        variance_operating_time.append(simulator.variance_operating_time())
+        initial_state = simulator.snapshot()
+        for index, scenario_names in enumerate(training_scenarios):
+            simulator.restore(initial_state)
+            simulator.set_scenarios([copy.deepcopy(risk_scenarios[scenario_name]) for scenario_name in scenario_names])
+            if args.record is not None:  # シナリオごとのディレクトリに記録 (TrajectoryReader で読み出す)
+                simulator.attach_recorder(TrajectoryRecorder(os.path.join(args.record, f"{index:03}")))
+            simulator.run(max_step, event_driven=args.event_driven)
+            simulator.detach_recorder()
+            total_remaining_workload.append(simulator.total_remaining_workload())
+            variance_remaining_workload.append(simulator.variance_remaining_workload())
+            variance_operating_time.append(simulator.variance_operating_time())
     print(
         float(sum(total_remaining_workload) / len(total_remaining_workload)), 
         float(sum(variance_remaining_workload) / len(variance_remaining_workload)),
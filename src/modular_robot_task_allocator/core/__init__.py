@@ -1,8 +1,10 @@
-from .task import *
-from .module import *
-from .robot import *
+from .task import BaseTask, Transport, TransportModule, Manufacture, Assembly, Charge
+from .module import Module, ModuleState, ModuleType
+from .robot import PerformanceAttributes, Robot, RobotState, RobotType, has_duplicate_module
 from .risk_scenario import BaseRiskScenario, ExponentialFailure
 from .simulation_map import SimulationMap
+from .spatial_index import GridIndex
+from .validation import Violation, validate_fleet, check_fleet
 
 __all__ = [
     'BaseTask', 
@@ -22,4 +24,8 @@ __all__ = [
     'BaseRiskScenario',
     'ExponentialFailure',
     'SimulationMap',
+    'GridIndex',
+    'Violation',
+    'validate_fleet',
+    'check_fleet',
     ]
\ No newline at end of file
@@ -1,16 +1,25 @@
 from typing import Union
 from numpy.typing import NDArray
 import numpy as np
-import logging
+import logging, math
 from modular_robot_task_allocator.utils import raise_with_log
 
 logger = logging.getLogger(__name__)
 
+Coordinate = tuple[float, float]  # 座標の内部表現 (float 2つのタプル、一時配列を作らずに扱う)
+
+ATOL = 1e-8  # is_within_range の許容誤差 (np.allclose と同じ判定式)
+RTOL = 1e-5
+
 def make_coodinate_to_tuple(
     coordinate: Union[tuple[float, float], NDArray[np.float64], list[float]],
 ) -> tuple[float, float]:
     """さまざまな2D座標フォーマットをTuple[float, float]に変換"""
 
+    # 変換済みの座標はそのまま返す (最も多い呼び出し)
+    if type(coordinate) is tuple and len(coordinate) == 2 and type(coordinate[0]) is float and type(coordinate[1]) is float:
+        return coordinate
+
     # NumPyの配列
     if isinstance(coordinate, np.ndarray):
         if coordinate.shape == (2,):
@@ -41,4 +50,27 @@ def make_coodinate_to_tuple(
         raise_with_log(TypeError, f"Invalid coordinate type: {type(coordinate)}. Expected Tuple[float, float] or np.ndarray.")
 
 def is_within_range(coordinate1: tuple[float, float], coordinate2: tuple[float, float]) -> bool:
-    return np.allclose(coordinate1, coordinate2, atol=1e-8)
\ No newline at end of file
+    """ 2点が同じ位置か (np.allclose(coordinate1, coordinate2, atol=1e-8) と同じ判定を配列を作らずに行う) """
+    x1, y1 = coordinate1
+    x2, y2 = coordinate2
+    return ((x1 == x2 or abs(x1 - x2) <= ATOL + RTOL * abs(x2))
+            and (y1 == y2 or abs(y1 - y2) <= ATOL + RTOL * abs(y2)))
+
+def distance(coordinate1: tuple[float, float], coordinate2: tuple[float, float]) -> float:
+    """ 2点間のユークリッド距離（配列エンジンと同一の演算順序で計算） """
+    dx = coordinate1[0] - coordinate2[0]
+    dy = coordinate1[1] - coordinate2[1]
+    return math.sqrt(dx * dx + dy * dy)
+
+def step_toward(coordinate: tuple[float, float], target: tuple[float, float], step: float) -> Coordinate:
+    """
+    target に向けて距離 step だけ進んだ座標 (距離が step 未満なら target)
+    coordinate + step * (target - coordinate) / distance と同じ演算順序で計算する
+    """
+    x, y = coordinate
+    tx, ty = float(target[0]), float(target[1])
+    dx, dy = tx - x, ty - y
+    norm = math.sqrt(dx * dx + dy * dy)
+    if norm < step:
+        return (tx, ty)
+    return (float(x + step * dx / norm), float(y + step * dy / norm))
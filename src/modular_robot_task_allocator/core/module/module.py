@@ -36,6 +36,8 @@ class ModuleType:
 
 class Module:
     """ モジュールのクラス """
+    __slots__ = ("_type", "_name", "_coordinate", "_battery", "_operating_time", "_state")
+
     def __init__(self, module_type: ModuleType, name: str, coordinate: Union[tuple[float, float], NDArray[np.float64], list[float]], 
                  battery: float, operating_time: float, state: ModuleState):
         self._type = module_type  # モジュールの種類
@@ -117,6 +119,18 @@ class Module:
                 self._state = ModuleState.ERROR
                 break
 
+    def restore_state(self, battery: float, operating_time: float, state: ModuleState,
+                      coordinate: tuple[float, float]) -> None:
+        """ 可変状態をまとめて設定 (状態の復元用のため故障中の更新や稼働時間の減少も許す) """
+        self._battery = battery
+        self._operating_time = operating_time
+        self._state = state
+        self._coordinate = make_coodinate_to_tuple(coordinate)
+
+    def set_malfunction(self, malfunction: bool) -> None:
+        """ 故障判定の結果を状態に反映 """
+        self._state = ModuleState.ERROR if malfunction else ModuleState.ACTIVE
+
     def __str__(self) -> str:
         """ モジュールの簡単な情報を文字列として表示 """
         return f"Module({self.name}, {self.state.name}, Battery: {self.battery}/{self.type.max_battery})"
@@ -1,8 +1,9 @@
 from abc import ABC, abstractmethod
-from typing import TYPE_CHECKING, Any, Optional
+from typing import TYPE_CHECKING, Any, Optional, Sequence
 import numpy as np
 from numpy.random import Generator
-import logging, copy
+from numpy.typing import NDArray
+import logging, copy, hashlib, math, zlib
 from modular_robot_task_allocator.utils import raise_with_log
 
 if TYPE_CHECKING:
@@ -10,24 +11,73 @@ if TYPE_CHECKING:
 
 logger = logging.getLogger(__name__)
 
+_MASK64 = (1 << 64) - 1
+
+def _mix64(x: NDArray[np.uint64]) -> NDArray[np.uint64]:
+    """ splitmix64 の攪拌関数 (uint64 の桁あふれは切り捨て) """
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+def stream_key(seed: int, name: str) -> int:
+    """ (シード, モジュール名) に対する乱数列のキー """
+    digest = int.from_bytes(hashlib.blake2b(name.encode(), digest_size=8).digest(), "little")
+    return int(_mix64(np.array([(seed & _MASK64) ^ digest], dtype=np.uint64))[0])
+
+def counter_uniform(keys: NDArray[np.uint64], counters: NDArray[np.float64]) -> NDArray[np.float64]:
+    """
+    キーとカウンタだけで決まる [0, 1) の一様乱数 (カウンタベースの乱数生成)
+    カウンタは float64 のビット列をそのまま使うため、稼働時間などの実数値も区別できる
+    """
+    counters = np.ascontiguousarray(counters, dtype=np.float64)
+    with np.errstate(over='ignore'):
+        x = _mix64(np.asarray(keys, dtype=np.uint64) ^ _mix64(counters.view(np.uint64) + np.uint64(0x9E3779B97F4A7C15)))
+    return (x >> np.uint64(11)).astype(np.float64) * 2.0**-53
+
 class BaseRiskScenario(ABC):
     """ 故障シナリオを定義する抽象基底クラス """
+    vectorized = False  # malfunction_modules がモジュールの状態を参照せず operating_time 配列だけで判定するか
 
     def __init__(self, name: str, seed: int):
         self.name = name
         self.seed = seed
         self.rng: Optional[Generator] = None
+        self._stream_keys: dict[str, int] = {}  # モジュール名ごとの乱数列のキー
 
     def initialize(self) -> None:
         if self.rng is not None:
             raise_with_log(RuntimeError, "RNG has already been initialized. 'initialize()' should only be called once.")
         self.rng = np.random.default_rng(self.seed)
 
+    def counter_random(self, module_names: Sequence[str], counters: NDArray[np.float64]) -> NDArray[np.float64]:
+        """
+        (シード, モジュール名, カウンタ) だけで決まる一様乱数
+        共有の乱数状態を消費しないため、モジュールの処理順・ワーカーへの分割・バックエンドによらず同じ値になる
+        """
+        for name in module_names:
+            if name not in self._stream_keys:
+                self._stream_keys[name] = stream_key(self.seed, name)
+        keys = np.array([self._stream_keys[name] for name in module_names], dtype=np.uint64)
+        return counter_uniform(keys, counters)
+
+    def bind(self, modules: Sequence["Module"]) -> None:
+        """ シミュレーション対象のモジュールを登録 (シミュレーション開始時に呼ぶ、既定では何もしない) """
+        pass
+
     @abstractmethod
     def malfunction_module(self, module: "Module") -> bool:
         """ モジュールの故障を判定 """
         pass
 
+    def malfunction_modules(self, modules: Sequence["Module"],
+                            operating_time: Optional[NDArray[np.float64]] = None) -> NDArray[np.bool_]:
+        """
+        複数モジュールの故障をまとめて判定 (並び順に乱数を消費)
+        operating_time を省略した場合は各モジュールの稼働時間を使う
+        既定では malfunction_module を順に呼び出す
+        """
+        return np.array([self.malfunction_module(module) for module in modules], dtype=np.bool_)
+
     def __str__(self) -> str:
         return f"<Scenario: {self.name}>"
 
@@ -35,23 +85,98 @@ class BaseRiskScenario(ABC):
         return (f"Scenario(name={self.name}, seed={self.seed})")
 
 class ExponentialFailure(BaseRiskScenario):
-    """ 使用時間が増えると指数関数で故障確率が増えるシナリオ """
+    """
+    使用時間が増えると指数関数で故障確率が増えるシナリオ
+    sampling="step": 稼働のたびに乱数を1つ引いて故障を判定
+    sampling="threshold": モジュールごとに故障する稼働時間を逆関数法で1度だけ求め、以降は比較のみで判定
+        稼働1回の生存確率 exp(-failure_rate * operating_time) の積から累積ハザード
+        H(t) = failure_rate * t(t+1)/2 を求め、H(閾値) = H(初期稼働時間) + Exp(1) となる閾値を使う (故障時刻の分布は step と同じ)
+        閾値はシード・モジュール名・初期稼働時間だけで決まるため、異なる割り当て候補間で共通乱数として使える
+        初期稼働時間はシミュレーション開始時の bind で登録する (閾値はモジュールの識別子ごとに保持)
+    sampling="counter": 稼働のたびに (シード, モジュール名, 稼働時間) から求めたカウンタベースの乱数で判定
+        故障確率は step と同じで、結果はモジュールの処理順や並列化の仕方に依存しない
+    """
+    SAMPLINGS = ("step", "threshold", "counter")
+    vectorized = True
 
-    def __init__(self, name: str, failure_rate: float, seed: int):
+    def __init__(self, name: str, failure_rate: float, seed: int, sampling: str = "step"):
+        if sampling not in self.SAMPLINGS:
+            raise_with_log(ValueError, f"Unknown sampling: {sampling}. Expected one of {self.SAMPLINGS}.")
         self.failure_rate = failure_rate
+        self.sampling = sampling
+        # モジュールの識別子 → (モジュール, 初期稼働時間)
+        # モジュールを保持して識別子の再利用を防ぐ (別のワールドの同名モジュールと区別する)
+        self._bound: dict[int, tuple["Module", float]] = {}
+        self._thresholds: dict[int, float] = {}  # モジュールの識別子 → 故障する稼働時間
         super().__init__(name=name, seed=seed)
 
     def _exponential(self, val: float) -> float:
         return float(1 - np.exp(-self.failure_rate * val))
 
+    def bind(self, modules: Sequence["Module"]) -> None:
+        """ 対象のモジュールと初期稼働時間を登録し、以前に求めた閾値を破棄 (sampling="threshold" のみ使用) """
+        self._thresholds = {}
+        if self.sampling == "threshold":
+            self._bound = {id(module): (module, float(module.operating_time)) for module in modules}
+        else:
+            self._bound = {}
+
+    def failure_threshold(self, module: "Module") -> float:
+        """ モジュールが故障する稼働時間 (bind で登録した初期稼働時間から初回に求めて以降は同じ値を返す) """
+        key = id(module)
+        threshold = self._thresholds.get(key)
+        if threshold is None:
+            bound = self._bound.get(key)
+            if bound is None or bound[0] is not module:
+                raise_with_log(RuntimeError, f"{module.name} is not bound to {self.name}. Call 'bind()' first.")
+            if self.failure_rate <= 0.0:
+                threshold = math.inf
+            else:
+                initial_operating_time = bound[1]
+                rng = np.random.default_rng([self.seed, zlib.crc32(module.name.encode())])
+                hazard = -math.log1p(-float(rng.random()))  # Exp(1)
+                total = initial_operating_time * (initial_operating_time + 1.0) / 2.0 + hazard / self.failure_rate
+                threshold = (math.sqrt(1.0 + 8.0 * total) - 1.0) / 2.0
+            self._thresholds[key] = threshold
+        return threshold
+
+    def failure_thresholds(self, modules: Sequence["Module"]) -> NDArray[np.float64]:
+        """ 複数モジュールの故障する稼働時間 """
+        return np.array([self.failure_threshold(module) for module in modules], dtype=np.float64)
+
     def malfunction_module(self, module: "Module") -> bool:
+        if self.sampling == "threshold":
+            return module.operating_time >= self.failure_threshold(module)
+        if self.sampling == "counter":
+            return bool(self.malfunction_modules([module])[0])
         if self.rng is None:
             raise_with_log(RuntimeError, "RNG not initialized. Call 'initialize()' first.")
         return self.rng.random() < self._exponential(float(module.operating_time))
 
+    def malfunction_modules(self, modules: Sequence["Module"],
+                            operating_time: Optional[NDArray[np.float64]] = None) -> NDArray[np.bool_]:
+        if operating_time is None:
+            operating_time = np.array([module.operating_time for module in modules], dtype=np.float64)
+        if self.sampling == "threshold":
+            return operating_time >= self.failure_thresholds(modules)
+        if self.sampling == "counter":
+            draws = self.counter_random([module.name for module in modules], operating_time)
+        else:
+            if self.rng is None:
+                raise_with_log(RuntimeError, "RNG not initialized. Call 'initialize()' first.")
+            draws = self.rng.random(len(operating_time))
+        return draws < 1 - np.exp(-self.failure_rate * operating_time)
+
+    def __getstate__(self) -> dict[str, Any]:
+        # 登録はモジュールの識別子に依存するため、直列化したシナリオは未登録に戻す (復元先で bind する)
+        state = self.__dict__.copy()
+        state["_bound"], state["_thresholds"] = {}, {}
+        return state
+
     def __deepcopy__(self, memo: dict[int, Any]) -> "ExponentialFailure":
         return ExponentialFailure(
             copy.deepcopy(self.name, memo),
             copy.deepcopy(self.failure_rate, memo),
             copy.deepcopy(self.seed, memo),
+            copy.deepcopy(self.sampling, memo),
         )
@@ -1,3 +1,4 @@
+from collections import Counter
 from dataclasses import dataclass
 from typing import Any, Union, Optional
 from numpy.typing import NDArray
@@ -6,7 +7,7 @@ import logging
 import numpy as np
 from modular_robot_task_allocator.core.robot.performance import PerformanceAttributes
 from modular_robot_task_allocator.core.module.module import Module, ModuleType
-from modular_robot_task_allocator.core.coodinate_utils import is_within_range, make_coodinate_to_tuple
+from modular_robot_task_allocator.core.coodinate_utils import is_within_range, make_coodinate_to_tuple, step_toward
 from modular_robot_task_allocator.core.risk_scenario import BaseRiskScenario
 from modular_robot_task_allocator.utils import raise_with_log
 
@@ -44,27 +45,34 @@ def has_duplicate_module(robots: dict[str, 'Robot']) -> None:
     """
     全ロボットのモジュール名の重複をチェックする関数
     """
-    all_module_names = []
-    for robot in robots.values():
-        module_names = [module.name for module in robot.component_required]
-        all_module_names.extend(module_names)
-
-    duplicates = set(name for name in all_module_names if all_module_names.count(name) > 1)
+    counts = Counter(module.name for robot in robots.values() for module in robot.component_required)
+    duplicates = set(name for name, count in counts.items() if count > 1)
     if duplicates:
         raise_with_log(ValueError, f"Duplicate module names across robots: {duplicates}.")
 
 class Robot:
-    """ ロボットのクラス """
+    """
+    ロボットのクラス
+    搭載モジュールは必要モジュールのリストへの番号 (搭載順) で保持し、モジュールのリストを二重に持たない
+    バッテリー合計・最大バッテリー合計は搭載状態やバッテリーを変更したときに更新して保持し、不足モジュールは番号から求める
+    (バッテリー合計は加算誤差を溜めないよう、変更時に搭載順で足し直す)
+    """
+    __slots__ = ("_type", "_name", "_coordinate", "_component_required", "_mounted", "_state",
+                 "_total_battery", "_total_max_battery")
+    check_aggregates = False  # True なら集計値を読むたびに再計算した値と照合 (テスト用)
+
     def __init__(self, robot_type: RobotType, name: str, coordinate: Union[tuple[float, float], NDArray[np.float64], list[float]], 
                  component: list[Module]):
         self._type = robot_type  # ロボットの種類
         self._name = name  # ロボット名
         self._coordinate = make_coodinate_to_tuple(coordinate)  # 現在の座標
-        self._component_mounted = list(component)  # 搭載モジュール
         self._component_required = list(component)  # 必要モジュール
+        self._state: Optional[RobotState] = None
+        self._set_mounted(tuple(range(len(component))))  # 搭載モジュールの番号
+        counts = Counter(module.type for module in self._component_required)  # 1回の走査で種類ごとに数える
         for module_type, required_num in self.type.required_modules.items():
             # component_required内のモジュール数が指定されたタイプと一致しているかチェック
-            num = len([module for module in self._component_required if module.type == module_type])
+            num = counts[module_type]
             if num == required_num:
                 continue
             else:
@@ -90,7 +98,46 @@ class Robot:
     
     @property
     def component_mounted(self) -> list[Module]:
-        return self._component_mounted
+        return [self._component_required[i] for i in self._mounted]
+
+    def set_component_mounted(self, modules: list[Module]) -> None:
+        """ 搭載モジュールを設定 (状態の復元用のため搭載条件は検査しない) """
+        index = {id(module): i for i, module in enumerate(self._component_required)}
+        self._set_mounted(tuple(index[id(module)] for module in modules))
+
+    def restore_state(self, coordinate: tuple[float, float], state: RobotState, component_mounted: list[Module]) -> None:
+        """ 座標・状態・搭載モジュールを設定 (状態の復元用のため搭載条件や状態の整合は検査しない) """
+        self._coordinate = make_coodinate_to_tuple(coordinate)
+        self.set_component_mounted(component_mounted)
+        self._state = state
+
+    def _set_mounted(self, mounted: tuple[int, ...]) -> None:
+        """ 搭載モジュールを変更し、集計値を更新 """
+        required = self._component_required
+        self._mounted = mounted
+        total = 0.0
+        for i in self._mounted:
+            total += required[i].type.max_battery
+        self._total_max_battery = total
+        self._refresh_battery()
+
+    def _refresh_battery(self) -> None:
+        """ バッテリー合計を更新 (Robot.total_battery の定義どおり搭載順に加算) """
+        total = 0.0
+        for i in self._mounted:
+            total += self._component_required[i].battery
+        self._total_battery = total
+
+    def verify_aggregates(self) -> None:
+        """ 保持している集計値が搭載モジュールから再計算した値と一致するか検査 """
+        total, max_total = 0.0, 0.0
+        for module in self.component_mounted:
+            total += module.battery
+            max_total += module.type.max_battery
+        mounted = set(self.component_mounted)
+        missing = [module for module in self.component_required if module not in mounted]
+        if (total, max_total, missing) != (self._total_battery, self._total_max_battery, self._missing_components()):
+            raise_with_log(RuntimeError, f"Cached aggregates are inconsistent: {self.name}.")
 
     @property
     def component_required(self) -> list[Module]:
@@ -103,22 +150,26 @@ class Robot:
         return self._state
 
     def total_battery(self) -> float:
-        """ 残りバッテリー量を算出 """
-        total = 0.0
-        for module in self.component_mounted:
-            total += module.battery
-        return total
+        """ 残りバッテリー量 """
+        if Robot.check_aggregates:
+            self.verify_aggregates()
+        return self._total_battery
     
     def total_max_battery(self) -> float:
-        """ フル充電したときのバッテリー量を算出 """
-        total = 0.0
-        for module in self.component_mounted:
-            total += module.type.max_battery
-        return total
+        """ フル充電したときのバッテリー量 """
+        if Robot.check_aggregates:
+            self.verify_aggregates()
+        return self._total_max_battery
     
     def missing_components(self) -> list[Module]:
-        """ 不足中のモジュールをリスト化 """
-        return list(set(self.component_required) - set(self.component_mounted))
+        """ 不足中のモジュールをリスト化 (必要モジュールの順序を保持) """
+        if Robot.check_aggregates:
+            self.verify_aggregates()
+        return self._missing_components()
+
+    def _missing_components(self) -> list[Module]:
+        mounted = set(self._mounted)
+        return [module for i, module in enumerate(self._component_required) if i not in mounted]
 
     def is_battery_sufficient(self) -> bool:
         """ バッテリーが使用電力以上かチェック """
@@ -136,10 +187,11 @@ class Robot:
         for module in reversed(self.component_mounted):
             if left <= module.battery:
                 module.battery = module.battery-left
-                return
+                break
             else:
                 left -= module.battery
                 module.battery = 0.0
+        self._refresh_battery()
 
     def charge_battery_power(self, charging_speed: float) -> None:
         """ 1ステップの充電 """
@@ -151,7 +203,8 @@ class Robot:
                 left_charge_power -= remaining_capacity
             else:
                 module.battery = module.battery + left_charge_power
-                return
+                break
+        self._refresh_battery()
     
     def operate(self, scenarios: Optional[list[BaseRiskScenario]]) -> None:
         """ 搭載モジュールを稼働させる """
@@ -163,18 +216,22 @@ class Robot:
             module.operating_time = module.operating_time + 1.0
         
         """ ロボットのモジュールに故障判定 """
-        if scenarios is not None:  # 構成モジュールの状態を更新
-            for module in self.component_mounted:
-                module.update_state(scenarios)
+        if scenarios is not None:  # 構成モジュールの状態を更新 (シナリオごとに故障していないモジュールをまとめて判定)
+            modules = self.component_mounted
+            operating_time = np.array([module.operating_time for module in modules], dtype=np.float64)
+            failed = np.zeros(len(modules), dtype=np.bool_)
+            for scenario in scenarios:
+                alive = np.nonzero(~failed)[0]
+                if len(alive) == 0:
+                    break
+                failed[alive] = scenario.malfunction_modules([modules[i] for i in alive], operating_time[alive])
+            for module, malfunction in zip(modules, failed):
+                module.set_malfunction(bool(malfunction))
 
     def travel(self, target_coordinate: tuple[float, float]) -> None:
         """ 目的地点に向けて移動 """
-        v = np.array(target_coordinate) - np.array(self.coordinate)
         mob = self.type.performance[PerformanceAttributes.MOBILITY]
-        if np.linalg.norm(v) < mob:  # 距離が移動能力以下
-            self._coordinate = make_coodinate_to_tuple(target_coordinate)
-        else:
-            self._coordinate = make_coodinate_to_tuple(self.coordinate + mob*v/np.linalg.norm(v))
+        self._coordinate = step_toward(self.coordinate, target_coordinate, mob)  # 距離が移動能力未満なら目的地点
         for module in self.component_mounted:
             module.coordinate = self.coordinate
     
@@ -184,17 +241,21 @@ class Robot:
             raise_with_log(RuntimeError, f"{module.name} is failed to mount due to a malfunction: {self.name}.")
         if not is_within_range(module.coordinate, self.coordinate):
             raise_with_log(RuntimeError, f"{module.name} is failed to mount due to a coordinate mismatch: {self.name}.")
-        if module not in self.component_required:
+        index = next((i for i, required in enumerate(self._component_required) if required is module), None)
+        if index is None:
             raise_with_log(RuntimeError, f"{module.name} not found in component_required: {self.name}.")
-        self._component_mounted.append(module)
+        self._set_mounted(self._mounted + (index,))
 
     def update_state(self) -> None:
         """ ロボットの状態を更新 """
-        self._component_mounted = [module for module in self.component_mounted if module.is_active()]
-        self._component_mounted = [module for module in self._component_mounted if is_within_range(module.coordinate, self.coordinate)]
+        required = self._component_required
+        mounted = tuple(i for i in self._mounted
+                        if required[i].is_active() and is_within_range(required[i].coordinate, self.coordinate))
+        if mounted != self._mounted:
+            self._set_mounted(mounted)
 
         self._state = RobotState.ACTIVE
-        if len(self.missing_components()) != 0:
+        if self._missing_components():
             self._state = RobotState.DEFECTIVE
             return
         if not self.is_battery_sufficient():
@@ -1,15 +1,42 @@
 import copy
-from typing import Any
+from typing import Any, Optional
+from numpy.typing import NDArray
+import numpy as np
 from modular_robot_task_allocator.core.task import Charge
+from modular_robot_task_allocator.core.spatial_index import GridIndex
 
 class SimulationMap:
     """ シミュレーションのマップ """
     def __init__(self, charge_stations: dict[str, Charge]):
         self._charge_stations = charge_stations
+        # 充電ステーションの空間索引 (番号は charge_stations の並び順)
+        self._station_list = list(charge_stations.values())
+        self._station_index = GridIndex(
+            np.array([station.coordinate for station in self._station_list], dtype=np.float64).reshape(-1, 2))
 
     @property
     def charge_stations(self) -> dict[str, Charge]:
         return self._charge_stations
+
+    @property
+    def station_index(self) -> GridIndex:
+        return self._station_index
+
+    def nearest_station(self, coordinate: tuple[float, float]) -> Optional[Charge]:
+        """ 最も近い充電ステーション (同距離なら先に登録されたもの、無ければ None) """
+        index, _ = self._station_index.nearest(coordinate)
+        return self._station_list[index] if index >= 0 else None
+
+    def nearest_stations(self, coordinates: NDArray[np.float64]) -> NDArray[np.int64]:
+        """ 座標の並び (..., 2) それぞれに最も近い充電ステーションの番号 (無ければ -1) """
+        coordinates = np.asarray(coordinates, dtype=np.float64)
+        index, _ = self._station_index.nearest_many(coordinates.reshape(-1, 2))
+        return index.reshape(coordinates.shape[:-1])
+
+    def k_nearest_stations(self, coordinate: tuple[float, float], k: int) -> list[tuple[Charge, float]]:
+        """ 近い順の k 個の充電ステーションと距離 """
+        index, dist = self._station_index.k_nearest(coordinate, k)
+        return [(self._station_list[i], float(d)) for i, d in zip(index, dist)]
     
     def __str__(self) -> str:
         return f"<Map: {len(self.charge_stations)} stations>"
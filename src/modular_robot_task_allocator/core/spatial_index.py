@@ -0,0 +1,159 @@
+from typing import Optional
+from numpy.typing import NDArray
+import logging, math
+import numpy as np
+from modular_robot_task_allocator.utils import raise_with_log
+
+logger = logging.getLogger(__name__)
+
+
+class GridIndex:
+    """
+    2次元の点集合に対する一様グリッドの空間索引
+    点をセルごとに並べ替えて保持し、問い合わせ点のセルから外側のリングへ順に探索する
+    距離は coodinate_utils.distance と同じ演算順序で計算し、同距離なら番号の小さい点を返すため全探索と同じ結果になる
+    """
+    def __init__(self, points: NDArray[np.float64], cell_size: Optional[float] = None):
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        self._points = points
+        # 1点の問い合わせ用 (numpy の呼び出しを避けるため Python のリストで保持)
+        self._cells: dict[tuple[int, int], list[tuple[int, float, float]]] = {}
+        self._rings: list[list[list[int]]] = []  # リングごとのセルのずれ
+        n = len(points)
+        if n == 0:
+            self._cell_size = 1.0
+            self._origin = np.zeros(2)
+            self._shape = (1, 1)
+            self._start = np.zeros(2, dtype=np.int64)
+            self._order = np.zeros(0, dtype=np.int64)
+            return
+        low, high = points.min(axis=0), points.max(axis=0)
+        if cell_size is None:  # 1セルあたり平均1点程度
+            extent = np.maximum(high - low, 0.0)
+            area = extent[0] * extent[1] if extent.min() > 0 else extent.max() ** 2
+            cell_size = float(np.sqrt(area / n)) if area > 0 else 1.0
+        if cell_size <= 0:
+            raise_with_log(ValueError, f"Cell_size must be positive: {cell_size}.")
+        self._cell_size = cell_size
+        self._origin = low
+        self._shape = tuple(int(v) for v in np.floor((high - low) / cell_size).astype(np.int64) + 1)
+        cells = self._cell_of(points)
+        cell = self._cell_id(cells)
+        self._order = np.argsort(cell, kind='stable')  # セル内は番号順
+        self._start = np.searchsorted(cell[self._order], np.arange(self._shape[0] * self._shape[1] + 1))
+        for i, (cx, cy), (x, y) in zip(self._order.tolist(), cells[self._order].tolist(), points[self._order].tolist()):
+            self._cells.setdefault((cx, cy), []).append((i, x, y))
+
+    def __len__(self) -> int:
+        return len(self._points)
+
+    @property
+    def points(self) -> NDArray[np.float64]:
+        return self._points
+
+    @property
+    def cell_size(self) -> float:
+        return self._cell_size
+
+    def _cell_of(self, points: NDArray[np.float64]) -> NDArray[np.int64]:
+        """ 点を含むセル (グリッド外はグリッドの端のセルに寄せる) """
+        cell = np.floor((points - self._origin) / self._cell_size)
+        return np.clip(cell, 0, np.array(self._shape) - 1).astype(np.int64)
+
+    def _cell_id(self, cell: NDArray[np.int64]) -> NDArray[np.int64]:
+        return cell[..., 0] * self._shape[1] + cell[..., 1]
+
+    def _ring(self, radius: int) -> NDArray[np.int64]:
+        """ 中心セルからチェビシェフ距離 radius のセルへのずれ """
+        if radius == 0:
+            return np.zeros((1, 2), dtype=np.int64)
+        r = np.arange(-radius, radius + 1)
+        edge = np.full(len(r), radius)
+        side = r[1:-1]
+        return np.concatenate([np.stack([r, -edge], axis=1), np.stack([r, edge], axis=1),
+                               np.stack([-edge[1:-1], side], axis=1), np.stack([edge[1:-1], side], axis=1)])
+
+    def _candidates(self, cells: NDArray[np.int64], radius: int) -> tuple[NDArray[np.int64], NDArray[np.int64]]:
+        """ 各問い合わせのセルから radius 離れたリングに含まれる (問い合わせ番号, 点番号) の組 """
+        offsets = self._ring(radius)
+        target = cells[:, None, :] + offsets[None, :, :]
+        valid = np.all((target >= 0) & (target < np.array(self._shape)), axis=2)
+        query = np.broadcast_to(np.arange(len(cells))[:, None], valid.shape)[valid]
+        cell_id = self._cell_id(target[valid])
+        start, count = self._start[cell_id], self._start[cell_id + 1] - self._start[cell_id]
+        query = np.repeat(query, count)
+        within = np.arange(count.sum()) - np.repeat(np.cumsum(count) - count, count)
+        return query, self._order[np.repeat(start, count) + within]
+
+    def _distance(self, queries: NDArray[np.float64], points: NDArray[np.int64]) -> NDArray[np.float64]:
+        dx = self._points[points, 0] - queries[:, 0]
+        dy = self._points[points, 1] - queries[:, 1]
+        return np.sqrt(dx * dx + dy * dy)
+
+    def nearest_many(self, queries: NDArray[np.float64]) -> tuple[NDArray[np.int64], NDArray[np.float64]]:
+        """
+        各問い合わせ点に最も近い点の番号と距離 (同距離なら番号の小さい点)
+        点が無い場合は番号 -1、距離 inf
+        """
+        queries = np.asarray(queries, dtype=np.float64).reshape(-1, 2)
+        index = np.full(len(queries), -1, dtype=np.int64)
+        best = np.full(len(queries), np.inf)
+        if len(self._points) == 0 or len(queries) == 0:
+            return index, best
+        cells = self._cell_of(queries)
+        pending = np.arange(len(queries))
+        for radius in range(max(self._shape) + 1):
+            query, point = self._candidates(cells[pending], radius)
+            if len(query) > 0:
+                dist = self._distance(queries[pending[query]], point)
+                order = np.lexsort((point, dist, query))
+                first = order[np.r_[True, query[order][1:] != query[order][:-1]]]
+                q = pending[query[first]]
+                better = (dist[first] < best[q]) | ((dist[first] == best[q]) & (point[first] < index[q]))
+                index[q[better]], best[q[better]] = point[first][better], dist[first][better]
+            # 外側のリングの点は radius × cell_size より遠い (丸め誤差を考慮して1リング分の余裕を持たせる)
+            pending = pending[best[pending] > (radius - 1) * self._cell_size]
+            if len(pending) == 0:
+                break
+        return index, best
+
+    def nearest(self, query: tuple[float, float]) -> tuple[int, float]:
+        """ 問い合わせ点に最も近い点の番号と距離 (点が無い場合は -1, inf) """
+        x, y = float(query[0]), float(query[1])
+        ox, oy = self._origin.tolist()
+        cx = min(max(math.floor((x - ox) / self._cell_size), 0), self._shape[0] - 1)
+        cy = min(max(math.floor((y - oy) / self._cell_size), 0), self._shape[1] - 1)
+        best, index = math.inf, -1
+        for radius in range(max(self._shape) + 1):
+            if radius == len(self._rings):
+                self._rings.append(self._ring(radius).tolist())
+            for ox, oy in self._rings[radius]:
+                for i, px, py in self._cells.get((cx + ox, cy + oy), ()):
+                    dx, dy = px - x, py - y
+                    dist = math.sqrt(dx * dx + dy * dy)
+                    if dist < best or (dist == best and i < index):
+                        best, index = dist, i
+            if best <= (radius - 1) * self._cell_size:
+                break
+        return index, best
+
+    def k_nearest(self, query: tuple[float, float], k: int) -> tuple[NDArray[np.int64], NDArray[np.float64]]:
+        """ 問い合わせ点に近い順の k 点の番号と距離 (同距離なら番号の小さい順) """
+        if k < 0:
+            raise_with_log(ValueError, f"K must be non-negative: {k}.")
+        k = min(k, len(self._points))
+        if k == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float64)
+        queries = np.asarray(query, dtype=np.float64).reshape(1, 2)
+        cells = self._cell_of(queries)
+        points, dists = [], []
+        for radius in range(max(self._shape) + 1):
+            _, point = self._candidates(cells, radius)
+            points.append(point)
+            dists.append(self._distance(np.broadcast_to(queries, (len(point), 2)), point))
+            found = np.concatenate(dists)
+            if len(found) >= k and np.partition(found, k - 1)[k - 1] <= (radius - 1) * self._cell_size:
+                break
+        point, dist = np.concatenate(points), np.concatenate(dists)
+        order = np.lexsort((point, dist))[:k]
+        return point[order], dist[order]
@@ -3,7 +3,8 @@ from typing import Any, Union, Optional
 from numpy.typing import NDArray
 import copy, logging
 import numpy as np
-from modular_robot_task_allocator.core.robot.robot import Robot, RobotState
+from modular_robot_task_allocator.core.robot.performance import PerformanceAttributes
+from modular_robot_task_allocator.core.robot.robot import Robot, RobotState, RobotType
 from modular_robot_task_allocator.core.coodinate_utils import is_within_range, make_coodinate_to_tuple
 from modular_robot_task_allocator.utils import raise_with_log
 
@@ -11,6 +12,9 @@ logger = logging.getLogger(__name__)
 
 class BaseTask(ABC):
     """ タスクを表す抽象基底クラス """
+    __slots__ = ("_name", "_coordinate", "_total_workload", "_completed_workload", "_task_dependency", "_assigned_robot",
+                 "_pending_dependencies", "_assigned_performance")
+    consumed_performance: frozenset[PerformanceAttributes] = frozenset()  # タスクの実行に使われるロボットの能力
 
     def __init__(self, name: str, coordinate: Union[tuple[float, float], NDArray[np.float64], list[float]], total_workload: float, 
                  completed_workload: float):
@@ -20,6 +24,8 @@ class BaseTask(ABC):
         self._completed_workload = completed_workload  # 完了済み仕事量
         self._task_dependency: Optional[list[BaseTask]] = None  # 依存するタスクのリスト
         self._assigned_robot: list[Robot] = [] # タスクに配置済みのロボットのリスト
+        self._pending_dependencies: Optional[int] = None  # 未完了の依存タスク数 (DependencyTracker が追跡中のみ)
+        self._assigned_performance = 0.0  # 配置済みのロボットの能力値の合計
         if total_workload < 0.0:
             raise_with_log(ValueError, f"Total_workload must be positive.")
         if completed_workload > total_workload:
@@ -37,7 +43,7 @@ class BaseTask(ABC):
     
     @coordinate.setter
     def coordinate(self, coordinate: Union[tuple[float, float], NDArray[np.float64], list[float]]) -> None:
-        self._coordinate = copy.deepcopy(make_coodinate_to_tuple(coordinate))
+        self._coordinate = make_coodinate_to_tuple(coordinate)  # タプルは不変なので複製しない
 
     @property
     def total_workload(self) -> float:
@@ -57,6 +63,15 @@ class BaseTask(ABC):
     def assigned_robot(self) -> list[Robot]:
         return self._assigned_robot
 
+    @property
+    def pending_dependencies(self) -> Optional[int]:
+        """ 未完了の依存タスク数 (DependencyTracker が追跡していなければ None) """
+        return self._pending_dependencies
+
+    @pending_dependencies.setter
+    def pending_dependencies(self, pending_dependencies: Optional[int]) -> None:
+        self._pending_dependencies = pending_dependencies
+
     @abstractmethod
     def update(self) -> bool:
         """ タスクが実行されたときの処理を記述 """
@@ -66,31 +81,53 @@ class BaseTask(ABC):
         """ タスクの依存関係を設定 """
         self._task_dependency = task_dependency
 
+    def has_task_dependency(self) -> bool:
+        """ 依存関係が設定済みか """
+        return self._task_dependency is not None
+
+    def restore_state(self, completed_workload: float, coordinate: tuple[float, float]) -> None:
+        """ 完了仕事量と座標を設定 (状態の復元用のため範囲は検査しない) """
+        self._completed_workload = completed_workload
+        self._coordinate = make_coodinate_to_tuple(coordinate)
+
     def is_completed(self) -> bool:
         """ タスクが完了しているかを確認 """
         return self.completed_workload >= self.total_workload
     
     def are_dependencies_completed(self) -> bool:
         """ 依存するタスクがすべて完了しているかを確認する """
+        if self._pending_dependencies is not None:
+            return self._pending_dependencies == 0
         return all(dep.is_completed() for dep in self.task_dependency)
 
+    def performance_contribution(self, robot_type: RobotType) -> float:
+        """ ロボット1台分の能力値 (consumed_performance に含まれる能力の合計) """
+        total = 0.0
+        for attr, value in robot_type.performance.items():
+            if attr in self.consumed_performance:
+                total += value
+        return total
+
+    @property
+    def assigned_performance(self) -> float:
+        return self._assigned_performance
+
+    def missing_performance(self) -> float:
+        """ 実行に必要な能力値のうち不足している分 """
+        return max(1.0 - self._assigned_performance, 0.0)
+
     def is_performance_satisfied(self) -> bool:
         """ 
         配置されたロボットが必要なパフォーマンスを満たしているか確認
         タスクは複数のロボットの共同作業により実行される
         ロボットの合計能力値が1.0以上の時、タスクは実行される
         """
-        total_assigned_performance = 0.0
-        for robot in self.assigned_robot:
-            for attr, value in robot.type.performance.items():
-                if self.__class__.__name__ == attr:
-                    total_assigned_performance += value
-
-        return total_assigned_performance >= 1.0
+        return self._assigned_performance >= 1.0
 
     def release_robot(self) -> None:
         """ 配置されている全ロボットをリリース """
         self._assigned_robot = []
+        self._assigned_performance = 0.0
 
     def assign_robot(self, robot: Robot) -> None:
         """ ロボットを配置 """
@@ -100,6 +137,7 @@ class BaseTask(ABC):
             raise_with_log(RuntimeError, f"{robot.name} with mismatched coordinates are assigned.")
 
         self._assigned_robot.append(robot)
+        self._assigned_performance += self.performance_contribution(robot.type)
 
     def __str__(self) -> str:
         """ タスクを文字列として表示 """
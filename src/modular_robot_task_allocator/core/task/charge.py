@@ -9,6 +9,8 @@ logger = logging.getLogger(__name__)
 
 class Charge(BaseTask):
     """ 充電タスク """
+    __slots__ = ("_charging_speed",)
+
     def __init__(self, charging_speed: float, **kwargs: Any):
         super().__init__(**kwargs)
         self._charging_speed = charging_speed
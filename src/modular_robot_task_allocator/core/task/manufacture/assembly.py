@@ -1,5 +1,5 @@
 import logging
-from typing import Any
+from typing import Any, Optional
 import numpy as np
 from modular_robot_task_allocator.core.module.module import ModuleState
 from modular_robot_task_allocator.core.task.base_task import BaseTask
@@ -10,10 +10,13 @@ logger = logging.getLogger(__name__)
 
 class Assembly(BaseTask):
     """ ロボット自己組み立てタスク """
-    def __init__(self, name: str, robot: Robot):
-        missingComponents = robot.missing_components()
-        
-        total_workload = len(missingComponents)
+    __slots__ = ("_target_robot",)
+
+    def __init__(self, name: str, robot: Robot, total_workload: Optional[float] = None):
+        """ total_workload を省略すると現在の不足モジュール数を総仕事量とする """
+        if total_workload is None:
+            missingComponents = robot.missing_components()
+            total_workload = len(missingComponents)
         super().__init__(name=name, coordinate=robot.coordinate, total_workload=total_workload, 
                          completed_workload=0.0)
         self._target_robot = robot
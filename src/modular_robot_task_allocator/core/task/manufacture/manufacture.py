@@ -1,12 +1,16 @@
 from typing import Any
 import logging
 from modular_robot_task_allocator.core.task.base_task import BaseTask
+from modular_robot_task_allocator.core.robot.performance import PerformanceAttributes
 from modular_robot_task_allocator.utils import raise_with_log
 
 logger = logging.getLogger(__name__)
 
 class Manufacture(BaseTask):
     """ 加工タスクのクラス """
+    __slots__ = ()
+    consumed_performance = frozenset({PerformanceAttributes.MANUFACTURE})
+
     def __init__(self, **kwargs: Any):
         super().__init__(**kwargs)
 
@@ -3,24 +3,26 @@ from typing import Any, Union
 from numpy.typing import NDArray
 import numpy as np
 from modular_robot_task_allocator.core.task.base_task import BaseTask
-from modular_robot_task_allocator.core.coodinate_utils import is_within_range, make_coodinate_to_tuple
+from modular_robot_task_allocator.core.robot.performance import PerformanceAttributes
+from modular_robot_task_allocator.core.coodinate_utils import distance, is_within_range, make_coodinate_to_tuple, step_toward
 from modular_robot_task_allocator.utils import raise_with_log
 
 logger = logging.getLogger(__name__)
 
 class Transport(BaseTask):
     """ 運搬タスクのクラス """
+    __slots__ = ("_origin_coordinate", "_destination_coordinate", "_transport_resistance")
+    consumed_performance = frozenset({PerformanceAttributes.TRANSPORT})
 
     def __init__(self, origin_coordinate: Union[tuple[float, float], NDArray[np.float64], list[float]], 
                  destination_coordinate: Union[tuple[float, float], NDArray[np.float64], list[float]],
-                 speed: float, **kwargs: Any):
+                 transport_resistance: float, **kwargs: Any):
         self._origin_coordinate = make_coodinate_to_tuple(origin_coordinate)  # 出発地点座標
         self._destination_coordinate = make_coodinate_to_tuple(destination_coordinate)  # 目的地座標
-        self._speed = speed  # 荷物運搬の難しさ
+        self._transport_resistance = transport_resistance  # 荷物運搬の難しさ
         super().__init__(**kwargs)
 
-        v = np.array(self.destination_coordinate) - np.array(self.origin_coordinate)
-        total = self.transport_resistance * np.linalg.norm(v)
+        total = self.transport_resistance * distance(self.destination_coordinate, self.origin_coordinate)
         if self.total_workload != total:
             raise_with_log(ValueError, f"Total_workload does not match carrying_distance * transport_resistance.")
     
@@ -33,17 +35,12 @@ class Transport(BaseTask):
         return self._destination_coordinate
     
     @property
-    def speed(self) -> float:
-        return self._speed
+    def transport_resistance(self) -> float:
+        return self._transport_resistance
 
     def _travel(self, mobility: float) -> None:
         """ 荷物の移動処理 """
-        target_coordinate = np.array(self.destination_coordinate)
-        v = target_coordinate - np.array(self.coordinate)
-        if np.linalg.norm(v) < mobility:
-            self.coordinate = self.destination_coordinate
-        else:
-            self.coordinate = self.coordinate + mobility * v / np.linalg.norm(v)
+        self._coordinate = step_toward(self.coordinate, self.destination_coordinate, mobility)
 
         if self.assigned_robot is None:
             raise_with_log(RuntimeError, f"Assigned_robot must be initialized.")
@@ -71,8 +68,7 @@ class Transport(BaseTask):
         
         self._travel(adjusted_mobility)
 
-        v = np.array(self.destination_coordinate) - np.array(self.coordinate)
-        left = float(np.linalg.norm(v) * self.transport_resistance)
+        left = float(distance(self.destination_coordinate, self.coordinate) * self.transport_resistance)
         self._completed_workload = self.total_workload - left
         return True
     
\ No newline at end of file
@@ -8,11 +8,10 @@ logger = logging.getLogger(__name__)
 
 class TransportModule(Transport):
     """ モジュール運搬タスクのクラス """
+    __slots__ = ("_target_module",)
 
     def __init__(self, target_module: Module, **kwargs: Any):
         self._target_module = target_module
-        total_workload=total_workload
-
         super().__init__(**kwargs)
         self.initialize_task_dependency([])
         if self.origin_coordinate != target_module.coordinate:
@@ -0,0 +1,96 @@
+from collections import Counter
+from dataclasses import dataclass
+from typing import Iterable, Optional
+import logging, math
+from modular_robot_task_allocator.core.module.module import Module, ModuleType
+from modular_robot_task_allocator.core.robot.robot import Robot
+from modular_robot_task_allocator.core.task.base_task import BaseTask
+from modular_robot_task_allocator.utils import raise_with_log
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Violation:
+    """ 検査で見つかった不整合 """
+    kind: str  # 不整合の種類 (duplicate_module, required_modules, battery, operating_time, coordinate, workload, dependency)
+    target: str  # 対象のロボット・モジュール・タスク名
+    message: str
+
+    def __str__(self) -> str:
+        return f"[{self.kind}] {self.target}: {self.message}"
+
+
+def _is_valid_coordinate(coordinate: object) -> bool:
+    """ 有限の実数2つからなる座標か """
+    try:
+        x, y = coordinate  # type: ignore[misc]
+        return math.isfinite(x) and math.isfinite(y)
+    except (TypeError, ValueError):
+        return False
+
+def _check_module(module: Module, violations: list[Violation]) -> None:
+    if not 0.0 <= module.battery <= module.type.max_battery:
+        violations.append(Violation("battery", module.name,
+                                    f"Battery {module.battery} is out of range [0, {module.type.max_battery}]."))
+    if not module.operating_time >= 0.0:
+        violations.append(Violation("operating_time", module.name,
+                                    f"Operating_time must be non-negative: {module.operating_time}."))
+    if not _is_valid_coordinate(module.coordinate):
+        violations.append(Violation("coordinate", module.name, f"Invalid coordinate: {module.coordinate}."))
+
+def _check_task(task: BaseTask, task_names: set[str], violations: list[Violation]) -> None:
+    if not 0.0 <= task.completed_workload <= task.total_workload:
+        violations.append(Violation("workload", task.name, f"Completed_workload {task.completed_workload} is out of "
+                                                           f"range [0, {task.total_workload}]."))
+    if not _is_valid_coordinate(task.coordinate):
+        violations.append(Violation("coordinate", task.name, f"Invalid coordinate: {task.coordinate}."))
+    if task.has_task_dependency():
+        for dependency in task.task_dependency:
+            if dependency.name not in task_names:
+                violations.append(Violation("dependency", task.name, f"Unknown dependency: {dependency.name}."))
+
+
+def validate_fleet(robots: dict[str, Robot], modules: Optional[Iterable[Module]] = None,
+                   tasks: Optional[dict[str, BaseTask]] = None) -> list[Violation]:
+    """
+    読み込んだロボット・モジュール・タスクを1回の走査で検査し、見つかった不整合をすべて返す
+    modules には ロボットに属さないモジュール (運搬対象など) を含めてもよい (ロボットの構成モジュールは自動で検査)
+    """
+    violations: list[Violation] = []
+    owner: dict[str, str] = {}  # モジュール名 → 最初に見つかったロボット名
+    checked: set[int] = set()
+    for name, robot in robots.items():
+        if not _is_valid_coordinate(robot.coordinate):
+            violations.append(Violation("coordinate", name, f"Invalid coordinate: {robot.coordinate}."))
+        counts: Counter[ModuleType] = Counter()
+        for module in robot.component_required:
+            counts[module.type] += 1
+            if module.name in owner:
+                violations.append(Violation("duplicate_module", module.name,
+                                            f"Module is used by both {owner[module.name]} and {name}."))
+            else:
+                owner[module.name] = name
+            if id(module) not in checked:
+                checked.add(id(module))
+                _check_module(module, violations)
+        for module_type, required in robot.type.required_modules.items():  # Robot.__init__ と同じ規則
+            if counts[module_type] != required:
+                violations.append(Violation("required_modules", name, f"{module_type.name} is required {required} "
+                                                                      f"but {counts[module_type]} is assigned."))
+    for module in modules or []:
+        if id(module) not in checked:
+            checked.add(id(module))
+            _check_module(module, violations)
+    if tasks is not None:
+        task_names = set(tasks)
+        for task in tasks.values():
+            _check_task(task, task_names, violations)
+    return violations
+
+def check_fleet(robots: dict[str, Robot], modules: Optional[Iterable[Module]] = None,
+                tasks: Optional[dict[str, BaseTask]] = None) -> None:
+    """ validate_fleet で不整合が見つかれば、すべてをまとめて ValueError を送出 """
+    violations = validate_fleet(robots, modules, tasks)
+    if violations:
+        raise_with_log(ValueError, f"{len(violations)} violations found:\n" + "\n".join(map(str, violations)))
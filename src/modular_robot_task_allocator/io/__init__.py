@@ -0,0 +1,18 @@
+from .input import (
+    load_property, load_tasks, load_task_dependency, load_module_types, load_modules, load_robot_types, load_robots,
+    load_simulation_map, load_risk_scenarios, load_task_priorities, add_assembly_task, permutation_of_tasks)
+
+__all__ = [
+    'load_property',
+    'load_tasks',
+    'load_task_dependency',
+    'load_module_types',
+    'load_modules',
+    'load_robot_types',
+    'load_robots',
+    'load_simulation_map',
+    'load_risk_scenarios',
+    'load_task_priorities',
+    'add_assembly_task',
+    'permutation_of_tasks',
+    ]
@@ -1,4 +1,9 @@
 from typing import Type, Any
+from enum import Enum
+import inspect, yaml
+from modular_robot_task_allocator.utils import raise_with_log
+
+NAME = 'name'
 
 def find_subclasses_by_name(base_class: Type[Any]) -> dict[str, Type[Any]]:
     """
@@ -10,12 +15,19 @@ def find_subclasses_by_name(base_class: Type[Any]) -> dict[str, Type[Any]]:
     subclasses: dict[str, Type[Any]] = {}
     for cls in base_class.__subclasses__():
         subclasses[cls.__name__] = cls  # クラス名 (__name__) をキーとして登録
+        subclasses.update(find_subclasses_by_name(cls))  # 孫クラス (TransportModule など) も探索
     return subclasses
 
 def get_class_init_args(cls: Type[Any], input_data: dict[str, Any], name: str) -> dict[str, Any]:
     """ clsの __init__ 引数にinput_dataを成形 """
-    signature = inspect.signature(cls.__init__)
-    init_args = [param for param in signature.parameters]
+    init_args: set[str] = set()
+    for klass in cls.__mro__:  # **kwargs で基底クラスへ渡す引数も対象にする
+        if "__init__" not in vars(klass):
+            continue
+        parameters = inspect.signature(klass.__init__).parameters
+        init_args.update(name for name, param in parameters.items() if param.kind != param.VAR_KEYWORD)
+        if not any(param.kind == param.VAR_KEYWORD for param in parameters.values()):
+            break
     # 渡すべき引数をフィルタリング
     filtered_args = {
         k: v for k, v in input_data.items() if k in init_args
@@ -24,8 +36,8 @@ def get_class_init_args(cls: Type[Any], input_data: dict[str, Any], name: str) -
 
     return filtered_args
 
-def enum_constructor(loader: Any, tag_suffix: str, node: yaml.Node) -> Any:
-    """ Enum辞書の読み込みハンドラ """
+def enum_constructor(loader: Any, tag_suffix: str, node: yaml.Node, enum_classes: dict[str, Type[Enum]]) -> Any:
+    """ Enum辞書の読み込みハンドラ (enum_classes はタグ名 → Enum クラス) """
     tag_name = tag_suffix.lstrip('!')
     enum_class = enum_classes.get(tag_name)
     if not isinstance(enum_class, type) or not issubclass(enum_class, Enum):
@@ -42,4 +54,4 @@ def enum_constructor(loader: Any, tag_suffix: str, node: yaml.Node) -> Any:
         }
 
     else:
-        raise raise_with_log(TypeError, f"Unsupported YAML node type for tag '!{tag_name}': {type(node)}")
\ No newline at end of file
+        raise_with_log(TypeError, f"Unsupported YAML node type for tag '!{tag_name}': {type(node)}")
\ No newline at end of file
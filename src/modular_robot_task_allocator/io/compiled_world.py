@@ -0,0 +1,404 @@
+from typing import Any, Iterable, Optional
+from numpy.typing import NDArray
+import csv, json, logging, struct
+import numpy as np
+from modular_robot_task_allocator.core import *
+from modular_robot_task_allocator.utils import raise_with_log
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"MRTAWRLD"
+VERSION = 2
+ALIGNMENT = 64  # 各列の先頭位置の境界 (バイト)
+_PREFIX = struct.Struct("<8sQ")  # マジックナンバー, ヘッダー (JSON) の長さ
+
+TASK_CLASSES: dict[str, type[BaseTask]] = {
+    "Manufacture": Manufacture,
+    "Transport": Transport,
+    "TransportModule": TransportModule,
+    "Assembly": Assembly,
+}
+MODULE_STATES = list(ModuleState)
+ROBOT_STATES = list(RobotState)
+PERFORMANCE_ATTRIBUTES = list(PerformanceAttributes)
+
+
+def load_capabilities(file_path: str) -> dict[str, list[str]]:
+    """ CSV (task_capabilities.csv など) を列名 → 値のリストの辞書として読み込む """
+    try:
+        with open(file_path, 'r', newline='') as f:
+            rows = list(csv.reader(f))
+    except FileNotFoundError as e:
+        raise_with_log(FileNotFoundError, f"File not found: {e}.")
+    if not rows:
+        return {}
+    header, body = rows[0], rows[1:]
+    return {column: [row[i] if i < len(row) else "" for row in body] for i, column in enumerate(header)}
+
+def _csr(lists: list[list[int]]) -> tuple[NDArray[np.int64], NDArray[np.int64]]:
+    """ 可変長の番号リストを (先頭位置, 連結した番号) に変換 """
+    offset = np.zeros(len(lists) + 1, dtype=np.int64)
+    offset[1:] = np.cumsum([len(items) for items in lists])
+    return offset, np.array([i for items in lists for i in items], dtype=np.int64)
+
+def _strings(values: list[str]) -> tuple[NDArray[np.int64], NDArray[np.uint8]]:
+    """ 文字列のリストを (先頭位置, 連結した UTF-8 バイト列) に変換 """
+    encoded = [value.encode() for value in values]
+    offset = np.zeros(len(encoded) + 1, dtype=np.int64)
+    offset[1:] = np.cumsum([len(value) for value in encoded])
+    return offset, np.frombuffer(b"".join(encoded), dtype=np.uint8)
+
+def _coordinates(coordinates: list[tuple[float, float]]) -> NDArray[np.float64]:
+    return np.array(coordinates, dtype=np.float64).reshape(-1, 2)
+
+
+def compile_world(file_path: str, tasks: dict[str, BaseTask], robots: dict[str, Robot], simulation_map: SimulationMap,
+                  risk_scenarios: Optional[dict[str, BaseRiskScenario]] = None, modules: Optional[Iterable[Module]] = None,
+                  capabilities: Optional[dict[str, list[str]]] = None) -> None:
+    """
+    読み込んだワールドを1つのバイナリファイルへ書き出す
+    ファイルはマジックナンバー・JSON ヘッダー (名前・列の型と位置・故障シナリオ) と、境界を揃えて並べた列からなる
+    modules には ロボットに属さないモジュールを含めてもよい (ロボットの構成モジュールと運搬対象は自動で含める)
+    """
+    # モジュール (ロボット順 → 運搬対象 → 追加分、重複なし)
+    module_list: dict[int, Module] = {}
+    for robot in robots.values():
+        for module in robot.component_required:
+            module_list.setdefault(id(module), module)
+    for task in tasks.values():
+        if isinstance(task, TransportModule):
+            module_list.setdefault(id(task.target_module), task.target_module)
+    for module in modules or []:
+        module_list.setdefault(id(module), module)
+    module_objects = list(module_list.values())
+    module_index = {id(module): m for m, module in enumerate(module_objects)}
+
+    module_types = list(dict.fromkeys([module.type for module in module_objects] +
+                                      [module_type for robot in robots.values()
+                                       for module_type in robot.type.required_modules]))
+    module_type_index = {module_type: k for k, module_type in enumerate(module_types)}
+    robot_types = list(dict.fromkeys(robot.type for robot in robots.values()))
+    robot_type_index = {robot_type: k for k, robot_type in enumerate(robot_types)}
+    robot_index = {id(robot): r for r, robot in enumerate(robots.values())}
+    task_index = {id(task): t for t, task in enumerate(tasks.values())}
+    stations = list(simulation_map.charge_stations.values())
+
+    columns: dict[str, NDArray[Any]] = {}
+    columns["module_type_max_battery"] = np.array([mt.max_battery for mt in module_types], dtype=np.float64)
+    columns["module_type"] = np.array([module_type_index[module.type] for module in module_objects], dtype=np.int64)
+    columns["module_coordinate"] = _coordinates([module.coordinate for module in module_objects])
+    columns["module_battery"] = np.array([module.battery for module in module_objects], dtype=np.float64)
+    columns["module_operating_time"] = np.array([module.operating_time for module in module_objects], dtype=np.float64)
+    columns["module_state"] = np.array([MODULE_STATES.index(module.state) for module in module_objects], dtype=np.int8)
+
+    required = np.zeros((len(robot_types), len(module_types)), dtype=np.int64)
+    performance = np.zeros((len(robot_types), len(PERFORMANCE_ATTRIBUTES)), dtype=np.float64)
+    has_performance = np.zeros((len(robot_types), len(PERFORMANCE_ATTRIBUTES)), dtype=np.bool_)
+    for k, robot_type in enumerate(robot_types):
+        for module_type, num in robot_type.required_modules.items():
+            required[k, module_type_index[module_type]] = num
+        for attr, value in robot_type.performance.items():
+            a = PERFORMANCE_ATTRIBUTES.index(attr)
+            performance[k, a], has_performance[k, a] = value, True
+    columns["robot_type_required"] = required
+    columns["robot_type_performance"] = performance
+    columns["robot_type_has_performance"] = has_performance
+    columns["robot_type_power_consumption"] = np.array([rt.power_consumption for rt in robot_types], dtype=np.float64)
+    columns["robot_type_recharge_trigger"] = np.array([rt.recharge_trigger for rt in robot_types], dtype=np.float64)
+
+    columns["robot_type"] = np.array([robot_type_index[robot.type] for robot in robots.values()], dtype=np.int64)
+    columns["robot_coordinate"] = _coordinates([robot.coordinate for robot in robots.values()])
+    columns["robot_state"] = np.array([ROBOT_STATES.index(robot.state) for robot in robots.values()], dtype=np.int8)
+    columns["robot_component_offset"], columns["robot_component"] = _csr(
+        [[module_index[id(module)] for module in robot.component_required] for robot in robots.values()])
+    columns["robot_mounted_offset"], columns["robot_mounted"] = _csr(
+        [[module_index[id(module)] for module in robot.component_mounted] for robot in robots.values()])
+
+    task_classes = list(TASK_CLASSES)
+    task_class = np.zeros(len(tasks), dtype=np.int8)
+    origin = np.full((len(tasks), 2), np.nan)
+    destination = np.full((len(tasks), 2), np.nan)
+    resistance = np.full(len(tasks), np.nan)
+    target_module = np.full(len(tasks), -1, dtype=np.int64)
+    target_robot = np.full(len(tasks), -1, dtype=np.int64)
+    has_dependency = np.zeros(len(tasks), dtype=np.bool_)
+    dependencies: list[list[int]] = []
+    for t, task in enumerate(tasks.values()):
+        name = task.__class__.__name__
+        if name not in TASK_CLASSES:
+            raise_with_log(TypeError, f"Unsupported task class for compiled world: {name}.")
+        task_class[t] = task_classes.index(name)
+        if isinstance(task, Transport):
+            origin[t], destination[t] = task.origin_coordinate, task.destination_coordinate
+            resistance[t] = task.transport_resistance
+        if isinstance(task, TransportModule):
+            target_module[t] = module_index[id(task.target_module)]
+        if isinstance(task, Assembly):
+            if id(task.target_robot) not in robot_index:
+                raise_with_log(ValueError, f"Unknown target robot: {task.target_robot.name} in {task.name}.")
+            target_robot[t] = robot_index[id(task.target_robot)]
+        has_dependency[t] = task.has_task_dependency()
+        dependency = []
+        for dep in task.task_dependency if task.has_task_dependency() else []:
+            if id(dep) not in task_index:
+                raise_with_log(ValueError, f"Unknown dependency: {dep.name} in {task.name}.")
+            dependency.append(task_index[id(dep)])
+        dependencies.append(dependency)
+    columns["task_class"] = task_class
+    columns["task_coordinate"] = _coordinates([task.coordinate for task in tasks.values()])
+    columns["task_total_workload"] = np.array([task.total_workload for task in tasks.values()], dtype=np.float64)
+    columns["task_completed_workload"] = np.array([task.completed_workload for task in tasks.values()], dtype=np.float64)
+    columns["task_origin"], columns["task_destination"], columns["task_resistance"] = origin, destination, resistance
+    columns["task_target_module"], columns["task_target_robot"] = target_module, target_robot
+    columns["task_has_dependency"] = has_dependency
+    columns["task_dependency_offset"], columns["task_dependency"] = _csr(dependencies)
+
+    columns["station_coordinate"] = _coordinates([station.coordinate for station in stations])
+    columns["station_charging_speed"] = np.array([station.charging_speed for station in stations], dtype=np.float64)
+    columns["station_total_workload"] = np.array([station.total_workload for station in stations], dtype=np.float64)
+    columns["station_completed_workload"] = np.array([station.completed_workload for station in stations],
+                                                     dtype=np.float64)
+
+    # 能力表は列ごとに文字列の列として書き出す (列名はヘッダーに保持)
+    for column, values in (capabilities or {}).items():
+        columns[f"capability_offset:{column}"], columns[f"capability:{column}"] = _strings(values)
+
+    header: dict[str, Any] = {
+        "version": VERSION,
+        "task_classes": task_classes,
+        "module_states": [state.name for state in MODULE_STATES],
+        "robot_states": [state.name for state in ROBOT_STATES],
+        "performance_attributes": [attr.name for attr in PERFORMANCE_ATTRIBUTES],
+        "names": {
+            "module_type": [mt.name for mt in module_types],
+            "module": [module.name for module in module_objects],
+            "robot_type": [rt.name for rt in robot_types],
+            "robot": list(robots),
+            "task": list(tasks),
+            "station": list(simulation_map.charge_stations),
+        },
+        # 故障シナリオは少数のため、乱数状態を除くパラメータを JSON で保持
+        "risk_scenarios": {name: {"class": scenario.__class__.__name__,
+                                  **{key: value for key, value in vars(scenario).items()
+                                     if key != "rng" and not key.startswith("_")}}
+                           for name, scenario in (risk_scenarios or {}).items()},
+        "capabilities": list(capabilities or {}),
+        "columns": {},
+    }
+    # 列の位置はヘッダーの長さに依存するため、ヘッダーの末尾を境界まで空白で埋めてから決める
+    offset = 0
+    for name, array in columns.items():
+        array = np.ascontiguousarray(array)
+        columns[name] = array
+        header["columns"][name] = {"dtype": array.dtype.str, "shape": list(array.shape), "offset": offset}
+        offset += -(-array.nbytes // ALIGNMENT) * ALIGNMENT
+    encoded = json.dumps(header).encode()
+    data_start = -(-(_PREFIX.size + len(encoded)) // ALIGNMENT) * ALIGNMENT
+    encoded += b" " * (data_start - _PREFIX.size - len(encoded))
+
+    with open(file_path, 'wb') as f:
+        f.write(_PREFIX.pack(MAGIC, len(encoded)))
+        f.write(encoded)
+        for name, array in columns.items():
+            f.seek(data_start + header["columns"][name]["offset"])
+            f.write(array.tobytes())
+        f.truncate(data_start + offset)
+    logger.info(f"Compiled world with {len(module_objects)} modules, {len(robots)} robots and {len(tasks)} tasks: "
+                f"{file_path}.")
+
+
+class CompiledWorld:
+    """
+    compile_world で書き出したワールド
+    列はファイルをメモリマップした読み取り専用の配列として返し、エンティティは最初に参照されたときにまとめて構築する
+    構築したエンティティはファイルと独立しており、シミュレーションで変更してよい
+    """
+    def __init__(self, file_path: str):
+        try:
+            with open(file_path, 'rb') as f:
+                magic, length = _PREFIX.unpack(f.read(_PREFIX.size))
+                if magic != MAGIC:
+                    raise_with_log(ValueError, f"Not a compiled world file: {file_path}.")
+                header = json.loads(f.read(length))
+        except FileNotFoundError as e:
+            raise_with_log(FileNotFoundError, f"File not found: {e}.")
+        if header["version"] != VERSION:
+            raise_with_log(ValueError, f"Unsupported compiled world version: {header['version']}.")
+        for key, expected in (("task_classes", list(TASK_CLASSES)),
+                              ("module_states", [state.name for state in MODULE_STATES]),
+                              ("robot_states", [state.name for state in ROBOT_STATES]),
+                              ("performance_attributes", [attr.name for attr in PERFORMANCE_ATTRIBUTES])):
+            if header[key] != expected:
+                raise_with_log(ValueError, f"Compiled world has incompatible {key}: {header[key]}.")
+        self._file_path = file_path
+        self._header = header
+        self._data_start = _PREFIX.size + length
+        self._buffer: Optional[np.memmap] = None
+        self._module_types: Optional[dict[str, ModuleType]] = None
+        self._modules: Optional[dict[str, Module]] = None
+        self._robot_types: Optional[dict[str, RobotType]] = None
+        self._robots: Optional[dict[str, Robot]] = None
+        self._tasks: Optional[dict[str, BaseTask]] = None
+        self._simulation_map: Optional[SimulationMap] = None
+
+    @property
+    def names(self) -> dict[str, list[str]]:
+        """ 種類 (module_type, module, robot_type, robot, task, station) ごとの名前 """
+        return self._header["names"]
+
+    @property
+    def column_names(self) -> list[str]:
+        return list(self._header["columns"])
+
+    @property
+    def capability_names(self) -> list[str]:
+        return self._header["capabilities"]
+
+    @property
+    def capabilities(self) -> dict[str, list[str]]:
+        """ 能力表 (列名 → 値のリスト) """
+        return {column: self.capability(column) for column in self.capability_names}
+
+    def capability(self, column: str) -> list[str]:
+        """ 能力表の1列をメモリマップした文字列の列から読み出す """
+        if column not in self.capability_names:
+            raise_with_log(KeyError, f"Unknown capability column: {column}.")
+        start, data = self.column(f"capability_offset:{column}").tolist(), self.column(f"capability:{column}")
+        return [bytes(data[start[i]:start[i + 1]]).decode() for i in range(len(start) - 1)]
+
+    def column(self, name: str) -> NDArray[Any]:
+        """ 列をメモリマップした読み取り専用の配列 """
+        spec = self._header["columns"].get(name)
+        if spec is None:
+            raise_with_log(KeyError, f"Unknown column: {name}.")
+        if self._buffer is None:
+            self._buffer = np.memmap(self._file_path, dtype=np.uint8, mode='r')
+        dtype = np.dtype(spec["dtype"])
+        count = int(np.prod(spec["shape"], dtype=np.int64))
+        return np.frombuffer(self._buffer, dtype=dtype, count=count,
+                             offset=self._data_start + spec["offset"]).reshape(spec["shape"])
+
+    def _rows(self, offset: str, values: str) -> list[list[int]]:
+        """ CSR 形式の列を番号リストのリストに戻す """
+        start, items = self.column(offset).tolist(), self.column(values).tolist()
+        return [items[start[i]:start[i + 1]] for i in range(len(start) - 1)]
+
+    @property
+    def module_types(self) -> dict[str, ModuleType]:
+        if self._module_types is None:
+            self._module_types = {name: ModuleType(name, max_battery) for name, max_battery
+                                  in zip(self.names["module_type"], self.column("module_type_max_battery").tolist())}
+        return self._module_types
+
+    @property
+    def modules(self) -> dict[str, Module]:
+        if self._modules is None:
+            module_types = list(self.module_types.values())
+            self._modules = {
+                name: Module(module_types[k], name, (x, y), battery, operating_time, MODULE_STATES[state])
+                for name, k, (x, y), battery, operating_time, state in zip(
+                    self.names["module"], self.column("module_type").tolist(), self.column("module_coordinate").tolist(),
+                    self.column("module_battery").tolist(), self.column("module_operating_time").tolist(),
+                    self.column("module_state").tolist())}
+        return self._modules
+
+    @property
+    def robot_types(self) -> dict[str, RobotType]:
+        if self._robot_types is None:
+            module_types = list(self.module_types.values())
+            self._robot_types = {}
+            for name, required, performance, has_performance, power_consumption, recharge_trigger in zip(
+                    self.names["robot_type"], self.column("robot_type_required").tolist(),
+                    self.column("robot_type_performance").tolist(), self.column("robot_type_has_performance").tolist(),
+                    self.column("robot_type_power_consumption").tolist(),
+                    self.column("robot_type_recharge_trigger").tolist()):
+                self._robot_types[name] = RobotType(
+                    name=name,
+                    required_modules={module_types[k]: num for k, num in enumerate(required) if num > 0},
+                    performance={attr: value for attr, value, has in zip(PERFORMANCE_ATTRIBUTES, performance,
+                                                                         has_performance) if has},
+                    power_consumption=power_consumption,
+                    recharge_trigger=recharge_trigger,
+                )
+        return self._robot_types
+
+    @property
+    def robots(self) -> dict[str, Robot]:
+        if self._robots is None:
+            modules = list(self.modules.values())
+            robot_types = list(self.robot_types.values())
+            self._robots = {}
+            for name, k, (x, y), state, component, mounted in zip(
+                    self.names["robot"], self.column("robot_type").tolist(), self.column("robot_coordinate").tolist(),
+                    self.column("robot_state").tolist(), self._rows("robot_component_offset", "robot_component"),
+                    self._rows("robot_mounted_offset", "robot_mounted")):
+                robot = Robot(robot_types[k], name, (x, y), [modules[m] for m in component])
+                # 書き出し時の搭載状態と状態をそのまま復元 (スナップショットの復元と同じ)
+                robot.restore_state(robot.coordinate, ROBOT_STATES[state], [modules[m] for m in mounted])
+                self._robots[name] = robot
+        return self._robots
+
+    @property
+    def tasks(self) -> dict[str, BaseTask]:
+        if self._tasks is None:
+            modules = list(self.modules.values())
+            robots = list(self.robots.values())
+            task_list: list[BaseTask] = []
+            for name, c, (x, y), total, completed, origin, destination, resistance, target_module, target_robot in zip(
+                    self.names["task"], self.column("task_class").tolist(), self.column("task_coordinate").tolist(),
+                    self.column("task_total_workload").tolist(), self.column("task_completed_workload").tolist(),
+                    self.column("task_origin").tolist(), self.column("task_destination").tolist(),
+                    self.column("task_resistance").tolist(), self.column("task_target_module").tolist(),
+                    self.column("task_target_robot").tolist()):
+                task_class = TASK_CLASSES[self._header["task_classes"][c]]
+                task: BaseTask
+                if task_class is Assembly:
+                    task = Assembly(name, robots[target_robot], total)  # 総仕事量は書き出し時の不足モジュール数
+                    task.restore_state(completed, (x, y))
+                elif task_class is TransportModule:
+                    task = TransportModule(target_module=modules[target_module], origin_coordinate=origin,
+                                           destination_coordinate=destination, transport_resistance=resistance,
+                                           name=name, coordinate=(x, y), total_workload=total,
+                                           completed_workload=completed)
+                elif task_class is Transport:
+                    task = Transport(origin_coordinate=origin, destination_coordinate=destination,
+                                     transport_resistance=resistance, name=name, coordinate=(x, y),
+                                     total_workload=total, completed_workload=completed)
+                else:
+                    task = task_class(name=name, coordinate=(x, y), total_workload=total, completed_workload=completed)
+                task_list.append(task)
+            for task, has_dependency, dependency in zip(task_list, self.column("task_has_dependency").tolist(),
+                                                        self._rows("task_dependency_offset", "task_dependency")):
+                if has_dependency:
+                    task.initialize_task_dependency([task_list[t] for t in dependency])
+            self._tasks = {task.name: task for task in task_list}
+        return self._tasks
+
+    @property
+    def simulation_map(self) -> SimulationMap:
+        if self._simulation_map is None:
+            self._simulation_map = SimulationMap(charge_stations={
+                name: Charge(charging_speed=speed, name=name, coordinate=(x, y), total_workload=total,
+                             completed_workload=completed)
+                for name, (x, y), speed, total, completed in zip(
+                    self.names["station"], self.column("station_coordinate").tolist(),
+                    self.column("station_charging_speed").tolist(), self.column("station_total_workload").tolist(),
+                    self.column("station_completed_workload").tolist())})
+        return self._simulation_map
+
+    def risk_scenarios(self) -> dict[str, BaseRiskScenario]:
+        """ 故障シナリオ (呼び出すたびに未初期化の新しいインスタンスを返す) """
+        scenario_classes = {cls.__name__: cls for cls in BaseRiskScenario.__subclasses__()}
+        scenarios = {}
+        for name, params in self._header["risk_scenarios"].items():
+            params = dict(params)
+            scenario_class = scenario_classes.get(params.pop("class"))
+            if scenario_class is None:
+                raise_with_log(ValueError, f"Unknown risk scenario class in {name}.")
+            scenarios[name] = scenario_class(**params)
+        return scenarios
+
+
+def load_compiled_world(file_path: str) -> CompiledWorld:
+    """ compile_world で書き出したファイルをメモリマップして開く (エンティティは参照時に構築) """
+    return CompiledWorld(file_path)
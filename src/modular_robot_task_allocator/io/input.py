@@ -1,13 +1,14 @@
-from typing import Type, Any
-from enum import Enum
-import inspect, logging, yaml
-import networkx as nx
-from modular_robot_task_allocator.core import *
+from typing import Any
+import logging, os, yaml
+from modular_robot_task_allocator.core import (
+    Assembly, BaseRiskScenario, BaseTask, Charge, Module, ModuleState, ModuleType, PerformanceAttributes, Robot, RobotType,
+    SimulationMap)
 from modular_robot_task_allocator.utils import raise_with_log
 from modular_robot_task_allocator.io.class_utils import find_subclasses_by_name, get_class_init_args, enum_constructor
 
 logger = logging.getLogger(__name__)
 
+LOAD = 'load'
 CLASS = 'class'
 NAME = 'name'
 MODULE_TYPE = 'module_type'
@@ -19,7 +20,18 @@ enum_classes = {
     'PerformanceAttributes': PerformanceAttributes,
     'ModuleState': ModuleState,
 }
-yaml.add_multi_constructor("!", lambda loader, suffix, node: enum_constructor(loader, suffix, node))  # PyYAMLにカスタムタグを登録
+yaml.add_multi_constructor("!", lambda loader, suffix, node: enum_constructor(loader, suffix, node, enum_classes))  # PyYAMLにカスタムタグを登録
+
+def load_property(file_path: str) -> dict[str, Any]:
+    """ 設定ファイルを読み込む (load の相対パスは設定ファイルのディレクトリを基準にする) """
+    try:
+        with open(file_path, 'r') as f:
+            prop = yaml.safe_load(f)
+    except FileNotFoundError as e:
+        raise_with_log(FileNotFoundError, f"File not found: {e}.")
+    directory = os.path.dirname(os.path.abspath(file_path))
+    prop[LOAD] = {key: os.path.join(directory, path) for key, path in prop.get(LOAD, {}).items()}
+    return prop
 
 def load_tasks(file_path: str) -> dict[str, BaseTask]:
     """ タスクを読み込む """
@@ -41,174 +53,200 @@ def load_tasks(file_path: str) -> dict[str, BaseTask]:
     
     return tasks
 
-# def load_task_dependency(file_path: str, tasks: dict[str, BaseTask]) -> dict[str, BaseTask]:
-#     """ タスク依存関係を読み込む """
-#     try:
-#         with open(file_path, 'r') as f:
-#             dependencies = yaml.load(f, Loader=yaml.FullLoader)
-#     except FileNotFoundError as e:
-#         raise_with_log(FileNotFoundError, f"File not found: {e}.")
-
-#     def build_graph(graph: nx.DiGraph, name: str, content: Any) -> None:
-#         """ 有向グラフ作成 """
-#         if not graph.has_node(name):
-#             graph.add_node(name)
-#         if isinstance(content, list):
-#             for item in content:
-#                 if isinstance(item, dict):
-#                     for child_name, child_content in item.items():
-#                         graph.add_edge(name, child_name)
-#                         build_graph(graph, child_name, child_content)
-#                 else:
-#                     graph.add_edge(name, item)
-#         elif isinstance(content, dict):
-#             for child_name, child_content in content.items():
-#                 graph.add_edge(name, child_name)
-#                 build_graph(graph, child_name, child_content)
+def load_task_dependency(file_path: str, tasks: dict[str, BaseTask]) -> dict[str, BaseTask]:
+    """ タスク依存関係を読み込む """
+    import networkx as nx  # 依存関係の検査時のみ読み込む
+    try:
+        with open(file_path, 'r') as f:
+            dependencies = yaml.load(f, Loader=yaml.FullLoader)
+    except FileNotFoundError as e:
+        raise_with_log(FileNotFoundError, f"File not found: {e}.")
+
+    def build_graph(graph: nx.DiGraph, name: str, content: Any) -> None:
+        """ 有向グラフ作成 """
+        if not graph.has_node(name):
+            graph.add_node(name)
+        if isinstance(content, list):
+            for item in content:
+                if isinstance(item, dict):
+                    for child_name, child_content in item.items():
+                        graph.add_edge(name, child_name)
+                        build_graph(graph, child_name, child_content)
+                else:
+                    graph.add_edge(name, item)
+        elif isinstance(content, dict):
+            for child_name, child_content in content.items():
+                graph.add_edge(name, child_name)
+                build_graph(graph, child_name, child_content)
     
-#     task_dependency_g = nx.DiGraph()
-#     for node_name, content in dependencies.items():
-#         if node_name not in tasks:
-#             raise_with_log(ValueError, f"Unknown task name: '{node_name}'")
-#         build_graph(task_dependency_g, node_name, content)
-#     if not nx.is_directed_acyclic_graph(task_dependency_g):  # 非巡回
-#         raise_with_log(RuntimeError, f"Cyclic task dependency detected.")
+    task_dependency_g = nx.DiGraph()
+    task_dependency_g.add_nodes_from(tasks)  # 依存関係のないタスクも節点にする
+    for node_name, content in dependencies.items():
+        if node_name not in tasks:
+            raise_with_log(ValueError, f"Unknown task name: '{node_name}'")
+        build_graph(task_dependency_g, node_name, content)
+    if not nx.is_directed_acyclic_graph(task_dependency_g):  # 非巡回
+        raise_with_log(RuntimeError, f"Cyclic task dependency detected.")
+    unknown = set(task_dependency_g.nodes) - set(tasks)
+    if unknown:
+        raise_with_log(ValueError, f"Unknown task names: {sorted(unknown)}")
     
-#     for name, task in tasks.items():
-#         ancestors = nx.ancestors(task_dependency_g, name)
-#         task_dependency = []
-#         for ancestor in ancestors:
-#             task_dependency.append(tasks[ancestor])
-#         task.initialize_task_dependency(task_dependency=task_dependency)
-#     return tasks
+    for name, task in tasks.items():
+        ancestors = nx.ancestors(task_dependency_g, name)
+        task_dependency = []
+        for ancestor in sorted(ancestors):  # 実行ごとに同じ順序にする
+            task_dependency.append(tasks[ancestor])
+        task.initialize_task_dependency(task_dependency=task_dependency)
+    return tasks
     
-# def load_module_types(file_path: str) -> dict[str, ModuleType]:
-#     """ モジュールタイプを読み込む """
-#     try:
-#         with open(file_path, 'r') as f:
-#             module_type_config = yaml.load(f, Loader=yaml.FullLoader)
-#     except FileNotFoundError as e:
-#         raise_with_log(FileNotFoundError, f"File not found: {e}.")
-
-#     module_types = {}
-#     for type_name, type_data in module_type_config.items():
-#         filtered_args = _get_class_init_args(cls=ModuleType, input_data=type_data, name=type_name)
-#         module_types[type_name] = ModuleType(**filtered_args)
-#     return module_types
-
-# def load_modules(file_path: str, module_types: dict[str, ModuleType]) -> dict[str, Module]:
-#     """ モジュールを読み込む """
-#     try:
-#         with open(file_path, 'r') as f:
-#             module_config = yaml.load(f, Loader=yaml.FullLoader)
-#     except FileNotFoundError as e:
-#         raise_with_log(FileNotFoundError, f"File not found: {e}.")
-
-#     modules = {}
-#     for module_name, module_data in module_config.items():
-#         filtered_args = _get_class_init_args(cls=Module, input_data=module_data, name=module_name)
+def load_module_types(file_path: str) -> dict[str, ModuleType]:
+    """ モジュールタイプを読み込む """
+    try:
+        with open(file_path, 'r') as f:
+            module_type_config = yaml.load(f, Loader=yaml.FullLoader)
+    except FileNotFoundError as e:
+        raise_with_log(FileNotFoundError, f"File not found: {e}.")
+
+    module_types = {}
+    for type_name, type_data in module_type_config.items():
+        filtered_args = get_class_init_args(cls=ModuleType, input_data=type_data, name=type_name)
+        module_types[type_name] = ModuleType(**filtered_args)
+    return module_types
+
+def load_modules(file_path: str, module_types: dict[str, ModuleType]) -> dict[str, Module]:
+    """ モジュールを読み込む """
+    try:
+        with open(file_path, 'r') as f:
+            module_config = yaml.load(f, Loader=yaml.FullLoader)
+    except FileNotFoundError as e:
+        raise_with_log(FileNotFoundError, f"File not found: {e}.")
+
+    modules = {}
+    for module_name, module_data in module_config.items():
+        filtered_args = get_class_init_args(cls=Module, input_data=module_data, name=module_name)
                 
-#         module_type = module_types.get(module_data[MODULE_TYPE])
-#         if module_type is None:
-#             raise_with_log(ValueError, f"Unknown module type: {module_data[MODULE_TYPE]}.")
-#         filtered_args.update({MODULE_TYPE: module_type})
-#         modules[module_name] = Module(**filtered_args)
-#     return modules
-
-# def load_robot_types(file_path: str, module_types: dict[str, ModuleType]) -> dict[str, RobotType]:
-#     """ ロボットタイプを読み込む """
-#     try:
-#         with open(file_path, 'r') as f:
-#             robot_type_config = yaml.load(f, Loader=yaml.FullLoader)
-#     except FileNotFoundError as e:
-#         raise_with_log(FileNotFoundError, f"File not found: {e}.")
+        module_type = module_types.get(module_data[MODULE_TYPE])
+        if module_type is None:
+            raise_with_log(ValueError, f"Unknown module type: {module_data[MODULE_TYPE]}.")
+        filtered_args.update({MODULE_TYPE: module_type})
+        modules[module_name] = Module(**filtered_args)
+    return modules
+
+def load_robot_types(file_path: str, module_types: dict[str, ModuleType]) -> dict[str, RobotType]:
+    """ ロボットタイプを読み込む """
+    try:
+        with open(file_path, 'r') as f:
+            robot_type_config = yaml.load(f, Loader=yaml.FullLoader)
+    except FileNotFoundError as e:
+        raise_with_log(FileNotFoundError, f"File not found: {e}.")
     
-#     robot_types = {}
-#     for type_name, type_data in robot_type_config.items():
-#         filtered_args = _get_class_init_args(cls=RobotType, input_data=type_data, name=type_name)
+    robot_types = {}
+    for type_name, type_data in robot_type_config.items():
+        filtered_args = get_class_init_args(cls=RobotType, input_data=type_data, name=type_name)
         
-#         required_modules = {}
-#         for name, value in type_data[REQUIRED_MODULES].items():
-#             if name in module_types:
-#                 required_modules[module_types[name]] = value
-#             else:
-#                 raise_with_log(ValueError, f"Invalid module-type name: '{name}' in {type_name}.")
-#         filtered_args.update({REQUIRED_MODULES: required_modules})
-
-#         robot_types[type_name] = RobotType(**filtered_args)
-#     return robot_types
-
-# def load_robots(file_path: str, robot_types: dict[str, RobotType], modules: dict[str, Module]) -> dict[str, Robot]:
-#     """ ロボットを読み込む """
-#     try:
-#         with open(file_path, 'r') as f:
-#             robot_config = yaml.load(f, Loader=yaml.FullLoader)
-#     except FileNotFoundError as e:
-#         raise_with_log(FileNotFoundError, f"File not found: {e}.")
-#     robots = {}
-#     for robot_name, robot_data in robot_config.items():
-#         filtered_args = _get_class_init_args(cls=Robot, input_data=robot_data, name=robot_name)
+        required_modules = {}
+        for name, value in type_data[REQUIRED_MODULES].items():
+            if name in module_types:
+                required_modules[module_types[name]] = value
+            else:
+                raise_with_log(ValueError, f"Invalid module-type name: '{name}' in {type_name}.")
+        filtered_args.update({REQUIRED_MODULES: required_modules})
+
+        robot_types[type_name] = RobotType(**filtered_args)
+    return robot_types
+
+def load_robots(file_path: str, robot_types: dict[str, RobotType], modules: dict[str, Module]) -> dict[str, Robot]:
+    """ ロボットを読み込む """
+    try:
+        with open(file_path, 'r') as f:
+            robot_config = yaml.load(f, Loader=yaml.FullLoader)
+    except FileNotFoundError as e:
+        raise_with_log(FileNotFoundError, f"File not found: {e}.")
+    robots = {}
+    for robot_name, robot_data in robot_config.items():
+        filtered_args = get_class_init_args(cls=Robot, input_data=robot_data, name=robot_name)
         
-#         robot_type = robot_types.get(robot_data[ROBOT_TYPE])
-#         if robot_type is None:
-#             raise_with_log(ValueError, f"Unknown robot type: {robot_data[ROBOT_TYPE]}.")
-#         component = []
-#         for module_name in robot_data[COMPONENT]:
-#             if module_name not in modules:  # 存在しないモジュールはエラーを発生させる
-#                 raise_with_log(ValueError, f"Unknown module: {module_name}.")
-#             component.append(modules[module_name])
-#         filtered_args.update({
-#             ROBOT_TYPE: robot_type,
-#             COMPONENT: component
-#             })
-#         robots[robot_name] = Robot(**filtered_args)
-#     return robots
-
-# def load_simulation_map(file_path: str) -> SimulationMap:
-#     """ ロボットを読み込む """
-#     try:
-#         with open(file_path, 'r') as f:
-#             map_config = yaml.load(f, Loader=yaml.FullLoader)
-#     except FileNotFoundError as e:
-#         raise_with_log(FileNotFoundError, f"File not found: {e}.")
+        robot_type = robot_types.get(robot_data[ROBOT_TYPE])
+        if robot_type is None:
+            raise_with_log(ValueError, f"Unknown robot type: {robot_data[ROBOT_TYPE]}.")
+        component = []
+        for module_name in robot_data[COMPONENT]:
+            if module_name not in modules:  # 存在しないモジュールはエラーを発生させる
+                raise_with_log(ValueError, f"Unknown module: {module_name}.")
+            component.append(modules[module_name])
+        filtered_args.update({
+            ROBOT_TYPE: robot_type,
+            COMPONENT: component
+            })
+        robots[robot_name] = Robot(**filtered_args)
+    return robots
+
+def load_simulation_map(file_path: str) -> SimulationMap:
+    """ 充電ステーションを読み込む """
+    try:
+        with open(file_path, 'r') as f:
+            map_config = yaml.load(f, Loader=yaml.FullLoader)
+    except FileNotFoundError as e:
+        raise_with_log(FileNotFoundError, f"File not found: {e}.")
     
-#     charge_stations = {}
-#     for location_name, location_data in map_config.items():
-#         filtered_args = _get_class_init_args(cls=Charge, input_data=location_data, name=location_name)
-#         charge_stations[location_name] = Charge(**filtered_args)
-#     return SimulationMap(charge_stations=charge_stations)
-
-# def load_risk_scenarios(file_path: str) -> dict[str, BaseRiskScenario]:
-#     """ 故障シナリオを読み込む """
-#     try:
-#         with open(file_path, 'r') as f:
-#             scenario_config = yaml.load(f, Loader=yaml.FullLoader)
-#     except FileNotFoundError as e:
-#         raise_with_log(FileNotFoundError, f"File not found: {e}.")
+    charge_stations = {}
+    for location_name, location_data in map_config.items():
+        filtered_args = get_class_init_args(cls=Charge, input_data=location_data, name=location_name)
+        charge_stations[location_name] = Charge(**filtered_args)
+    return SimulationMap(charge_stations=charge_stations)
+
+def load_risk_scenarios(file_path: str) -> dict[str, BaseRiskScenario]:
+    """ 故障シナリオを読み込む """
+    try:
+        with open(file_path, 'r') as f:
+            scenario_config = yaml.load(f, Loader=yaml.FullLoader)
+    except FileNotFoundError as e:
+        raise_with_log(FileNotFoundError, f"File not found: {e}.")
     
-#     scenario_classes = _find_subclasses_by_name(BaseRiskScenario)
-#     scenarios = {}
-#     for scenario_name, scenario_data in scenario_config.items():
-#         scenario_class = scenario_classes.get(scenario_data["class"])
-#         if scenario_class is None:
-#             raise_with_log(ValueError, f"Unknown task class: {scenario_data['class']}.")
-
-#         filtered_args = _get_class_init_args(cls=scenario_class, input_data=scenario_data, name=scenario_name)
-#         scenarios[scenario_name] = scenario_class(**filtered_args)
-
-#     return scenarios
-
-# def load_task_priorities(file_path: str, robots: dict[str, Robot], tasks: dict[str, BaseTask]) -> dict[str, list[str]]:
-#     """ 各ロボットのタスク優先順位を読み込む """
-#     try:
-#         with open(file_path, 'r') as f:
-#             priority_config = yaml.load(f, Loader=yaml.FullLoader)
-#     except FileNotFoundError as e:
-#         raise_with_log(FileNotFoundError, f"File not found: {e}.")
-
-#     task_priorities = {}
-#     for k, v in priority_config.items():
-#         if not isinstance(v, list):
-#             raise_with_log(ValueError, "Task_priority only accepts list of task_name.")
-#         task_priorities[robots[k].name] = [task_name for task_name in v]
-#     return task_priorities
\ No newline at end of file
+    scenario_classes = find_subclasses_by_name(BaseRiskScenario)
+    scenarios = {}
+    for scenario_name, scenario_data in scenario_config.items():
+        scenario_class = scenario_classes.get(scenario_data["class"])
+        if scenario_class is None:
+            raise_with_log(ValueError, f"Unknown task class: {scenario_data['class']}.")
+
+        filtered_args = get_class_init_args(cls=scenario_class, input_data=scenario_data, name=scenario_name)
+        scenarios[scenario_name] = scenario_class(**filtered_args)
+
+    return scenarios
+
+def load_task_priorities(file_path: str, robots: dict[str, Robot], tasks: dict[str, BaseTask]) -> dict[str, list[str]]:
+    """ 各ロボットのタスク優先順位を読み込む """
+    try:
+        with open(file_path, 'r') as f:
+            priority_config = yaml.load(f, Loader=yaml.FullLoader)
+    except FileNotFoundError as e:
+        raise_with_log(FileNotFoundError, f"File not found: {e}.")
+
+    task_priorities = {}
+    for k, v in priority_config.items():
+        if not isinstance(v, list):
+            raise_with_log(ValueError, "Task_priority only accepts list of task_name.")
+        task_priorities[robots[k].name] = [task_name for task_name in v]
+    return task_priorities
+
+def add_assembly_task(tasks: dict[str, BaseTask], robots: dict[str, Robot]) -> dict[str, BaseTask]:
+    """ 離れた位置のモジュールがあるロボットごとに組み立てタスクを追加したタスクの辞書を返す """
+    combined_tasks = dict(tasks)
+    for robot in robots.values():
+        if robot.missing_components():
+            assembly = Assembly(f"A_{robot.name}", robot)
+            if assembly.name in combined_tasks:
+                raise_with_log(ValueError, f"Duplicate task name: {assembly.name}.")
+            combined_tasks[assembly.name] = assembly
+    return combined_tasks
+
+def permutation_of_tasks(task_priorities: dict[str, list[str]], tasks: dict[str, BaseTask],
+                         robots: dict[str, Robot]) -> None:
+    """ 各ロボットの優先順位が全タスクの並べ替えになっているかを確認 """
+    task_names = sorted(tasks)
+    for robot_name in robots:
+        if robot_name not in task_priorities:
+            raise_with_log(ValueError, f"Task_priority is not given for {robot_name}.")
+        if sorted(task_priorities[robot_name]) != task_names:
+            raise_with_log(ValueError, f"Task_priority of {robot_name} is not a permutation of the tasks.")
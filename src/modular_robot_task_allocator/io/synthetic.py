@@ -0,0 +1,162 @@
+from dataclasses import dataclass
+import logging, math
+import numpy as np
+from modular_robot_task_allocator.core import (
+    Assembly, BaseRiskScenario, BaseTask, Charge, ExponentialFailure, Manufacture, Module, ModuleState, ModuleType,
+    PerformanceAttributes, Robot, RobotType, SimulationMap, Transport, TransportModule, check_fleet)
+from modular_robot_task_allocator.core.coodinate_utils import distance
+from modular_robot_task_allocator.utils import raise_with_log
+
+logger = logging.getLogger(__name__)
+
+CLUSTER_RADIUS = 5.0  # 充電ステーションからロボット・タスクまでの最大距離 (各軸)
+CLUSTER_SPACING = 40.0  # 充電ステーション1つあたりの区画の一辺
+
+
+@dataclass
+class SyntheticWorld:
+    """ generate_world で生成したワールド """
+    tasks: dict[str, BaseTask]  # モジュール運搬・組み立てタスクを含む
+    robots: dict[str, Robot]
+    modules: dict[str, Module]
+    simulation_map: SimulationMap
+    risk_scenarios: dict[str, BaseRiskScenario]
+    task_priorities: dict[str, list[str]]
+
+
+def generate_world(num_robots: int, modules_per_type: int, num_tasks: int, num_stations: int, num_scenarios: int,
+                   max_dependencies: int = 3, missing_fraction: float = 0.1, failure_rate: float = 1e-6,
+                   num_priority_patterns: int = 4, seed: int = 0) -> SyntheticWorld:
+    """
+    ベンチマーク用の合成ワールドを生成
+    モジュールの種類は3つで、各ロボットは種類ごとに modules_per_type 個のモジュールから構成される
+    充電ステーションごとに区画を作り、ロボットとタスクは番号順に区画へ割り当ててステーションの近くに置く
+    (ロボットのバッテリーで区画内のタスクと充電ステーションの間を往復できる)
+    タスクは加工と運搬を交互に並べ、各タスクは同じ区画の直前の 4 × max_dependencies 個のタスクから最大 max_dependencies 個に依存する (DAG)
+    missing_fraction の割合のロボットは1つのモジュールが離れた位置にあり、モジュール運搬タスクと組み立てタスクが追加される
+    優先順位は区画のモジュール運搬・組み立て・タスクの順に並べ、残りのタスクを続ける
+    区画内のタスクの開始位置を num_priority_patterns 通りにずらした並びをロボット間で共有する (大規模時のメモリを抑えるため)
+    故障率 failure_rate × (シナリオ番号 + 1) は累積稼働時間に対する値のため、小さな値でも稼働時間とともに故障が増える
+    """
+    if num_robots <= 0 or modules_per_type <= 0 or num_stations <= 0:
+        raise_with_log(ValueError, f"Num_robots, modules_per_type and num_stations must be positive: "
+                                   f"{num_robots}, {modules_per_type}, {num_stations}.")
+    if num_tasks < 0 or num_scenarios < 0:
+        raise_with_log(ValueError, f"Counts must be non-negative: {num_tasks}, {num_scenarios}.")
+    if not 0.0 <= missing_fraction <= 1.0:
+        raise_with_log(ValueError, f"Missing_fraction must be in [0, 1]: {missing_fraction}.")
+    rng = np.random.default_rng(seed)
+    extent = CLUSTER_SPACING * math.sqrt(num_stations) / 2.0  # ステーションの密度が規模によらず一定になる広さ
+
+    module_types = [ModuleType("Body", 10.0), ModuleType("Limb", 6.0), ModuleType("Battery", 20.0)]
+    performance = PerformanceAttributes
+    robot_types = [
+        RobotType("Carrier", {module_type: modules_per_type for module_type in module_types},
+                  {performance.TRANSPORT: 1, performance.MANUFACTURE: 0, performance.MOBILITY: 1.5},
+                  1.0, 10.0),
+        RobotType("Maker", {module_type: modules_per_type for module_type in module_types},
+                  {performance.TRANSPORT: 0, performance.MANUFACTURE: 1, performance.MOBILITY: 1.0},
+                  1.5, 20.0),
+    ]
+
+    station_coordinates = rng.uniform(-extent, extent, size=(num_stations, 2)).tolist()
+    charge_stations = {f"c{s:05}": Charge(charging_speed=5.0, name=f"c{s:05}", coordinate=tuple(station_coordinates[s]),
+                                          total_workload=0.0, completed_workload=0.0) for s in range(num_stations)}
+
+    def near(cluster: int, offsets: list[float]) -> tuple[float, float]:
+        center = station_coordinates[cluster]
+        return (center[0] + offsets[0], center[1] + offsets[1])
+
+    robot_offsets = rng.uniform(-CLUSTER_RADIUS, CLUSTER_RADIUS, size=(num_robots, 2)).tolist()
+    missing = rng.random(num_robots) < missing_fraction
+    modules: dict[str, Module] = {}
+    robots: dict[str, Robot] = {}
+    robot_cluster: dict[str, int] = {}
+    displaced: list[tuple[Robot, Module]] = []
+    for r in range(num_robots):
+        cluster = r * num_stations // num_robots
+        coordinate = near(cluster, robot_offsets[r])
+        batteries = rng.uniform(0.5, 1.0, size=len(module_types) * modules_per_type).tolist()
+        component = []
+        away: list[Module] = []
+        for k, module_type in enumerate(module_types):
+            for j in range(modules_per_type):
+                is_away = bool(missing[r]) and k == 1 and j == 0  # 脚モジュールを1つ離れた位置に置く
+                module_coordinate = (coordinate[0] + 2.0, coordinate[1]) if is_away else coordinate
+                name = f"m{r:06}_{module_type.name}_{j}"
+                module = Module(module_type, name, module_coordinate,
+                                batteries[k * modules_per_type + j] * module_type.max_battery, 0.0, ModuleState.ACTIVE)
+                modules[name] = module
+                component.append(module)
+                if is_away:
+                    away.append(module)
+        robot = Robot(robot_types[r % len(robot_types)], f"r{r:06}", coordinate, component)
+        robots[robot.name] = robot
+        robot_cluster[robot.name] = cluster
+        displaced.extend((robot, module) for module in away)
+
+    tasks: dict[str, BaseTask] = {}
+    task_cluster: dict[str, int] = {}
+    task_offsets = rng.uniform(-CLUSTER_RADIUS, CLUSTER_RADIUS, size=(num_tasks, 2)).tolist()
+    workloads = rng.integers(3, 10, size=num_tasks).tolist()
+    destinations = rng.uniform(-3.0, 3.0, size=(num_tasks, 2)).tolist()
+    for t in range(num_tasks):
+        name = f"t{t:06}"
+        cluster = t * num_stations // max(num_tasks, 1)
+        coordinate = near(cluster, task_offsets[t])
+        if t % 2 == 0:
+            task: BaseTask = Manufacture(name=name, coordinate=coordinate, total_workload=float(workloads[t]),
+                                         completed_workload=0.0)
+        else:
+            destination = (coordinate[0] + destinations[t][0], coordinate[1] + destinations[t][1])
+            task = Transport(origin_coordinate=coordinate, destination_coordinate=destination, transport_resistance=1.0,
+                             name=name, coordinate=coordinate, total_workload=1.0 * distance(destination, coordinate),
+                             completed_workload=0.0)
+        tasks[name] = task
+        task_cluster[name] = cluster
+    task_list = list(tasks.values())
+    window = 4 * max_dependencies
+    first = 0  # 区画の先頭のタスク番号
+    for t, task in enumerate(task_list):
+        if task_cluster[task.name] != task_cluster[task_list[first].name]:
+            first = t
+        candidates = range(max(first, t - window), t)
+        count = min(len(candidates), int(rng.integers(0, max_dependencies + 1)))
+        chosen = sorted(rng.choice(len(candidates), size=count, replace=False).tolist()) if count > 0 else []
+        task.initialize_task_dependency([task_list[candidates[i]] for i in chosen])
+
+    # 離れたモジュールをロボットへ運んでから組み立てる
+    setup: dict[int, list[str]] = {cluster: [] for cluster in range(num_stations)}
+    for robot, module in displaced:
+        transport = TransportModule(target_module=module, origin_coordinate=module.coordinate,
+                                    destination_coordinate=robot.coordinate, transport_resistance=1.0,
+                                    name=f"M_{module.name}", coordinate=module.coordinate,
+                                    total_workload=1.0 * distance(robot.coordinate, module.coordinate),
+                                    completed_workload=0.0)
+        tasks[transport.name] = transport
+        setup[robot_cluster[robot.name]].append(transport.name)
+    for robot in robots.values():
+        if robot.missing_components():
+            assembly = Assembly(f"A_{robot.name}", robot)
+            tasks[assembly.name] = assembly
+            setup[robot_cluster[robot.name]].append(assembly.name)
+    risk_scenarios: dict[str, BaseRiskScenario] = {
+        f"s{k:03}": ExponentialFailure(f"s{k:03}", failure_rate * (k + 1), seed * 1000 + k) for k in range(num_scenarios)}
+
+    # 区画ごとに開始位置をずらした優先順位 (依存先は同じ区画の前のタスクのため、どの並びでも先頭側から順に進む)
+    cluster_tasks: dict[int, list[str]] = {cluster: [] for cluster in range(num_stations)}
+    for name, cluster in task_cluster.items():
+        cluster_tasks[cluster].append(name)
+    num_patterns = max(1, num_priority_patterns)
+    patterns: dict[tuple[int, int], list[str]] = {}
+    for cluster, local in cluster_tasks.items():
+        own = set(local) | set(setup[cluster])
+        rest = [name for name in tasks if name not in own]
+        for g in range(num_patterns):
+            start = g * len(local) // num_patterns
+            patterns[cluster, g] = setup[cluster] + local[start:] + local[:start] + rest
+    check_fleet(robots, modules.values(), tasks)
+    task_priorities = {name: patterns[robot_cluster[name], (r // len(robot_types)) % num_patterns]
+                       for r, name in enumerate(robots)}
+    return SyntheticWorld(tasks=tasks, robots=robots, modules=modules, simulation_map=SimulationMap(charge_stations),
+                          risk_scenarios=risk_scenarios, task_priorities=task_priorities)
@@ -0,0 +1,23 @@
+import importlib
+from typing import Any
+
+# 公開名 → 定義しているサブモジュール (pymoo・sklearn は参照されたときに読み込む)
+_EXPORTS = {
+    "TaskAllocationProblem": ".problem",
+    "SurrogateScreener": ".surrogate",
+    "ScreenedProblem": ".surrogate",
+    "ResimulateFront": ".surrogate",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str) -> Any:
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
+
+def __dir__() -> list[str]:
+    return sorted(list(globals()) + __all__)
@@ -0,0 +1,140 @@
+from typing import Any, Optional
+import logging, pickle
+import numpy as np
+from numpy.typing import NDArray
+from pymoo.core.problem import Problem
+from modular_robot_task_allocator.core import *
+from modular_robot_task_allocator.simulator.batch import BatchSimulator
+from modular_robot_task_allocator.simulator.fitness_cache import FitnessCache
+from modular_robot_task_allocator.simulator.parallel import aggregate_objectives, evaluate_population
+from modular_robot_task_allocator.simulator.snapshot import SimulationSnapshot
+from modular_robot_task_allocator.utils import raise_with_log
+
+logger = logging.getLogger(__name__)
+
+MODES = ("batch", "pool")  # batch: 個体群×シナリオを1つの配列エンジンで一括評価, pool: プロセスプールで並列評価
+
+
+class TaskAllocationProblem(Problem):
+    """
+    タスク割り当て (ロボットごとのタスク優先順位) の多目的最適化問題
+    決定変数はロボットごとにタスク数個の実数キーを並べたもので、キーの昇順をそのロボットの優先順位とする
+    目的関数は全シナリオリストで平均した (残り仕事量の合計, 残り仕事量の分散, 稼働時間の分散) で、すべて最小化
+    """
+    def __init__(self, tasks: dict[str, BaseTask], robots: dict[str, Robot], risk_scenarios: dict[str, BaseRiskScenario],
+                 scenario_lists: list[list[str]], simulation_map: SimulationMap, max_step: int, mode: str = "batch",
+                 max_workers: Optional[int] = 1, event_driven: bool = False,
+                 cache: Optional[FitnessCache] = None, **kwargs: Any):
+        if mode not in MODES:
+            raise_with_log(ValueError, f"Unknown mode: {mode}. Expected one of {MODES}.")
+        if len(scenario_lists) == 0:
+            raise_with_log(ValueError, "At least one scenario list is required.")
+        for scenario_names in scenario_lists:
+            for scenario_name in scenario_names:
+                if scenario_name not in risk_scenarios:
+                    raise_with_log(ValueError, f"Unknown risk scenario: {scenario_name}.")
+        self._task_names = list(tasks)
+        self._robot_names = list(robots)
+        self._scenario_lists = [list(scenario_names) for scenario_names in scenario_lists]
+        self._max_step = max_step
+        self._mode = mode
+        self._max_workers = max_workers
+        self._event_driven = event_driven
+        self._cache = cache
+        self._tasks, self._robots = tasks, robots
+        self._risk_scenarios, self._simulation_map = risk_scenarios, simulation_map
+        # 一括評価用のワールドは元のオブジェクトを変更しないように複製から作る
+        self._world = pickle.dumps((tasks, robots, simulation_map, risk_scenarios), protocol=pickle.HIGHEST_PROTOCOL)
+        self._batch_state: Optional[tuple[BatchSimulator, SimulationSnapshot]] = None  # 直前に使ったバッチのみ保持
+        super().__init__(n_var=len(self._robot_names) * len(self._task_names), n_obj=3, xl=0.0, xu=1.0, **kwargs)
+
+    @property
+    def task_names(self) -> list[str]:
+        return list(self._task_names)
+
+    @property
+    def robot_names(self) -> list[str]:
+        return list(self._robot_names)
+
+    def decode(self, x: NDArray[np.float64]) -> dict[str, list[str]]:
+        """ 決定変数をタスク優先順位に変換 (キーが同じならタスクの並び順を優先) """
+        keys = np.asarray(x, dtype=np.float64).reshape(len(self._robot_names), len(self._task_names))
+        order = np.argsort(keys, axis=1, kind='stable')
+        return {name: [self._task_names[t] for t in order[r]] for r, name in enumerate(self._robot_names)}
+
+    def encode(self, task_priorities: dict[str, list[str]]) -> NDArray[np.float64]:
+        """ タスク優先順位を決定変数に変換 (初期個体の作成用) """
+        T = len(self._task_names)
+        x = np.empty((len(self._robot_names), T), dtype=np.float64)
+        for r, name in enumerate(self._robot_names):
+            task_priority = task_priorities[name]
+            if sorted(task_priority) != sorted(self._task_names):
+                raise_with_log(ValueError, f"Task_priority must be a permutation of all tasks: {name}.")
+            for rank, task_name in enumerate(task_priority):
+                x[r, self._task_names.index(task_name)] = (rank + 0.5) / T
+        return x.reshape(-1)
+
+    def _evaluate(self, X: NDArray[np.float64], out: dict[str, Any], *args: Any, **kwargs: Any) -> None:
+        population = [self.decode(x) for x in X]
+        F = np.empty((len(population), 3), dtype=np.float64)
+        pending = []
+        for i, task_priorities in enumerate(population):
+            objectives = None if self._cache is None else self._cache.get(task_priorities)
+            if objectives is None:
+                pending.append(i)
+            else:
+                F[i] = objectives
+        if pending:
+            candidates = [population[i] for i in pending]
+            if self._mode == "batch":
+                results, consumed = self._evaluate_batch(candidates)
+            else:
+                results = evaluate_population(
+                    tasks=self._tasks, robots=self._robots, population=candidates,
+                    risk_scenarios=self._risk_scenarios, scenario_lists=self._scenario_lists,
+                    simulation_map=self._simulation_map, max_step=self._max_step, max_workers=self._max_workers,
+                    backend="array" if self._event_driven else "object", event_driven=self._event_driven)
+                consumed = [None] * len(candidates)
+            for i, task_priorities, objectives, lengths in zip(pending, candidates, results, consumed):
+                F[i] = objectives
+                if self._cache is not None:
+                    self._cache.put(task_priorities, objectives, lengths)
+            if self._cache is not None:
+                self._cache.commit()  # 世代ごとにまとめてディスクへ確定
+        out["F"] = F
+
+    def _evaluate_batch(self, candidates: list[dict[str, list[str]]]
+                        ) -> tuple[list[tuple[float, float, float]], list[dict[str, int]]]:
+        """ 個体×シナリオリストのワールドを1つのバッチで同時に進める """
+        S = len(self._scenario_lists)
+        simulator, initial_state = self._batch(len(candidates) * S)
+        simulator.restore(initial_state)
+        simulator.set_world_task_priorities([task_priorities for task_priorities in candidates for _ in range(S)])
+        simulator.run(self._max_step, event_driven=self._event_driven)
+        objectives = np.stack([simulator.total_remaining_workload(),
+                               simulator.variance_remaining_workload(),
+                               simulator.variance_operating_time()], axis=1)
+        world_consumed = simulator.world_consumed_priorities().reshape(len(candidates), S, -1).max(axis=1)
+        results = [aggregate_objectives([tuple(map(float, row)) for row in objectives[i * S:(i + 1) * S]])
+                   for i in range(len(candidates))]
+        consumed = [{name: int(length) for name, length in zip(self._robot_names, lengths)} for lengths in world_consumed]
+        return results, consumed
+
+    def _batch(self, num_worlds: int) -> tuple[BatchSimulator, SimulationSnapshot]:
+        """
+        バッチを作成して初期状態を保存し、ワールド数が同じ間は使い回す
+        ワールド数 (キャッシュに無い個体数×シナリオリスト数) が変わったら作り直し、保持するバッチは常に1つ
+        """
+        if self._batch_state is None or self._batch_state[0].num_worlds != num_worlds:
+            self._batch_state = None  # 作り直す前に古いバッチを解放
+            tasks, robots, simulation_map, risk_scenarios = pickle.loads(self._world)
+            simulator = BatchSimulator(
+                tasks=tasks,
+                robots=robots,
+                task_priorities={name: list(tasks) for name in robots},
+                scenario_sets=[[risk_scenarios[scenario_name] for scenario_name in self._scenario_lists[w % len(self._scenario_lists)]]
+                               for w in range(num_worlds)],
+                simulation_map=simulation_map,
+                )
+            self._batch_state = (simulator, simulator.snapshot())
+        return self._batch_state
@@ -0,0 +1,192 @@
+from typing import Any, Optional
+import logging
+import numpy as np
+from numpy.typing import NDArray
+from pymoo.core.callback import Callback
+from pymoo.core.population import Population
+from pymoo.core.problem import Problem
+from pymoo.util.nds.non_dominated_sorting import NonDominatedSorting
+from pymoo.util.optimum import filter_optimum
+from modular_robot_task_allocator.utils import raise_with_log
+
+logger = logging.getLogger(__name__)
+
+PREDICTED = "predicted"  # 目的関数値が代理モデルの予測値かを個体に記録するキー
+
+
+class SurrogateScreener:
+    """
+    シミュレーション結果 (決定変数 → 目的関数値) を学習する代理モデルによる子個体の事前選別
+    ランダムフォレストの木ごとの予測から平均と標準偏差を求め、
+    信頼下限 (平均 - exploration × 標準偏差) の非優越順位で有望な個体を選び、
+    残りの枠は予測の不確かさが大きい個体に割り当てる
+    """
+    def __init__(self, screen_fraction: float = 0.3, uncertainty_fraction: float = 0.2, retrain_interval: int = 1,
+                 min_samples: int = 20, max_samples: Optional[int] = None, exploration: float = 1.0,
+                 n_estimators: int = 100, seed: int = 0):
+        if not 0.0 < screen_fraction <= 1.0:
+            raise_with_log(ValueError, f"Screen_fraction must be in (0, 1]: {screen_fraction}.")
+        if not 0.0 <= uncertainty_fraction <= 1.0:
+            raise_with_log(ValueError, f"Uncertainty_fraction must be in [0, 1]: {uncertainty_fraction}.")
+        if retrain_interval <= 0:
+            raise_with_log(ValueError, f"Retrain_interval must be positive: {retrain_interval}.")
+        self._screen_fraction = screen_fraction
+        self._uncertainty_fraction = uncertainty_fraction
+        self._retrain_interval = retrain_interval
+        self._min_samples = min_samples
+        self._max_samples = max_samples
+        self._exploration = exploration
+        self._n_estimators = n_estimators
+        self._seed = seed
+        self._X: list[NDArray[np.float64]] = []
+        self._F: list[NDArray[np.float64]] = []
+        self._model: Any = None
+        self._updates = 0  # 前回の学習以降に追加した回数
+
+    @property
+    def num_samples(self) -> int:
+        return len(self._X)
+
+    @property
+    def is_trained(self) -> bool:
+        return self._model is not None
+
+    def add(self, X: NDArray[np.float64], F: NDArray[np.float64]) -> None:
+        """ シミュレーションで評価した個体を学習データに追加し、学習周期に達したら再学習 """
+        X, F = np.atleast_2d(X), np.atleast_2d(F)
+        if len(X) != len(F):
+            raise_with_log(ValueError, f"X and F must have the same length: {len(X)} != {len(F)}.")
+        self._X.extend(np.asarray(X, dtype=np.float64))
+        self._F.extend(np.asarray(F, dtype=np.float64))
+        if self._max_samples is not None and len(self._X) > self._max_samples:
+            del self._X[:len(self._X) - self._max_samples], self._F[:len(self._F) - self._max_samples]
+        self._updates += 1
+        if self._updates >= self._retrain_interval or (self._model is None and len(self._X) >= self._min_samples):
+            self.fit()
+
+    def fit(self) -> None:
+        """ 蓄積した学習データで代理モデルを学習 """
+        if len(self._X) < self._min_samples:
+            return
+        from sklearn.ensemble import RandomForestRegressor  # 学習時のみ読み込む
+        model = RandomForestRegressor(n_estimators=self._n_estimators, random_state=self._seed)
+        model.fit(np.array(self._X), np.array(self._F))
+        self._model = model
+        self._updates = 0
+
+    def predict(self, X: NDArray[np.float64]) -> tuple[NDArray[np.float64], NDArray[np.float64]]:
+        """ 目的関数値の予測平均と標準偏差 (木ごとの予測のばらつき) """
+        if self._model is None:
+            raise_with_log(RuntimeError, "Surrogate model is not trained.")
+        X = np.atleast_2d(np.asarray(X, dtype=np.float64))
+        predictions = np.stack([tree.predict(X) for tree in self._model.estimators_])
+        predictions = predictions.reshape(len(self._model.estimators_), len(X), -1)
+        return predictions.mean(axis=0), predictions.std(axis=0)
+
+    def select(self, X: NDArray[np.float64]) -> NDArray[np.int64]:
+        """ シミュレーションで評価する個体の番号 (学習前は全個体) """
+        n = len(X)
+        if self._model is None or n == 0:
+            return np.arange(n)
+        budget = max(1, int(np.ceil(self._screen_fraction * n)))
+        num_uncertain = min(int(round(self._uncertainty_fraction * budget)), budget - 1)
+        mean, std = self.predict(X)
+
+        # 信頼下限の非優越順位 (同順位内は正規化した信頼下限の和) で有望な個体を選ぶ
+        bound = mean - self._exploration * std
+        F = np.array(self._F)
+        scale = np.where(np.ptp(F, axis=0) > 0, np.ptp(F, axis=0), 1.0)
+        score = np.sum((bound - F.min(axis=0)) / scale, axis=1)
+        order = []
+        for front in NonDominatedSorting().do(bound):
+            order.extend(front[np.argsort(score[front], kind='stable')])
+        promising = np.array(order[:budget - num_uncertain], dtype=np.int64)
+
+        # 残りの枠は不確かさの大きい個体
+        rest = np.setdiff1d(np.arange(n), promising)
+        uncertainty = np.sum(std[rest] / scale, axis=1)
+        uncertain = rest[np.argsort(-uncertainty, kind='stable')[:num_uncertain]]
+        return np.sort(np.concatenate([promising, uncertain]))
+
+
+class ScreenedProblem(Problem):
+    """
+    代理モデルで事前選別した個体だけを元の問題 (シミュレーション) で評価する問題
+    選別されなかった個体には代理モデルの予測平均を目的関数値として与え、予測値であることを個体に記録する
+    予測値のまま最終的な解にならないよう、ResimulateFront で非優越解をシミュレーションで評価し直す
+    """
+    def __init__(self, problem: Problem, screener: SurrogateScreener, **kwargs: Any):
+        self._problem = problem
+        self._screener = screener
+        self._num_simulated = 0
+        self._num_predicted = 0
+        self._num_resimulated = 0
+        super().__init__(n_var=problem.n_var, n_obj=problem.n_obj, xl=problem.xl, xu=problem.xu, **kwargs)
+
+    @property
+    def num_simulated(self) -> int:
+        return self._num_simulated
+
+    @property
+    def num_predicted(self) -> int:
+        return self._num_predicted
+
+    @property
+    def num_resimulated(self) -> int:
+        """ 予測値を与えた後にシミュレーションで評価し直した個体数 """
+        return self._num_resimulated
+
+    @staticmethod
+    def is_predicted(pop: Population) -> NDArray[np.bool_]:
+        """ 各個体の目的関数値が代理モデルの予測値か (記録のない個体は False) """
+        return np.array([bool(individual.get(PREDICTED)) for individual in pop], dtype=np.bool_)
+
+    def _simulate(self, X: NDArray[np.float64]) -> NDArray[np.float64]:
+        """ 元の問題で評価し、学習データに追加 """
+        F = np.asarray(self._problem.evaluate(X, return_values_of=["F"]), dtype=np.float64)
+        self._screener.add(X, F)
+        return F
+
+    def _evaluate(self, X: NDArray[np.float64], out: dict[str, Any], *args: Any, **kwargs: Any) -> None:
+        selected = self._screener.select(X)
+        F = np.empty((len(X), self.n_obj), dtype=np.float64)
+        F[selected] = self._simulate(X[selected])
+        rest = np.setdiff1d(np.arange(len(X)), selected)
+        if len(rest) > 0:
+            F[rest] = self._screener.predict(X[rest])[0]
+        self._num_simulated += len(selected)
+        self._num_predicted += len(rest)
+        out["F"] = F
+        out[PREDICTED] = np.isin(np.arange(len(X)), rest)  # Evaluator が各個体に設定する
+
+    def resimulate(self, pop: Population) -> int:
+        """ pop のうち予測値を持つ個体をシミュレーションで評価し直して F を置き換え、評価した個体数を返す """
+        if len(pop) == 0:
+            return 0
+        indices = np.flatnonzero(self.is_predicted(pop))
+        if len(indices) == 0:
+            return 0
+        X = np.asarray(pop.get("X"), dtype=np.float64)
+        F = self._simulate(X[indices])
+        for i, f in zip(indices, F):
+            pop[i].set("F", f)
+            pop[i].set(PREDICTED, False)
+        self._num_simulated += len(indices)
+        self._num_resimulated += len(indices)
+        return len(indices)
+
+
+class ResimulateFront(Callback):
+    """
+    世代ごとに非優越解のうち予測値を持つ個体をシミュレーションで評価し直すコールバック
+    評価し直すと非優越解が入れ替わるため、予測値の個体がなくなるまで繰り返す
+    個体は母集団と共有しているため、次世代の選択にも評価し直した値が使われる
+    minimize(problem, algorithm, callback=ResimulateFront(problem)) のように使う
+    """
+    def __init__(self, problem: ScreenedProblem):
+        super().__init__()
+        self._problem = problem
+
+    def notify(self, algorithm: Any) -> None:
+        while algorithm.opt is not None and self._problem.resimulate(algorithm.opt) > 0:
+            algorithm.opt = filter_optimum(algorithm.pop, least_infeasible=True)
@@ -1,8 +1,38 @@
-from .agent import RobotAgent, AgentState
-from .simulation import Simulator
-
-__all__ = [
-    "RobotAgent",
-    "AgentState",
-    "Simulator",
-]
\ No newline at end of file
+import importlib
+from typing import Any
+
+# 公開名 → 定義しているサブモジュール (参照されたときに読み込み、使わないサブモジュールの依存を読み込まない)
+_EXPORTS = {
+    "RobotAgent": ".agent",
+    "AgentState": ".agent",
+    "Simulator": ".simulation",
+    "ArrayEngine": ".array_engine",
+    "BatchSimulator": ".batch",
+    "SimulationSnapshot": ".snapshot",
+    "DependencyTracker": ".readiness",
+    "TrajectoryRecorder": ".recorder",
+    "TrajectoryReader": ".recorder",
+    "PhaseProfiler": ".profiler",
+    "ProfileReport": ".profiler",
+    "PrefixCache": ".prefix_cache",
+    "FitnessCache": ".fitness_cache",
+    "evaluation_context": ".fitness_cache",
+    "normalize_priorities": ".fitness_cache",
+    "world_fingerprint": ".fitness_cache",
+    "evaluate_scenarios": ".parallel",
+    "evaluate_population": ".parallel",
+    "aggregate_objectives": ".parallel",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str) -> Any:
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
+
+def __dir__() -> list[str]:
+    return sorted(list(globals()) + __all__)
@@ -1,13 +1,9 @@
 from enum import Enum
-from collections import Counter
-import copy, sys, math
 from typing import Optional
-import numpy as np
-import pandas as pd
 
-from modutask.core import *
-from modutask.core.utils.coodinate_utils import is_within_range
-from modutask.utils.logger import raise_with_log
+from modular_robot_task_allocator.core import *
+from modular_robot_task_allocator.core.coodinate_utils import is_within_range
+from modular_robot_task_allocator.utils import raise_with_log
 
 class AgentState(Enum):
     """ エージェントの状態を表す列挙型 """
@@ -30,6 +26,23 @@ class RobotAgent:
         self.task_priority = task_priority
         self.assigned_task = None
         self.state = AgentState.IDLE
+        self.consumed_priority = 0  # これまでに読み出した優先順位の長さ (末尾まで読んだ場合は長さ+1)
+
+    @property
+    def task_priority(self) -> list[str]:
+        return self._task_priority
+
+    @task_priority.setter
+    def task_priority(self, task_priority: list[str]) -> None:
+        self._task_priority = task_priority
+        self.reset_cursor()
+
+    def reset_cursor(self) -> None:
+        """
+        優先順位の走査位置を先頭に戻す
+        完了済みのタスクが未完了に戻る場合 (スナップショットの復元など) に呼ぶ
+        """
+        self._cursor = 0  # これより前のタスクはすべて完了済み
 
     def is_inactive(self):
         """ ロボットの稼働状態を確認 """
@@ -42,34 +55,32 @@ class RobotAgent:
         else:
             return False
 
-    def decide_recharge(self, charge_stations: dict[str, Charge]):
+    def decide_recharge(self, simulation_map: SimulationMap):
         # 充電タスクが既に割り当て済みならスキップ
         if isinstance(self.assigned_task, Charge):
             return
         # バッテリーが設定以下なら充電に向かう
         if self.robot.total_battery() < self.robot.type.recharge_trigger:
-            # 現在地から最も近くの充電スペースを探す
-            min_dist = sys.float_info.max
-            min_station = None
-            for _, station in charge_stations.items():
-                dist = math.sqrt(sum((x - y) ** 2 for x, y in zip(station.coordinate, self.robot.coordinate)))
-                if min_dist > dist:
-                    min_dist = dist
-                    min_station = station
-            self.assigned_task = min_station
+            # 現在地から最も近くの充電スペースを空間索引で探す
+            self.assigned_task = simulation_map.nearest_station(self.robot.coordinate)
 
     def update_task(self, tasks: dict[str, BaseTask]):
         # すでにタスクが割り当てられている場合はスキップ
         if isinstance(self.assigned_task, Charge):
             return
         # 優先順位で目標タスクを決定
-        for task_name in self.task_priority:
-            task = tasks[task_name]
+        # 完了したタスクは未完了に戻らないため、走査位置から先だけを見る (位置は単調に進む)
+        task_priority = self._task_priority
+        while self._cursor < len(task_priority):
+            task = tasks[task_priority[self._cursor]]
             # タスクが完了済みなら次のタスクに
             if task.is_completed():
+                self._cursor += 1
                 continue
             self.assigned_task = task
+            self.consumed_priority = max(self.consumed_priority, self._cursor + 1)
             return
+        self.consumed_priority = max(self.consumed_priority, len(task_priority) + 1)
 
     def is_on_site(self) -> bool:
         if self.assigned_task is None:
@@ -0,0 +1,826 @@
+import logging
+from dataclasses import dataclass
+from typing import Any, Optional
+import numpy as np
+from numpy.typing import NDArray
+from modular_robot_task_allocator.core import *
+from modular_robot_task_allocator.core.coodinate_utils import ATOL, RTOL  # is_within_range と同じ許容誤差
+from modular_robot_task_allocator.simulator.agent import RobotAgent, AgentState
+from modular_robot_task_allocator.utils import raise_with_log
+
+logger = logging.getLogger(__name__)
+
+# タスク種別
+KIND_MANUFACTURE = 0
+KIND_TRANSPORT = 1
+KIND_TRANSPORT_MODULE = 2
+KIND_ASSEMBLY = 3
+
+NO_INDEX = -1  # 未割り当て・パディング
+
+# ステップごとに変化する配列 (スナップショットの対象)
+STATE_ARRAYS = ("m_battery", "m_operating_time", "m_active", "m_coordinate", "m_mounted", "r_mounted", "r_num_mounted",
+                "r_battery", "r_max_battery", "r_coordinate", "r_state", "t_completed", "t_coordinate", "a_task", "a_state",
+                "a_consumed")
+
+ROBOT_ACTIVE = RobotState.ACTIVE.value[0]
+ROBOT_NO_ENERGY = RobotState.NO_ENERGY.value[0]
+ROBOT_DEFECTIVE = RobotState.DEFECTIVE.value[0]
+ROBOT_STATES = {state.value[0]: state for state in RobotState}
+AGENT_STATES = {state.value[0]: state for state in AgentState}
+
+
+def is_within_range_array(coordinate1: NDArray[np.float64], coordinate2: NDArray[np.float64]) -> NDArray[np.bool_]:
+    """ is_within_range の配列版 (最終軸が座標) """
+    return np.all(np.abs(coordinate1 - coordinate2) <= ATOL + RTOL * np.abs(coordinate2), axis=-1)
+
+def _norm(v: NDArray[np.float64]) -> NDArray[np.float64]:
+    """ 最終軸を座標とするベクトルの長さ (distance と同じ演算順序) """
+    return np.sqrt(v[..., 0] * v[..., 0] + v[..., 1] * v[..., 1])
+
+def performance_contribution(task: BaseTask, robot_type: RobotType) -> float:
+    """ BaseTask.is_performance_satisfied と同じ規則でロボット1台分の能力値を算出 """
+    return task.performance_contribution(robot_type)
+
+
+@dataclass
+class StepPlan:
+    """ 1ステップ分のエージェントの意思決定 (ワールド×ロボット) """
+    active: NDArray[np.bool_]
+    a_task: NDArray[np.int64]
+    target: NDArray[np.float64]
+    moving: NDArray[np.bool_]
+    assigned: NDArray[np.bool_]
+    charging: NDArray[np.bool_]
+    consumed: NDArray[np.int64]  # 読み出した優先順位の長さ
+
+
+class ArrayEngine:
+    """
+    構造体配列 (SoA) 形式でシミュレーションを進めるエンジン
+    モジュール・ロボット・タスクの可変状態を先頭軸をワールドとする numpy 配列で保持し、
+    オブジェクトモデル (Simulator.run_simulation) と同じ規則で全エージェントを一斉に更新する
+    ロボットのバッテリー合計・最大バッテリー合計は Robot と同様にバッテリーや搭載状態の変更時に更新して保持する
+    """
+    check_aggregates = False  # True なら集計値を読むたびに再計算した値と照合 (テスト用)
+
+    def __init__(self, tasks: dict[str, BaseTask], agents: dict[str, RobotAgent], simulation_map: SimulationMap,
+                 scenario_sets: list[list[BaseRiskScenario]]):
+        if len(scenario_sets) == 0:
+            raise_with_log(ValueError, "At least one scenario set is required.")
+        self._tasks = list(tasks.values())
+        self._agents = list(agents.values())
+        self._robots = [agent.robot for agent in self._agents]
+        self._simulation_map = simulation_map
+        self._stations = list(simulation_map.charge_stations.values())
+        self._scenarios = [list(scenarios) for scenarios in scenario_sets]  # ワールドごとの故障シナリオ
+        self._num_worlds = len(self._scenarios)
+        self._dirty = False  # オブジェクトへの未反映の更新があるか
+
+        task_index = {task.name: i for i, task in enumerate(self._tasks)}
+        robot_index = {id(robot): i for i, robot in enumerate(self._robots)}
+
+        # モジュール
+        self._modules: list[Module] = []
+        module_index: dict[int, int] = {}
+        def register(module: Module) -> int:
+            if id(module) not in module_index:
+                module_index[id(module)] = len(self._modules)
+                self._modules.append(module)
+            return module_index[id(module)]
+        for robot in self._robots:
+            for module in robot.component_required:
+                register(module)
+        for task in self._tasks:
+            if isinstance(task, TransportModule):
+                register(task.target_module)
+        self._module_index = module_index
+
+        B, M, R, T = self._num_worlds, len(self._modules), len(self._robots), len(self._tasks)
+        self.m_max_battery = np.array([module.type.max_battery for module in self._modules], dtype=np.float64)
+        self.m_battery = np.tile(np.array([module.battery for module in self._modules], dtype=np.float64), (B, 1))
+        self.m_operating_time = np.tile(
+            np.array([module.operating_time for module in self._modules], dtype=np.float64), (B, 1))
+        self.m_active = np.tile(np.array([module.is_active() for module in self._modules], dtype=np.bool_), (B, 1))
+        self.m_coordinate = np.tile(
+            np.array([module.coordinate for module in self._modules], dtype=np.float64).reshape(M, 2), (B, 1, 1))
+
+        # ロボット
+        K = max([len(robot.component_required) for robot in self._robots], default=0)
+        self._num_slots = K
+        self.r_power = np.array([robot.type.power_consumption for robot in self._robots], dtype=np.float64)
+        self.r_trigger = np.array([robot.type.recharge_trigger for robot in self._robots], dtype=np.float64)
+        self.r_mobility = np.array(
+            [robot.type.performance.get(PerformanceAttributes.MOBILITY, 0) for robot in self._robots], dtype=np.float64)
+        self.r_required = np.full((R, K), NO_INDEX, dtype=np.int64)
+        self.r_mounted = np.full((B, R, K), NO_INDEX, dtype=np.int64)
+        self.r_num_mounted = np.zeros((B, R), dtype=np.int64)
+        self.m_mounted = np.zeros((B, M), dtype=np.bool_)
+        for r, robot in enumerate(self._robots):
+            for k, module in enumerate(robot.component_required):
+                self.r_required[r, k] = module_index[id(module)]
+            for k, module in enumerate(robot.component_mounted):
+                self.r_mounted[:, r, k] = module_index[id(module)]
+                self.m_mounted[:, module_index[id(module)]] = True
+            self.r_num_mounted[:, r] = len(robot.component_mounted)
+        self.r_battery = np.zeros((B, R), dtype=np.float64)
+        self.r_max_battery = np.zeros((B, R), dtype=np.float64)
+        self._refresh_totals()
+        self.r_coordinate = np.tile(
+            np.array([robot.coordinate for robot in self._robots], dtype=np.float64).reshape(R, 2), (B, 1, 1))
+        self.r_state = np.tile(np.array([robot.state.value[0] for robot in self._robots], dtype=np.int64), (B, 1))
+
+        # 充電ステーション
+        S = len(self._stations)
+        self.s_coordinate = np.array([station.coordinate for station in self._stations], dtype=np.float64).reshape(S, 2)
+        self.s_speed = np.array([station.charging_speed for station in self._stations], dtype=np.float64)
+        station_index = {id(station): T + s for s, station in enumerate(self._stations)}
+
+        # タスク
+        self.t_total = np.array([task.total_workload for task in self._tasks], dtype=np.float64)
+        self.t_completed = np.tile(np.array([task.completed_workload for task in self._tasks], dtype=np.float64), (B, 1))
+        self.t_coordinate = np.tile(
+            np.array([task.coordinate for task in self._tasks], dtype=np.float64).reshape(T, 2), (B, 1, 1))
+        self.t_kind = np.zeros(T, dtype=np.int64)
+        self.t_destination = np.zeros((T, 2), dtype=np.float64)
+        self.t_resistance = np.ones(T, dtype=np.float64)
+        self.t_target_module = np.full(T, NO_INDEX, dtype=np.int64)
+        self.t_target_robot = np.full(T, NO_INDEX, dtype=np.int64)
+        self.t_dependency: list[NDArray[np.int64]] = []
+        self.t_contribution = np.zeros((T, R), dtype=np.float64)
+        for t, task in enumerate(self._tasks):
+            if isinstance(task, TransportModule):
+                self.t_kind[t] = KIND_TRANSPORT_MODULE
+                self.t_target_module[t] = module_index[id(task.target_module)]
+            elif isinstance(task, Transport):
+                self.t_kind[t] = KIND_TRANSPORT
+            elif isinstance(task, Assembly):
+                self.t_kind[t] = KIND_ASSEMBLY
+                if id(task.target_robot) not in robot_index:
+                    raise_with_log(ValueError, f"Target robot is not simulated: {task.name}.")
+                self.t_target_robot[t] = robot_index[id(task.target_robot)]
+            elif isinstance(task, Manufacture):
+                self.t_kind[t] = KIND_MANUFACTURE
+            else:
+                raise_with_log(TypeError, f"Unsupported task class for array backend: {task.__class__.__name__}.")
+            if isinstance(task, Transport):
+                self.t_destination[t] = task.destination_coordinate
+                self.t_resistance[t] = task.transport_resistance
+            self.t_dependency.append(
+                np.array([task_index[dep.name] for dep in task.task_dependency], dtype=np.int64))
+            for r, robot in enumerate(self._robots):
+                self.t_contribution[t, r] = performance_contribution(task, robot.type)
+
+        # エージェント
+        self._task_index = task_index
+        self.set_task_priorities([agent.task_priority for agent in self._agents])
+        self.a_task = np.full((B, R), NO_INDEX, dtype=np.int64)
+        for r, agent in enumerate(self._agents):
+            if agent.assigned_task is None:
+                continue
+            if isinstance(agent.assigned_task, Charge):
+                self.a_task[:, r] = station_index[id(agent.assigned_task)]
+            else:
+                self.a_task[:, r] = task_index[agent.assigned_task.name]
+        self.a_state = np.tile(np.array([agent.state.value[0] for agent in self._agents], dtype=np.int64), (B, 1))
+        self.a_consumed = np.tile(np.array([agent.consumed_priority for agent in self._agents], dtype=np.int64), (B, 1))
+
+    @property
+    def num_worlds(self) -> int:
+        return self._num_worlds
+
+    @property
+    def modules(self) -> list[Module]:
+        """ 対象の全モジュール (配列の番号順) """
+        return self._modules
+
+    def set_task_priorities(self, task_priorities: list[list[str]]) -> None:
+        """ ロボットごとのタスク優先順位 (タスク名のリスト) を全ワールドに設定 """
+        self.set_world_task_priorities([task_priorities] * self._num_worlds)
+
+    def set_world_task_priorities(self, world_priorities: list[list[list[str]]]) -> None:
+        """ ワールドごとに異なるタスク優先順位を設定 (個体群の一括評価用) """
+        if len(world_priorities) != self._num_worlds:
+            raise_with_log(ValueError, f"Task_priorities must be given for {self._num_worlds} worlds.")
+        R = len(self._agents)
+        for task_priorities in world_priorities:
+            if len(task_priorities) != R:
+                raise_with_log(ValueError, f"Task_priorities must be given for {R} robots.")
+        P = max([len(task_priority) for task_priorities in world_priorities for task_priority in task_priorities],
+                default=0)
+        a_priority = np.full((self._num_worlds, R, P), NO_INDEX, dtype=np.int64)
+        a_priority_length = np.zeros((self._num_worlds, R), dtype=np.int64)
+        encoded: dict[int, tuple[NDArray[np.int64], NDArray[np.int64]]] = {}  # 同じ優先順位のワールドは1度だけ変換
+        for w, task_priorities in enumerate(world_priorities):
+            if id(task_priorities) not in encoded:
+                priority = np.full((R, P), NO_INDEX, dtype=np.int64)
+                for r, task_priority in enumerate(task_priorities):
+                    for p, task_name in enumerate(task_priority):
+                        if task_name not in self._task_index:
+                            raise_with_log(ValueError, f"Unknown task name in task_priority: {task_name}.")
+                        priority[r, p] = self._task_index[task_name]
+                length = np.array([len(task_priority) for task_priority in task_priorities], dtype=np.int64)
+                encoded[id(task_priorities)] = (priority, length)
+            a_priority[w], a_priority_length[w] = encoded[id(task_priorities)]
+        self.a_priority = a_priority
+        self.a_priority_length = a_priority_length
+
+    def set_scenarios(self, scenario_sets: list[list[BaseRiskScenario]]) -> None:
+        """ ワールドごとの故障シナリオを差し替える (ワールド数は変えない) """
+        if len(scenario_sets) != self._num_worlds:
+            raise_with_log(ValueError, f"Scenario_sets must be given for {self._num_worlds} worlds.")
+        self._scenarios = [list(scenarios) for scenarios in scenario_sets]
+
+    def snapshot(self) -> dict[str, NDArray[Any]]:
+        """ 可変状態の配列のコピー """
+        return {name: getattr(self, name).copy() for name in STATE_ARRAYS}
+
+    def restore(self, state: dict[str, NDArray[Any]]) -> None:
+        """ snapshot で取得した状態に戻す """
+        for name in STATE_ARRAYS:
+            setattr(self, name, state[name].copy())
+        self._dirty = True
+
+    def remaining_workload(self) -> NDArray[np.float64]:
+        """ ワールドごと・タスクごとの残り仕事量 """
+        return self.t_total - self.t_completed
+
+    def total_remaining_workload(self) -> NDArray[np.float64]:
+        return np.sum(self.remaining_workload(), axis=1)
+
+    def variance_remaining_workload(self) -> NDArray[np.float64]:
+        return np.var(self.remaining_workload(), axis=1)
+
+    def variance_operating_time(self) -> NDArray[np.float64]:
+        return np.var(self.m_operating_time, axis=1)
+
+    def step(self) -> None:
+        """ 全ワールドを1ステップ進める """
+        self._execute(self._plan())
+
+    def advance(self, max_steps: int) -> int:
+        """
+        次のイベントまで変化のないステップを解析的に読み飛ばして進める
+        イベント (到着・充電判断・満充電・タスク完了・依存解消・故障) を含むステップは通常どおり1ステップ実行する
+        :return: 進めたステップ数
+        """
+        if max_steps <= 0:
+            return 0
+        plan = self._plan()
+        steps = self._skippable_steps(plan, max_steps)
+        if steps < 2:
+            self._execute(plan)
+            return 1
+        self._skip(plan, steps)
+        return steps
+
+    def _plan(self) -> StepPlan:
+        """ エージェントの意思決定 (稼働確認・充電判断・タスク選択・移動か配置か) """
+        T = len(self._tasks)
+        active = self.r_state == ROBOT_ACTIVE
+        a_task = self.a_task.copy()
+
+        # 充電が必要かチェック
+        need_recharge = active & (a_task < T) & (self.total_battery() < self.r_trigger)
+        if need_recharge.any():
+            if len(self._stations) == 0:
+                a_task[need_recharge] = NO_INDEX
+            else:
+                a_task[need_recharge] = T + self._nearest_station(self.r_coordinate[need_recharge])
+
+        # 優先順位で目標タスクを決定
+        a_task, consumed = self._select_task(a_task, active & (a_task < T))
+
+        # 移動が必要か
+        has_task = active & (a_task != NO_INDEX)
+        target = self._target_coordinate(a_task)
+        on_site = has_task & is_within_range_array(target, self.r_coordinate)
+        return StepPlan(active=active, a_task=a_task, target=target, moving=has_task & ~on_site,
+                        assigned=on_site & (a_task < T), charging=on_site & (a_task >= T), consumed=consumed)
+
+    def _execute(self, plan: StepPlan) -> None:
+        """ 意思決定に従って1ステップ実行 """
+        T = len(self._tasks)
+        self._dirty = True
+        self.a_state[self.r_state == ROBOT_NO_ENERGY] = AgentState.NO_ENERGY.value[0]
+        self.a_state[self.r_state == ROBOT_DEFECTIVE] = AgentState.DEFECTIVE.value[0]
+        self.a_task = plan.a_task
+        self.a_consumed = plan.consumed
+
+        # 移動が必要なエージェントは移動
+        move_b, move_r = np.nonzero(plan.moving)
+        if len(move_b) > 0:
+            self._travel(move_b, move_r, plan.target[move_b, move_r])
+            self._operate(move_b, move_r, self.r_num_mounted[move_b, move_r])
+        self.a_state[plan.moving] = AgentState.MOVE.value[0]
+        self.a_state[plan.assigned] = AgentState.ASSIGNED.value[0]
+        self.a_state[plan.charging] = AgentState.CHARGE.value[0]
+
+        # 各タスクを一斉に実行
+        self._update_tasks(plan.assigned)
+
+        # 充電を実行
+        charge_b, charge_r = np.nonzero(plan.charging)
+        if len(charge_b) > 0:
+            self._charge_battery_power(charge_b, charge_r, self.s_speed[self.a_task[charge_b, charge_r] - T])
+
+        self._reset_task()
+
+    def _reset_task(self) -> None:
+        """ タスクをエージェントの目標から消す (充電タスクはフル充電まで固定) """
+        keep = (self.a_task >= len(self._tasks)) & ~self.is_battery_full()
+        self.a_task[~keep] = NO_INDEX
+        self.a_state[:] = AgentState.IDLE.value[0]
+        self._update_robot_state()
+
+    def _executing_tasks(self, plan: StepPlan) -> NDArray[np.bool_]:
+        """ 意思決定どおりに実行される組み立て以外のタスク (ワールド×タスク) """
+        executing = np.zeros(self.t_completed.shape, dtype=np.bool_)
+        assigned_b, assigned_r = np.nonzero(plan.assigned)
+        assigned_t = plan.a_task[assigned_b, assigned_r]
+        performance = np.zeros(self.t_completed.shape, dtype=np.float64)
+        np.add.at(performance, (assigned_b, assigned_t), self.t_contribution[assigned_t, assigned_r])
+        for t in np.unique(assigned_t):
+            if self.t_kind[t] == KIND_ASSEMBLY:
+                continue
+            runnable = (performance[:, t] >= 1.0) & self._dependencies_completed(t)
+            if self.t_kind[t] != KIND_MANUFACTURE:
+                on_task = plan.assigned & (plan.a_task == t)
+                runnable &= np.max(np.where(on_task, self.r_mobility, -np.inf), axis=1) != 0
+            executing[:, t] = runnable
+        return executing
+
+    def _assembly_pending(self, moving: NDArray[np.bool_]) -> bool:
+        """ 組み立てが起こり得るか (搭載可能なモジュールがある・対象ロボットが移動して近づき得る) """
+        for t in np.nonzero(self.t_kind == KIND_ASSEMBLY)[0]:
+            r = self.t_target_robot[t]
+            required = self.r_required[r][self.r_required[r] != NO_INDEX]
+            missing = ~self.m_mounted[:, required] & self.m_active[:, required]
+            candidate = missing & is_within_range_array(self.m_coordinate[:, required], self.r_coordinate[:, r][:, None, :])
+            incomplete = self.t_completed[:, t] < self.t_total[t]
+            if np.any(incomplete & (candidate.any(axis=1) | (missing.any(axis=1) & moving[:, r]))):
+                return True
+        return False
+
+    def _skippable_steps(self, plan: StepPlan, limit: int) -> int:
+        """ 意思決定と実行内容が変わらずに続くステップ数 (全ワールドの最小値) """
+        T = len(self._tasks)
+        executing = self._executing_tasks(plan)
+        world = np.arange(self._num_worlds)[:, None]
+        working = plan.assigned & executing[world, np.clip(plan.a_task, 0, max(T - 1, 0))] if T > 0 \
+            else np.zeros_like(plan.assigned)
+        operating = plan.moving | working
+        if self._assembly_pending(operating):
+            return 0
+        horizon = np.full(plan.a_task.shape, float(limit))
+
+        # 移動: 到着するステップの手前まで
+        with np.errstate(divide='ignore', invalid='ignore'):
+            arrive = np.where(self.r_mobility > 0,
+                              np.floor(_norm(plan.target - self.r_coordinate) / self.r_mobility) - 1, np.inf)
+        horizon = np.where(plan.moving, np.minimum(horizon, arrive), horizon)
+
+        # 作業: タスクが完了するステップの手前まで
+        for w, t in zip(*np.nonzero(executing)):
+            on_task = plan.assigned[w] & (plan.a_task[w] == t)
+            if self.t_kind[t] == KIND_MANUFACTURE:
+                steps = np.ceil(self.t_total[t] - self.t_completed[w, t]) - 1
+            else:
+                if self.t_kind[t] == KIND_TRANSPORT_MODULE or np.any(plan.moving[w] & (plan.a_task[w] == t)):
+                    return 0  # モジュールの移動や移動先の変化を伴うため読み飛ばさない
+                mobility = np.min(self.r_mobility[on_task]) / self.t_resistance[t]
+                if mobility > np.min(self.r_mobility[on_task]):
+                    return 0  # ロボットが荷物に追従できない (通常のステップで例外を送出)
+                steps = np.floor(_norm(self.t_destination[t] - self.t_coordinate[w, t]) / mobility) - 1
+            horizon[w] = np.where(on_task, np.minimum(horizon[w], steps), horizon[w])
+
+        # バッテリー: 充電判断・電力不足に達するステップの手前まで
+        total = self.total_battery()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            trigger = np.where(self.r_power > 0, np.floor((total - self.r_trigger) / self.r_power), np.inf)
+            empty = np.where(self.r_power > 0, np.floor((total - self.r_power) / self.r_power) - 1, np.inf)
+        horizon = np.where(operating & (plan.a_task < T), np.minimum(horizon, trigger), horizon)
+        horizon = np.where(operating, np.minimum(horizon, empty), horizon)
+
+        # 充電: 満充電になるステップの手前まで
+        if plan.charging.any():
+            speed = self.s_speed[np.clip(plan.a_task - T, 0, len(self._stations) - 1)]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                full = np.where(speed > 0, np.ceil((self.total_max_battery() - total) / speed) - 1, np.inf)
+            horizon = np.where(plan.charging, np.minimum(horizon, full), horizon)
+
+        steps = int(max(np.min(horizon), 0))
+        if steps < 2:
+            return steps
+
+        # 故障: 最初に故障が起きるステップの手前まで
+        return self._failure_free_steps(self._operating_sequences(plan, executing), steps)
+
+    def _operating_sequences(self, plan: StepPlan, executing: NDArray[np.bool_]) -> list[NDArray[np.int64]]:
+        """ 1ステップで稼働するモジュールの並び (乱数の消費順) をワールドごとに作成 """
+        sequences = []
+        for w in range(self._num_worlds):
+            robots = list(np.nonzero(plan.moving[w])[0])
+            for t in np.nonzero(executing[w])[0]:
+                robots.extend(np.nonzero(plan.assigned[w] & (plan.a_task[w] == t))[0])
+            modules = [self.r_mounted[w, r, :self.r_num_mounted[w, r]] for r in robots]
+            sequences.append(np.concatenate(modules) if modules else np.zeros(0, dtype=np.int64))
+        return sequences
+
+    def _failure_free_steps(self, sequences: list[NDArray[np.int64]], steps: int) -> int:
+        """
+        乱数を先読みして最初の故障が起きるステップを求める
+        各シナリオの乱数状態は先読み前に戻す
+        """
+        free = steps
+        for w, sequence in enumerate(sequences):
+            if len(sequence) == 0:
+                continue
+            # ステップごとに 1.0 ずつ加算した稼働時間 (累積和は先頭から順に加算する)
+            increments = np.ones((steps + 1, len(sequence)))
+            increments[0] = self.m_operating_time[w, sequence]
+            operating_time = np.cumsum(increments, axis=0)[1:]
+            for scenario in self._scenarios[w]:
+                if not isinstance(scenario, ExponentialFailure):
+                    return 0
+                if scenario.sampling == "threshold":
+                    # 稼働時間が閾値に達するステップの手前まで (乱数は消費しない)
+                    threshold = scenario.failure_thresholds([self._modules[m] for m in sequence])
+                    first = np.maximum(np.ceil(threshold - self.m_operating_time[w, sequence]), 1.0)
+                    free = min(free, int(min(np.min(first) - 1, steps)))
+                    continue
+                if scenario.sampling == "counter":
+                    names = [self._modules[m].name for m in sequence]
+                    draws = scenario.counter_random(names * steps, operating_time.reshape(-1)).reshape(steps, -1)
+                else:
+                    if scenario.rng is None:
+                        raise_with_log(RuntimeError, "RNG not initialized. Call 'initialize()' first.")
+                    state = scenario.rng.bit_generator.state
+                    draws = scenario.rng.random((steps, len(sequence)))
+                    scenario.rng.bit_generator.state = state
+                failed = np.any(draws < 1 - np.exp(-scenario.failure_rate * operating_time), axis=1)
+                if failed.any():
+                    free = min(free, int(np.argmax(failed)))
+        return free
+
+    def _skip(self, plan: StepPlan, steps: int) -> None:
+        """
+        変化のないステップをまとめて進める
+        意思決定と故障判定は省くが、移動・作業・バッテリー・稼働時間はステップごとと同じ演算を繰り返し、
+        1ステップずつ進めた場合とビット単位で同じ状態にする
+        """
+        T = len(self._tasks)
+        self._dirty = True
+        self.a_task = plan.a_task
+        self.a_consumed = plan.consumed
+        executing = self._executing_tasks(plan)
+        sequences = self._operating_sequences(plan, executing)
+
+        move_b, move_r = np.nonzero(plan.moving)
+        manufacture, transport = [], []
+        work_b, work_r = [], []
+        for t in np.nonzero(executing.any(axis=0))[0]:
+            (manufacture if self.t_kind[t] == KIND_MANUFACTURE else transport).append(t)
+            robots_b, robots_r = np.nonzero(plan.assigned & (plan.a_task == t) & executing[:, t][:, None])
+            work_b.append(robots_b)
+            work_r.append(robots_r)
+        operate_b = np.concatenate([move_b] + work_b).astype(np.int64)
+        operate_r = np.concatenate([move_r] + work_r).astype(np.int64)
+        n = self.r_num_mounted[operate_b, operate_r]
+        slots = self.r_mounted[operate_b, operate_r]
+        valid = np.arange(self._num_slots) < n[:, None]
+        operate_w, operate_m = np.broadcast_to(operate_b[:, None], slots.shape)[valid], slots[valid]
+        charge_b, charge_r = np.nonzero(plan.charging)
+        speed = self.s_speed[self.a_task[charge_b, charge_r] - T] if len(charge_b) > 0 else None
+
+        for _ in range(steps):
+            if len(move_b) > 0:
+                self._travel(move_b, move_r, plan.target[move_b, move_r])
+            for t in manufacture:
+                self.t_completed[executing[:, t], t] += 1.0
+            for t in transport:
+                self._update_transport(t, executing[:, t], plan.assigned)
+            if len(operate_b) > 0:
+                self._draw_battery_power(operate_b, operate_r, n)
+                self.m_operating_time[operate_w, operate_m] += 1.0
+            if speed is not None:
+                self._charge_battery_power(charge_b, charge_r, speed)
+
+        # 故障判定で消費される乱数を読み捨てる
+        for w, sequence in enumerate(sequences):
+            if len(sequence) == 0:
+                continue
+            for scenario in self._scenarios[w]:
+                if scenario.sampling == "step":
+                    scenario.rng.random(steps * len(sequence))
+
+        self._reset_task()
+
+    def total_battery(self) -> NDArray[np.float64]:
+        """ 搭載モジュールのバッテリー合計 """
+        if ArrayEngine.check_aggregates:
+            self.verify_aggregates()
+        return self.r_battery
+
+    def total_max_battery(self) -> NDArray[np.float64]:
+        """ 搭載モジュールの最大バッテリー合計 """
+        if ArrayEngine.check_aggregates:
+            self.verify_aggregates()
+        return self.r_max_battery
+
+    def _sum_mounted(self, values: NDArray[np.float64], b: NDArray[np.int64], r: NDArray[np.int64],
+                     per_world: bool) -> NDArray[np.float64]:
+        """ 搭載モジュールの値の合計 (Robot と同じく搭載順に加算) """
+        total = np.zeros(len(b), dtype=np.float64)
+        for k in range(self._num_slots):
+            slot = self.r_mounted[b, r, k]
+            value = values[b, slot] if per_world else values[slot]
+            total += np.where(slot != NO_INDEX, value, 0.0)
+        return total
+
+    def _refresh_totals(self, b: Optional[NDArray[np.int64]] = None, r: Optional[NDArray[np.int64]] = None,
+                        max_battery: bool = True) -> None:
+        """ 指定したロボット (省略時は全ロボット) のバッテリー合計を更新 """
+        if b is None or r is None:
+            b, r = (index.reshape(-1) for index in np.indices(self.r_num_mounted.shape))
+        self.r_battery[b, r] = self._sum_mounted(self.m_battery, b, r, per_world=True)
+        if max_battery:
+            self.r_max_battery[b, r] = self._sum_mounted(self.m_max_battery, b, r, per_world=False)
+
+    def verify_aggregates(self) -> None:
+        """ 保持しているバッテリー合計が再計算した値と一致するか検査 """
+        b, r = (index.reshape(-1) for index in np.indices(self.r_num_mounted.shape))
+        battery = self._sum_mounted(self.m_battery, b, r, per_world=True).reshape(self.r_battery.shape)
+        max_battery = self._sum_mounted(self.m_max_battery, b, r, per_world=False).reshape(self.r_max_battery.shape)
+        if not (np.array_equal(battery, self.r_battery) and np.array_equal(max_battery, self.r_max_battery)):
+            raise_with_log(RuntimeError, "Cached battery aggregates are inconsistent.")
+
+    def is_battery_full(self) -> NDArray[np.bool_]:
+        return self.total_battery() == self.total_max_battery()
+
+    def _nearest_station(self, coordinate: NDArray[np.float64]) -> NDArray[np.int64]:
+        """ 最も近い充電ステーションの番号 (同距離なら先頭側) """
+        return self._simulation_map.nearest_stations(coordinate)
+
+    def _select_task(self, a_task: NDArray[np.int64],
+                     choose: NDArray[np.bool_]) -> tuple[NDArray[np.int64], NDArray[np.int64]]:
+        """
+        RobotAgent.update_task: 優先順位の先頭から未完了タスクを選択
+        :return: 選択後のタスクと読み出した優先順位の長さ (末尾まで読んだ場合は長さ+1)
+        """
+        if not choose.any():
+            return a_task, self.a_consumed
+        if self.a_priority.shape[2] == 0:
+            return a_task, np.where(choose, np.maximum(self.a_consumed, 1), self.a_consumed)
+        priority = np.maximum(self.a_priority, 0)
+        world = np.arange(self._num_worlds)[:, None, None]
+        incomplete = (self.t_completed[world, priority] < self.t_total[priority]) & (self.a_priority != NO_INDEX)
+        found = incomplete.any(axis=2)
+        first = incomplete.argmax(axis=2)
+        selected = np.take_along_axis(self.a_priority, first[..., None], axis=2)[..., 0]
+        read = np.where(found, first + 1, self.a_priority_length + 1)
+        return np.where(choose & found, selected, a_task), \
+            np.where(choose, np.maximum(self.a_consumed, read), self.a_consumed)
+
+    def _target_coordinate(self, a_task: NDArray[np.int64]) -> NDArray[np.float64]:
+        """ 割り当て先 (タスクまたは充電ステーション) の座標 """
+        T = len(self._tasks)
+        world = np.arange(self._num_worlds)[:, None]
+        task_coordinate = self.t_coordinate[world, np.clip(a_task, 0, max(T - 1, 0))] if T > 0 \
+            else np.zeros(self.r_coordinate.shape)
+        if len(self._stations) == 0:
+            return task_coordinate
+        station_coordinate = self.s_coordinate[np.clip(a_task - T, 0, len(self._stations) - 1)]
+        return np.where((a_task >= T)[..., None], station_coordinate, task_coordinate)
+
+    def _travel(self, b: NDArray[np.int64], r: NDArray[np.int64], target: NDArray[np.float64]) -> None:
+        """ Robot.travel: 目的地点に向けて移動し、搭載モジュールを追従させる """
+        coordinate = self.r_coordinate[b, r]
+        v = target - coordinate
+        norm = _norm(v)
+        mob = self.r_mobility[r]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            moved = coordinate + mob[:, None] * v / norm[:, None]
+        self._place(b, r, np.where((norm < mob)[:, None], target, moved))
+
+    def _place(self, b: NDArray[np.int64], r: NDArray[np.int64], coordinate: NDArray[np.float64]) -> None:
+        """ ロボットを指定座標に置き、搭載モジュールを追従させる """
+        self.r_coordinate[b, r] = coordinate
+        slots = self.r_mounted[b, r]
+        valid = slots != NO_INDEX
+        world = np.broadcast_to(b[:, None], slots.shape)[valid]
+        self.m_coordinate[world, slots[valid]] = np.broadcast_to(coordinate[:, None, :], slots.shape + (2,))[valid]
+
+    def _operate(self, b: NDArray[np.int64], r: NDArray[np.int64], n: NDArray[np.int64]) -> None:
+        """
+        Robot.operate: バッテリー消費・稼働時間の加算・故障判定
+        (b, r) の並び順が乱数の消費順になる。n は稼働させる搭載スロット数
+        """
+        self._draw_battery_power(b, r, n)
+        slots = self.r_mounted[b, r]
+        valid = np.arange(self._num_slots) < n[:, None]
+        world = np.broadcast_to(b[:, None], slots.shape)[valid]
+        modules = slots[valid]
+        self.m_operating_time[world, modules] += 1.0
+
+        for w in range(self._num_worlds):
+            sequence = modules[world == w]
+            if len(sequence) == 0:
+                continue
+            failed = np.zeros(len(sequence), dtype=np.bool_)
+            for scenario in self._scenarios[w]:
+                alive = ~failed
+                if not alive.any():
+                    break
+                failed[alive] = self._malfunction_modules(scenario, w, sequence[alive])
+            self.m_active[w, sequence[failed]] = False
+
+    def _malfunction_modules(self, scenario: BaseRiskScenario, w: int, modules: NDArray[np.int64]) -> NDArray[np.bool_]:
+        """ シナリオによる故障判定 (モジュールの並び順に乱数を消費) """
+        if not scenario.vectorized:  # モジュールの状態を参照するシナリオにはオブジェクトへ反映してから渡す
+            for m in modules:
+                self._sync_module(w, int(m))
+        return scenario.malfunction_modules([self._modules[m] for m in modules], self.m_operating_time[w, modules])
+
+    def _draw_battery_power(self, b: NDArray[np.int64], r: NDArray[np.int64], n: NDArray[np.int64],
+                            amount: Optional[NDArray[np.float64]] = None) -> None:
+        """ Robot.draw_battery_power: 末尾のモジュールから消費 (amount 省略時は1ステップ分の消費電力) """
+        left = self.r_power[r].copy() if amount is None else amount.astype(np.float64, copy=True)
+        done = np.zeros(len(b), dtype=np.bool_)
+        for k in range(self._num_slots - 1, -1, -1):
+            idx = np.nonzero((k < n) & ~done)[0]
+            if len(idx) == 0:
+                continue
+            modules = self.r_mounted[b[idx], r[idx], k]
+            battery = self.m_battery[b[idx], modules]
+            enough = left[idx] <= battery
+            self.m_battery[b[idx], modules] = np.where(enough, battery - left[idx], 0.0)
+            left[idx] = np.where(enough, left[idx], left[idx] - battery)
+            done[idx] = enough
+        self._refresh_totals(b, r, max_battery=False)
+
+    def _charge_battery_power(self, b: NDArray[np.int64], r: NDArray[np.int64], speed: NDArray[np.float64]) -> None:
+        """ Robot.charge_battery_power: 先頭のモジュールから充電 """
+        left = speed.astype(np.float64, copy=True)
+        done = np.zeros(len(b), dtype=np.bool_)
+        n = self.r_num_mounted[b, r]
+        for k in range(self._num_slots):
+            idx = np.nonzero((k < n) & ~done)[0]
+            if len(idx) == 0:
+                continue
+            modules = self.r_mounted[b[idx], r[idx], k]
+            battery = self.m_battery[b[idx], modules]
+            max_battery = self.m_max_battery[modules]
+            remaining = max_battery - battery
+            full = remaining < left[idx]
+            self.m_battery[b[idx], modules] = np.where(full, max_battery, battery + left[idx])
+            left[idx] = np.where(full, left[idx] - remaining, left[idx])
+            done[idx] = ~full
+        self._refresh_totals(b, r, max_battery=False)
+
+    def _dependencies_completed(self, t: int) -> NDArray[np.bool_]:
+        dependency = self.t_dependency[t]
+        return np.all(self.t_completed[:, dependency] >= self.t_total[dependency], axis=1)
+
+    def _update_tasks(self, assigned: NDArray[np.bool_]) -> None:
+        """ 配置済みのタスクと未完了の組み立てタスクを辞書順に実行 """
+        assigned_b, assigned_r = np.nonzero(assigned)
+        assigned_t = self.a_task[assigned_b, assigned_r]
+        performance = np.zeros(self.t_completed.shape, dtype=np.float64)
+        np.add.at(performance, (assigned_b, assigned_t), self.t_contribution[assigned_t, assigned_r])
+
+        assembly = (self.t_kind == KIND_ASSEMBLY) & np.any(self.t_completed < self.t_total, axis=0)
+        targets = np.union1d(assigned_t, np.nonzero(assembly)[0])
+
+        pending: list[tuple[NDArray[np.int64], NDArray[np.int64], NDArray[np.int64]]] = []
+        for t in targets:
+            kind = self.t_kind[t]
+            if kind == KIND_ASSEMBLY:
+                executed = self._update_assembly(t)
+            else:
+                runnable = (performance[:, t] >= 1.0) & self._dependencies_completed(t)
+                if not runnable.any():
+                    continue
+                if kind == KIND_MANUFACTURE:
+                    executed = runnable
+                    self.t_completed[executed, t] += 1.0
+                else:
+                    executed = self._update_transport(t, runnable, assigned)
+            if not executed.any():
+                continue
+            # タスクを実行したエージェントのみ稼働 (搭載数は実行時点のもの)
+            work_b, work_r = np.nonzero(assigned & (self.a_task == t) & executed[:, None])
+            pending.append((work_b, work_r, self.r_num_mounted[work_b, work_r].copy()))
+            self.a_state[work_b, work_r] = AgentState.WORK.value[0]
+
+        if pending:
+            self._operate(*(np.concatenate(column) for column in zip(*pending)))
+
+    def _update_transport(self, t: int, runnable: NDArray[np.bool_], assigned: NDArray[np.bool_]) -> NDArray[np.bool_]:
+        """ Transport.update / TransportModule.update """
+        on_task = assigned & (self.a_task == t)
+        max_mobility = np.max(np.where(on_task, self.r_mobility, -np.inf), axis=1)
+        min_mobility = np.min(np.where(on_task, self.r_mobility, np.inf), axis=1)
+        executed = runnable & on_task.any(axis=1) & (max_mobility != 0)
+        worlds = np.nonzero(executed)[0]
+        if len(worlds) == 0:
+            return executed
+
+        mobility = min_mobility[worlds] / self.t_resistance[t]
+        coordinate = self.t_coordinate[worlds, t]
+        destination = self.t_destination[t]
+        v = destination - coordinate
+        norm = _norm(v)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            moved = coordinate + mobility[:, None] * v / norm[:, None]
+        coordinate = np.where((norm < mobility)[:, None], destination, moved)
+        self.t_coordinate[worlds, t] = coordinate
+
+        # ロボットを荷物に追従
+        follow = on_task & executed[:, None]
+        follow_b, follow_r = np.nonzero(follow)
+        cargo = np.empty(self.r_coordinate.shape[:1] + (2,))
+        cargo[worlds] = coordinate
+        self._travel(follow_b, follow_r, cargo[follow_b])
+        if not np.all(is_within_range_array(self.r_coordinate[follow_b, follow_r], cargo[follow_b])):
+            raise_with_log(RuntimeError, f"Robot cannot follow the object: {self._tasks[t].name}.")
+        if self.t_kind[t] == KIND_TRANSPORT_MODULE:
+            self.m_coordinate[worlds, self.t_target_module[t]] = coordinate
+
+        v = destination - coordinate
+        left = _norm(v) * self.t_resistance[t]
+        self.t_completed[worlds, t] = self.t_total[t] - left
+        return executed
+
+    def _update_assembly(self, t: int) -> NDArray[np.bool_]:
+        """ Assembly.update: 同じ座標にある不足モジュールを1つ搭載 """
+        r = self.t_target_robot[t]
+        required = self.r_required[r][self.r_required[r] != NO_INDEX]
+        if len(required) == 0:
+            return np.zeros(self._num_worlds, dtype=np.bool_)
+        candidate = ~self.m_mounted[:, required] & self.m_active[:, required] & is_within_range_array(
+            self.m_coordinate[:, required], self.r_coordinate[:, r][:, None, :])
+        executed = candidate.any(axis=1) & (self.t_completed[:, t] < self.t_total[t])
+        worlds = np.nonzero(executed)[0]
+        modules = required[candidate[worlds].argmax(axis=1)]
+        self.r_mounted[worlds, r, self.r_num_mounted[worlds, r]] = modules
+        self.r_num_mounted[worlds, r] += 1
+        self.m_mounted[worlds, modules] = True
+        self._refresh_totals(worlds, np.full(len(worlds), r))
+        self.t_completed[worlds, t] += 1.0
+        return executed
+
+    def _update_robot_state(self) -> None:
+        """ Robot.update_state: 故障・離脱モジュールを外して状態を更新 """
+        world = np.arange(self._num_worlds)[:, None, None]
+        slots = self.r_mounted
+        valid = slots != NO_INDEX
+        module = np.maximum(slots, 0)
+        keep = valid & self.m_active[world, module] & is_within_range_array(
+            self.m_coordinate[world, module], self.r_coordinate[:, :, None, :])
+        removed = valid & ~keep
+        if removed.any():
+            removed_b = np.broadcast_to(world, slots.shape)[removed]
+            self.m_mounted[removed_b, slots[removed]] = False
+            order = np.argsort(~keep, axis=2, kind='stable')
+            self.r_mounted = np.take_along_axis(np.where(keep, slots, NO_INDEX), order, axis=2)
+            self.r_num_mounted = keep.sum(axis=2)
+            self._refresh_totals()
+
+        num_required = np.sum(self.r_required != NO_INDEX, axis=1)
+        sufficient = self.total_battery() > self.r_power
+        self.r_state = np.where(self.r_num_mounted < num_required, ROBOT_DEFECTIVE,
+                                np.where(sufficient, ROBOT_ACTIVE, ROBOT_NO_ENERGY))
+
+    def _sync_module(self, w: int, m: int) -> None:
+        module = self._modules[m]
+        module.restore_state(float(self.m_battery[w, m]), float(self.m_operating_time[w, m]),
+                             ModuleState.ACTIVE if self.m_active[w, m] else ModuleState.ERROR,
+                             (float(self.m_coordinate[w, m, 0]), float(self.m_coordinate[w, m, 1])))
+
+    def synchronize(self, world: int = 0, force: bool = False) -> None:
+        """ 配列の状態をモジュール・ロボット・タスク・エージェントのオブジェクトへ反映 """
+        if not self._dirty and not force:
+            return
+        T = len(self._tasks)
+        for m in range(len(self._modules)):
+            self._sync_module(world, m)
+        for r, robot in enumerate(self._robots):
+            robot.restore_state((float(self.r_coordinate[world, r, 0]), float(self.r_coordinate[world, r, 1])),
+                                ROBOT_STATES[int(self.r_state[world, r])],
+                                [self._modules[m] for m in self.r_mounted[world, r, :self.r_num_mounted[world, r]]])
+        for t, task in enumerate(self._tasks):
+            task.restore_state(float(self.t_completed[world, t]),
+                               (float(self.t_coordinate[world, t, 0]), float(self.t_coordinate[world, t, 1])))
+            task.pending_dependencies = None  # 完了仕事量を書き換えたため依存数の追跡を外す
+            task.release_robot()
+        for station in self._stations:
+            station.release_robot()
+        for r, agent in enumerate(self._agents):
+            index = int(self.a_task[world, r])
+            agent.assigned_task = None if index == NO_INDEX else \
+                self._tasks[index] if index < T else self._stations[index - T]
+            agent.state = AGENT_STATES[int(self.a_state[world, r])]
+            agent.consumed_priority = int(self.a_consumed[world, r])
+            agent.reset_cursor()
+        self._dirty = False
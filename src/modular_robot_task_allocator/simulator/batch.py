@@ -0,0 +1,110 @@
+import copy
+import numpy as np
+from numpy.typing import NDArray
+from modular_robot_task_allocator.core import *
+from modular_robot_task_allocator.simulator.agent import RobotAgent
+from modular_robot_task_allocator.simulator.array_engine import ArrayEngine
+from modular_robot_task_allocator.simulator.snapshot import SimulationSnapshot, capture_scenarios, restore_scenarios
+from modular_robot_task_allocator.utils import raise_with_log
+
+
+class BatchSimulator:
+    """
+    複数の故障シナリオを1回のロックステップで評価するシミュレータ
+    シナリオリストごとに1つのワールドを持ち、全ワールドを ArrayEngine で同時に進める
+    """
+    def __init__(self, tasks: dict[str, BaseTask], robots: dict[str, Robot], task_priorities: dict[str, list[str]],
+                 scenario_sets: list[list[BaseRiskScenario]], simulation_map: SimulationMap):
+        self.tasks = tasks
+        self.agents = {robot.name: RobotAgent(robot, task_priorities[robot.name]) for _, robot in robots.items()}
+        self.simulation_map = simulation_map
+        # 乱数状態を共有しないようにワールドごとにシナリオを複製
+        self.scenario_sets = [[copy.deepcopy(scenario) for scenario in scenarios] for scenarios in scenario_sets]
+        for scenarios in self.scenario_sets:
+            for scenario in scenarios:
+                scenario.initialize()
+        self._engine = ArrayEngine(self.tasks, self.agents, self.simulation_map, self.scenario_sets)
+        check_fleet(robots, self._engine.modules, tasks)  # 不整合のあるワールドはシミュレーション前にまとめて報告
+        for scenarios in self.scenario_sets:
+            for scenario in scenarios:
+                scenario.bind(self._engine.modules)
+        self._current_step = 0
+
+    @property
+    def num_worlds(self) -> int:
+        return self._engine.num_worlds
+
+    @property
+    def current_step(self) -> int:
+        return self._current_step
+
+    def run_simulation(self) -> None:
+        """ 全シナリオを1ステップ進める """
+        self._current_step += 1
+        self._engine.step()
+
+    def advance(self, max_steps: int) -> int:
+        """ 全シナリオで変化のないステップを読み飛ばして最大 max_steps ステップ進める """
+        steps = self._engine.advance(max_steps)
+        self._current_step += steps
+        return steps
+
+    def run(self, max_step: int, event_driven: bool = False) -> None:
+        """ current_step が max_step に達するまで全シナリオを進める """
+        while self._current_step < max_step:
+            if event_driven:
+                self.advance(max_step - self._current_step)
+            else:
+                self.run_simulation()
+
+    def snapshot(self) -> SimulationSnapshot:
+        """ 全シナリオの可変状態を保存 """
+        scenarios = [scenario for scenarios in self.scenario_sets for scenario in scenarios]
+        return SimulationSnapshot(current_step=self._current_step, scenarios=scenarios,
+                                  scenario_states=capture_scenarios(scenarios), engine=self._engine.snapshot())
+
+    def restore(self, snapshot: SimulationSnapshot) -> None:
+        """ snapshot で保存した状態に戻す """
+        if snapshot.engine is None:
+            raise_with_log(ValueError, "Snapshot does not contain array state.")
+        self._current_step = snapshot.current_step
+        restore_scenarios(snapshot.scenarios, snapshot.scenario_states)
+        self._engine.restore(snapshot.engine)
+
+    def set_task_priorities(self, task_priorities: dict[str, list[str]]) -> None:
+        """ エージェントのタスク優先順位を差し替える """
+        for name, agent in self.agents.items():
+            agent.task_priority = task_priorities[name]
+        self._engine.set_task_priorities([agent.task_priority for agent in self.agents.values()])
+
+    def set_world_task_priorities(self, world_priorities: list[dict[str, list[str]]]) -> None:
+        """ シナリオ (ワールド) ごとに異なるタスク優先順位を設定 """
+        converted: dict[int, list[list[str]]] = {}  # 同じ個体のワールドは同じリストを共有
+        for task_priorities in world_priorities:
+            converted.setdefault(id(task_priorities), [task_priorities[name] for name in self.agents])
+        self._engine.set_world_task_priorities([converted[id(task_priorities)] for task_priorities in world_priorities])
+
+    def world_consumed_priorities(self) -> NDArray[np.int64]:
+        """ ワールド×エージェントごとに読み出した優先順位の長さ """
+        return self._engine.a_consumed.copy()
+
+    def consumed_priorities(self) -> dict[str, int]:
+        """ エージェントごとに全シナリオで読み出した優先順位の長さの最大値 """
+        consumed = np.max(self._engine.a_consumed, axis=0)
+        return {name: int(length) for name, length in zip(self.agents, consumed)}
+
+    def synchronize(self, world: int) -> None:
+        """ 指定したシナリオの状態をタスク・ロボット・モジュールのオブジェクトへ反映 """
+        self._engine.synchronize(world=world, force=True)
+
+    def total_remaining_workload(self) -> NDArray[np.float64]:
+        """ シナリオごとの残り仕事量の合計 """
+        return self._engine.total_remaining_workload()
+
+    def variance_remaining_workload(self) -> NDArray[np.float64]:
+        """ シナリオごとのタスク残り仕事量の分散 """
+        return self._engine.variance_remaining_workload()
+
+    def variance_operating_time(self) -> NDArray[np.float64]:
+        """ シナリオごとのモジュール稼働時間の分散 """
+        return self._engine.variance_operating_time()
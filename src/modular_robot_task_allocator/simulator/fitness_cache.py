@@ -0,0 +1,208 @@
+from collections import OrderedDict
+from typing import Any, Optional
+import hashlib, json, logging, sqlite3
+from modular_robot_task_allocator.core import *
+from modular_robot_task_allocator.utils import raise_with_log
+
+logger = logging.getLogger(__name__)
+
+Objectives = tuple[float, float, float]  # (total_remaining_workload, variance_remaining_workload, variance_operating_time)
+
+
+def _digest(obj: Any) -> str:
+    """ JSON 化したオブジェクトの sha256 """
+    return hashlib.sha256(json.dumps(obj, sort_keys=True, separators=(',', ':')).encode()).hexdigest()
+
+def _task_record(task: BaseTask) -> dict[str, Any]:
+    record: dict[str, Any] = {
+        "class": task.__class__.__name__,
+        "coordinate": list(task.coordinate),
+        "total_workload": task.total_workload,
+        "completed_workload": task.completed_workload,
+        "dependency": [dep.name for dep in task.task_dependency],
+    }
+    if isinstance(task, Transport):
+        record["destination"] = list(task.destination_coordinate)
+        record["transport_resistance"] = task.transport_resistance
+    if isinstance(task, TransportModule):
+        record["target_module"] = task.target_module.name
+    if isinstance(task, Assembly):
+        record["target_robot"] = task.target_robot.name
+    if isinstance(task, Charge):
+        record["charging_speed"] = task.charging_speed
+    return record
+
+def world_fingerprint(tasks: dict[str, BaseTask], robots: dict[str, Robot], simulation_map: SimulationMap) -> str:
+    """ 初期ワールド (モジュール・ロボット・タスク・充電ステーション) の指紋 """
+    world = {
+        "robots": {
+            name: {
+                "type": robot.type.name,
+                "performance": {attr.name: value for attr, value in robot.type.performance.items()},
+                "power_consumption": robot.type.power_consumption,
+                "recharge_trigger": robot.type.recharge_trigger,
+                "coordinate": list(robot.coordinate),
+                "mounted": [module.name for module in robot.component_mounted],
+                "modules": [[module.name, module.type.name, module.type.max_battery, list(module.coordinate),
+                             module.battery, module.operating_time, module.state.name]
+                            for module in robot.component_required],
+            } for name, robot in robots.items()
+        },
+        "tasks": {name: _task_record(task) for name, task in tasks.items()},
+        "stations": {name: _task_record(station) for name, station in simulation_map.charge_stations.items()},
+    }
+    return _digest(world)
+
+def scenario_fingerprint(scenario_lists: list[list[BaseRiskScenario]]) -> str:
+    """ 故障シナリオリストの指紋 (乱数状態を除くパラメータ) """
+    return _digest([[{"class": scenario.__class__.__name__,
+                      **{key: value for key, value in vars(scenario).items() if key != "rng" and not key.startswith("_")}}
+                     for scenario in scenarios] for scenarios in scenario_lists])
+
+def evaluation_context(tasks: dict[str, BaseTask], robots: dict[str, Robot], simulation_map: SimulationMap,
+                       scenario_lists: list[list[BaseRiskScenario]], max_step: int, event_driven: bool = False) -> str:
+    """ 目的関数値が同じになる評価条件の指紋 """
+    return _digest({"world": world_fingerprint(tasks, robots, simulation_map),
+                    "scenarios": scenario_fingerprint(scenario_lists),
+                    "max_step": max_step,
+                    "event_driven": event_driven})
+
+def normalize_priorities(task_priorities: dict[str, list[str]]) -> dict[str, list[str]]:
+    """
+    結果に影響しない差を除いた優先順位
+    同じタスクの2回目以降の出現は、最初の出現が完了済みのときしか読まれず常に読み飛ばされるため取り除く
+    """
+    return {name: list(dict.fromkeys(task_priority)) for name, task_priority in sorted(task_priorities.items())}
+
+def _truncate(task_priorities: dict[str, list[str]], consumed: dict[str, int]) -> dict[str, list[Optional[str]]]:
+    """ 読み出した長さまでの接頭辞 (末尾まで読んだ場合は終端 None を含む) """
+    return {name: (list(task_priority) + [None])[:consumed[name]] for name, task_priority in task_priorities.items()}
+
+
+class FitnessCache:
+    """
+    タスク優先順位の候補に対する目的関数値のキャッシュ
+    キーは正規化した優先順位と評価条件 (ワールド・故障シナリオ・ステップ数) の指紋から作る
+    評価時に読み出された優先順位の長さが分かれば、その接頭辞が一致する候補 (未読の部分だけが異なる候補) にも再利用する
+    path を指定すると sqlite に保存し、再実行時にも再利用する
+    ディスクへの書き込みは commit (世代ごとの評価の後など) か close でまとめて確定する
+    """
+    def __init__(self, context: str, max_entries: int = 100000, path: Optional[str] = None, max_patterns: int = 32):
+        if max_entries <= 0:
+            raise_with_log(ValueError, f"Max_entries must be positive: {max_entries}.")
+        self._context = context
+        self._max_entries = max_entries
+        self._max_patterns = max_patterns
+        self._entries: OrderedDict[str, Objectives] = OrderedDict()
+        self._patterns: OrderedDict[str, dict[str, int]] = OrderedDict()  # 読み出し長さの組 (新しいものを末尾)
+        self._hits = 0
+        self._misses = 0
+        self._connection: Optional[sqlite3.Connection] = None
+        if path is not None:
+            self._connection = sqlite3.connect(path)
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS fitness (key TEXT PRIMARY KEY, total REAL, variance_workload REAL, "
+                "variance_operating_time REAL)")
+            self._connection.execute("CREATE TABLE IF NOT EXISTS pattern (context TEXT, consumed TEXT, "
+                                     "PRIMARY KEY (context, consumed))")
+            self._connection.commit()
+            for (consumed,) in self._connection.execute("SELECT consumed FROM pattern WHERE context = ?", (context,)):
+                self._add_pattern(json.loads(consumed))
+
+    @property
+    def hits(self) -> int:
+        return self._hits
+
+    @property
+    def misses(self) -> int:
+        return self._misses
+
+    @property
+    def hit_rate(self) -> float:
+        total = self._hits + self._misses
+        return self._hits / total if total > 0 else 0.0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def key(self, task_priorities: dict[str, list[str]]) -> str:
+        """ 候補の正規化済み優先順位に対するキー """
+        return _digest({"context": self._context, "priorities": normalize_priorities(task_priorities)})
+
+    def _prefix_key(self, task_priorities: dict[str, list[str]], consumed: dict[str, int]) -> str:
+        return _digest({"context": self._context, "prefix": _truncate(normalize_priorities(task_priorities), consumed)})
+
+    def get(self, task_priorities: dict[str, list[str]]) -> Optional[Objectives]:
+        """ キャッシュ済みの目的関数値 (無ければ None) """
+        keys = [self.key(task_priorities)]
+        keys.extend(self._prefix_key(task_priorities, consumed) for consumed in reversed(self._patterns.values())
+                    if set(consumed) == set(task_priorities))
+        for key in keys:
+            objectives = self._lookup(key)
+            if objectives is not None:
+                self._hits += 1
+                return objectives
+        self._misses += 1
+        return None
+
+    def put(self, task_priorities: dict[str, list[str]], objectives: Objectives,
+            consumed: Optional[dict[str, int]] = None) -> None:
+        """
+        目的関数値を登録
+        consumed は normalize_priorities した優先順位で評価したときの読み出し長さ
+        (Simulator.consumed_priorities、複数シナリオではエージェントごとの最大値)
+        """
+        objectives = (float(objectives[0]), float(objectives[1]), float(objectives[2]))
+        self._insert(self.key(task_priorities), objectives)
+        if consumed is None:
+            return
+        self._insert(self._prefix_key(task_priorities, consumed), objectives)
+        if self._add_pattern(consumed) and self._connection is not None:
+            self._connection.execute("INSERT OR IGNORE INTO pattern VALUES (?, ?)",
+                                     (self._context, json.dumps(consumed, sort_keys=True)))
+
+    def _add_pattern(self, consumed: dict[str, int]) -> bool:
+        """ 読み出し長さの組を登録 (新規なら True) """
+        key = json.dumps(consumed, sort_keys=True)
+        is_new = key not in self._patterns
+        self._patterns[key] = dict(consumed)
+        self._patterns.move_to_end(key)
+        while len(self._patterns) > self._max_patterns:
+            self._patterns.popitem(last=False)
+        return is_new
+
+    def _lookup(self, key: str) -> Optional[Objectives]:
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            return self._entries[key]
+        if self._connection is None:
+            return None
+        row = self._connection.execute(
+            "SELECT total, variance_workload, variance_operating_time FROM fitness WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        self._remember(key, tuple(row))
+        return self._entries[key]
+
+    def _insert(self, key: str, objectives: Objectives) -> None:
+        self._remember(key, objectives)
+        if self._connection is not None:
+            self._connection.execute("INSERT OR REPLACE INTO fitness VALUES (?, ?, ?, ?)", (key, *objectives))
+
+    def _remember(self, key: str, objectives: Objectives) -> None:
+        self._entries[key] = objectives
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+    def commit(self) -> None:
+        """ 登録済みの目的関数値をディスクのストアに確定する """
+        if self._connection is not None:
+            self._connection.commit()
+
+    def close(self) -> None:
+        """ 未確定の書き込みを確定してディスクのストアを閉じる """
+        if self._connection is not None:
+            self._connection.commit()
+            self._connection.close()
+            self._connection = None
@@ -0,0 +1,104 @@
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+import logging, os, pickle
+from modular_robot_task_allocator.core import *
+from modular_robot_task_allocator.simulator.simulation import Simulator
+from modular_robot_task_allocator.utils import raise_with_log
+
+logger = logging.getLogger(__name__)
+
+_worker_world: Optional[bytes] = None  # ワーカープロセスが保持するシリアライズ済みワールド
+
+# (タスク優先順位, 故障シナリオ名のリスト, 最大ステップ数, バックエンド, イベント駆動か)
+Job = tuple[dict[str, list[str]], list[str], int, str, bool]
+
+
+def _initialize_worker(world: bytes) -> None:
+    """ ワーカー起動時にワールドを1度だけ受け取る """
+    global _worker_world
+    _worker_world = world
+
+def _simulate(world: bytes, job: Job) -> tuple[float, float, float]:
+    """
+    1つの故障シナリオリストを評価
+    故障は各シナリオ自身の乱数 (シナリオのシード) だけで決まるため、グローバルな乱数状態は使わない
+    """
+    task_priorities, scenario_names, max_step, backend, event_driven = job
+    tasks, robots, simulation_map, risk_scenarios = pickle.loads(world)  # 毎回新しいワールドを復元
+    simulator = Simulator(
+        tasks=tasks,
+        robots=robots,
+        task_priorities=task_priorities,
+        scenarios=[risk_scenarios[scenario_name] for scenario_name in scenario_names],
+        simulation_map=simulation_map,
+        backend=backend,
+        )
+    simulator.run(max_step, event_driven=event_driven)
+    return (simulator.total_remaining_workload(),
+            simulator.variance_remaining_workload(),
+            simulator.variance_operating_time())
+
+def _run_job(job: Job) -> tuple[float, float, float]:
+    """ ワーカープロセスで1つのジョブを評価 """
+    if _worker_world is None:
+        raise_with_log(RuntimeError, "Worker is not initialized.")
+    return _simulate(_worker_world, job)
+
+def _run_jobs(tasks: dict[str, BaseTask], robots: dict[str, Robot], risk_scenarios: dict[str, BaseRiskScenario],
+              simulation_map: SimulationMap, jobs: list[Job], max_workers: Optional[int]) -> list[tuple[float, float, float]]:
+    """
+    ジョブを評価し、目的関数値をジョブと同じ順序で返す
+    max_workers が 1 のときは同一プロセス、それ以外はプロセスプールで並列実行する (None で CPU 数)
+    """
+    for _, scenario_names, max_step, _, _ in jobs:
+        if max_step < 0:
+            raise_with_log(ValueError, f"Max_step must be positive: {max_step}.")
+        for scenario_name in scenario_names:
+            if scenario_name not in risk_scenarios:
+                raise_with_log(ValueError, f"Unknown risk scenario: {scenario_name}.")
+    if len(jobs) == 0:
+        return []
+    world = pickle.dumps((tasks, robots, simulation_map, risk_scenarios), protocol=pickle.HIGHEST_PROTOCOL)
+    workers = (os.cpu_count() or 1) if max_workers is None else max_workers
+    workers = min(workers, len(jobs))
+    if workers <= 1:
+        return [_simulate(world, job) for job in jobs]
+    chunksize = max(1, len(jobs) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_initialize_worker, initargs=(world,)) as executor:
+        return list(executor.map(_run_job, jobs, chunksize=chunksize))
+
+def evaluate_scenarios(tasks: dict[str, BaseTask], robots: dict[str, Robot], task_priorities: dict[str, list[str]],
+                       risk_scenarios: dict[str, BaseRiskScenario], scenario_lists: list[list[str]],
+                       simulation_map: SimulationMap, max_step: int, max_workers: Optional[int] = 1,
+                       backend: str = "object", event_driven: bool = False) -> list[tuple[float, float, float]]:
+    """
+    故障シナリオリストごとにシミュレーションを実行し、目的関数値を入力と同じ順序で返す
+    max_workers が 1 のときは同一プロセス、それ以外はプロセスプールで並列実行する (None で CPU 数)
+
+    :return: [(total_remaining_workload, variance_remaining_workload, variance_operating_time), ...]
+    """
+    jobs = [(task_priorities, list(names), max_step, backend, event_driven) for names in scenario_lists]
+    return _run_jobs(tasks, robots, risk_scenarios, simulation_map, jobs, max_workers)
+
+def evaluate_population(tasks: dict[str, BaseTask], robots: dict[str, Robot], population: list[dict[str, list[str]]],
+                        risk_scenarios: dict[str, BaseRiskScenario], scenario_lists: list[list[str]],
+                        simulation_map: SimulationMap, max_step: int, max_workers: Optional[int] = 1,
+                        backend: str = "object", event_driven: bool = False) -> list[tuple[float, float, float]]:
+    """
+    個体 (タスク優先順位) ごとに全シナリオリストを評価し、シナリオ平均の目的関数値を個体と同じ順序で返す
+    個体×シナリオリストの全ジョブを1つのプロセスプールに分配する
+    """
+    jobs = [(task_priorities, list(names), max_step, backend, event_driven)
+            for task_priorities in population for names in scenario_lists]
+    results = _run_jobs(tasks, robots, risk_scenarios, simulation_map, jobs, max_workers)
+    S = len(scenario_lists)
+    return [aggregate_objectives(results[i * S:(i + 1) * S]) for i in range(len(population))]
+
+def aggregate_objectives(results: list[tuple[float, float, float]]) -> tuple[float, float, float]:
+    """ シナリオごとの目的関数値を平均して集約 """
+    if len(results) == 0:
+        raise_with_log(ValueError, "No evaluation results to aggregate.")
+    total_remaining_workload, variance_remaining_workload, variance_operating_time = zip(*results)
+    return (float(sum(total_remaining_workload) / len(total_remaining_workload)),
+            float(sum(variance_remaining_workload) / len(variance_remaining_workload)),
+            float(sum(variance_operating_time) / len(variance_operating_time)))
@@ -0,0 +1,175 @@
+from collections import OrderedDict
+from typing import Optional
+import logging
+from modular_robot_task_allocator.simulator.simulation import Simulator
+from modular_robot_task_allocator.simulator.snapshot import SimulationSnapshot
+from modular_robot_task_allocator.utils import raise_with_log
+
+logger = logging.getLogger(__name__)
+
+OBJECT_RECORD_BYTES = 200  # オブジェクトバックエンドのスナップショット1レコードあたりの概算サイズ
+RESULT_BYTES = 64  # 目的関数値の概算サイズ
+
+Edge = tuple[tuple[str, tuple[Optional[str], ...]], ...]  # (ロボット名, 区間内に読み出した優先順位) の並び
+
+
+class _PrefixNode:
+    """ トライの節点 (ある時刻までにエージェントが読み出した優先順位の接頭辞に対応) """
+    def __init__(self, parent: Optional["_PrefixNode"], edge: Edge, step: int, consumed: dict[str, int]):
+        self.parent = parent
+        self.edge = edge
+        self.step = step
+        self.consumed = consumed
+        self.children: list[_PrefixNode] = []
+        self.snapshot: Optional[SimulationSnapshot] = None
+        self.objectives: Optional[tuple[float, float, float]] = None
+        self.nbytes = 0
+
+    def matches(self, sequences: dict[str, list[Optional[str]]]) -> bool:
+        """ 候補の優先順位がこの節点までの読み出し内容と一致するか """
+        if self.parent is None:
+            return True
+        for name, names in self.edge:
+            start = self.parent.consumed[name]
+            if tuple(sequences[name][start:start + len(names)]) != names:
+                return False
+        return True
+
+
+def _snapshot_nbytes(snapshot: SimulationSnapshot) -> int:
+    """ スナップショットの概算メモリ量 """
+    if snapshot.engine is not None:
+        return sum(array.nbytes for array in snapshot.engine.values())
+    return OBJECT_RECORD_BYTES * (len(snapshot.modules) + len(snapshot.robots) + len(snapshot.tasks) + len(snapshot.agents))
+
+
+class PrefixCache:
+    """
+    タスク優先順位の接頭辞を共有するシミュレーション状態のキャッシュ
+    軌道は各エージェントが RobotAgent.update_task で読み出した優先順位の接頭辞だけで決まるため、
+    interval ステップごとの状態を読み出した接頭辞をキーとするトライに保存し、
+    新しい候補は一致する最も深い状態から再開する
+    """
+    def __init__(self, simulator: Simulator, max_step: int, interval: int = 10, max_bytes: int = 256 * 2**20,
+                 event_driven: bool = False):
+        if max_step < simulator.current_step:
+            raise_with_log(ValueError, f"Max_step must be at least the current step: {max_step}.")
+        if interval <= 0:
+            raise_with_log(ValueError, f"Interval must be positive: {interval}.")
+        if event_driven and simulator.backend != "array":
+            raise_with_log(ValueError, "Event-driven simulation requires the array backend.")
+        self._simulator = simulator
+        self._max_step = max_step
+        self._interval = interval
+        self._max_bytes = max_bytes
+        self._event_driven = event_driven
+        self._root = _PrefixNode(None, (), simulator.current_step, simulator.consumed_priorities())
+        self._root.snapshot = simulator.snapshot()  # 根の状態は削除しない
+        self._lru: OrderedDict[int, _PrefixNode] = OrderedDict()
+        self._nbytes = 0
+        self._stats = {"evaluations": 0, "hits": 0, "resumed_steps": 0, "simulated_steps": 0, "evictions": 0}
+
+    @property
+    def nbytes(self) -> int:
+        return self._nbytes
+
+    @property
+    def stats(self) -> dict[str, int]:
+        return dict(self._stats)
+
+    def clear(self) -> None:
+        """ 根以外の全状態を破棄 """
+        self._root.children = []
+        self._lru.clear()
+        self._nbytes = 0
+
+    def evaluate(self, task_priorities: dict[str, list[str]]) -> tuple[float, float, float]:
+        """
+        候補の優先順位で max_step までシミュレーションし、目的関数値を返す
+        :return: (total_remaining_workload, variance_remaining_workload, variance_operating_time)
+        """
+        self._stats["evaluations"] += 1
+        sequences: dict[str, list[Optional[str]]] = {
+            name: list(task_priorities[name]) + [None] for name in self._simulator.agents}  # None は末尾まで読んだ印
+        node, resume = self._match(sequences)
+        if node.objectives is not None:
+            self._stats["hits"] += 1
+            self._touch(node)
+            return node.objectives
+
+        simulator = self._simulator
+        simulator.restore(resume.snapshot)
+        simulator.set_task_priorities(task_priorities)
+        self._stats["resumed_steps"] += resume.step - self._root.step
+        self._touch(resume)
+        current = resume
+        while simulator.current_step < self._max_step:
+            target = min(current.step + self._interval, self._max_step)
+            self._stats["simulated_steps"] += target - simulator.current_step
+            self._run_until(target)
+            current = self._child(current, sequences, simulator.consumed_priorities(), target)
+            if target < self._max_step and current.snapshot is None:
+                current.snapshot = simulator.snapshot()
+                self._store(current, _snapshot_nbytes(current.snapshot))
+
+        current.objectives = (simulator.total_remaining_workload(),
+                              simulator.variance_remaining_workload(),
+                              simulator.variance_operating_time())
+        self._store(current, RESULT_BYTES)
+        return current.objectives
+
+    def _run_until(self, step: int) -> None:
+        simulator = self._simulator
+        if self._event_driven:
+            while simulator.current_step < step:
+                simulator.advance(step - simulator.current_step)
+        else:
+            simulator.run(step)
+
+    def _match(self, sequences: dict[str, list[Optional[str]]]) -> tuple[_PrefixNode, _PrefixNode]:
+        """ 一致する最も深い節点と、その経路上で状態を保持する最も深い節点 """
+        node, resume = self._root, self._root
+        while True:
+            child = next((child for child in node.children if child.matches(sequences)), None)
+            if child is None:
+                return node, resume
+            node = child
+            if node.snapshot is not None:
+                resume = node
+
+    def _child(self, node: _PrefixNode, sequences: dict[str, list[Optional[str]]], consumed: dict[str, int],
+               step: int) -> _PrefixNode:
+        """ 区間内に読み出した優先順位を辺とする子節点 (無ければ作成) """
+        edge = tuple((name, tuple(sequences[name][node.consumed[name]:consumed[name]]))
+                     for name in consumed if consumed[name] > node.consumed[name])
+        for child in node.children:
+            if child.edge == edge:
+                return child
+        child = _PrefixNode(node, edge, step, consumed)
+        node.children.append(child)
+        return child
+
+    def _touch(self, node: _PrefixNode) -> None:
+        if id(node) in self._lru:
+            self._lru.move_to_end(id(node))
+
+    def _store(self, node: _PrefixNode, nbytes: int) -> None:
+        """ 節点の保持量を加算し、上限を超えたら最も古い節点から破棄 """
+        if node is self._root:
+            return
+        node.nbytes += nbytes
+        self._nbytes += nbytes
+        self._lru[id(node)] = node
+        self._lru.move_to_end(id(node))
+        while self._nbytes > self._max_bytes and len(self._lru) > 1:
+            _, evicted = self._lru.popitem(last=False)
+            self._evict(evicted)
+
+    def _evict(self, node: _PrefixNode) -> None:
+        """ 節点の状態を破棄し、不要になった節点をトライから外す """
+        self._stats["evictions"] += 1
+        self._nbytes -= node.nbytes
+        node.snapshot, node.objectives, node.nbytes = None, None, 0
+        while node.parent is not None and not node.children and node.nbytes == 0:
+            node.parent.children.remove(node)
+            node = node.parent
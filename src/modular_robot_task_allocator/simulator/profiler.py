@@ -0,0 +1,137 @@
+from dataclasses import dataclass, field, asdict
+from time import perf_counter
+from typing import Any, Callable, Optional
+import logging
+from modular_robot_task_allocator.utils import raise_with_log
+
+logger = logging.getLogger(__name__)
+
+# Simulator.run_simulation のフェーズ (配列バックエンドは engine_step / engine_advance のみ)
+INACTIVE_CHECK = "inactive_check"
+RECHARGE_DECISION = "recharge_decision"
+TASK_UPDATE = "task_update"
+TRAVEL_READY = "travel_ready"
+TASK_EXECUTION = "task_execution"
+CHARGING = "charging"
+STATE_RESET = "state_reset"
+RECORDING = "recording"
+ENGINE_STEP = "engine_step"
+ENGINE_ADVANCE = "engine_advance"
+PHASES = (INACTIVE_CHECK, RECHARGE_DECISION, TASK_UPDATE, TRAVEL_READY, TASK_EXECUTION, CHARGING, STATE_RESET,
+          RECORDING, ENGINE_STEP, ENGINE_ADVANCE)
+
+
+@dataclass
+class PhaseStats:
+    """
+    フェーズ (またはタスククラス) ごとの累積時間と計測回数
+    calls はフェーズを含むステップ数 (step_finished の回数)、laps は lap で計測した区間の数
+    (エージェントごと・タスクごとに計測するフェーズは1ステップに複数の区間を持つ)
+    """
+    calls: int = 0
+    total_time: float = 0.0  # 秒
+    laps: int = 0
+
+    @property
+    def mean_time(self) -> float:
+        return self.total_time / self.calls if self.calls > 0 else 0.0
+
+
+@dataclass
+class ProfileReport:
+    """ PhaseProfiler の集計結果 """
+    steps: int
+    phases: dict[str, PhaseStats] = field(default_factory=dict)
+    task_classes: dict[str, PhaseStats] = field(default_factory=dict)  # task_execution の内訳
+
+    @property
+    def total_time(self) -> float:
+        return sum(stats.total_time for stats in self.phases.values())
+
+    def as_dict(self) -> dict[str, Any]:
+        """ JSON 化できる辞書 """
+        return {"steps": self.steps, "total_time": self.total_time,
+                "phases": {name: asdict(stats) for name, stats in self.phases.items()},
+                "task_classes": {name: asdict(stats) for name, stats in self.task_classes.items()}}
+
+    def __str__(self) -> str:
+        total = self.total_time
+        lines = [f"{self.steps} steps, {total:.6f} s"]
+        for title, table in (("phase", self.phases), ("task class", self.task_classes)):
+            for name, stats in table.items():
+                share = stats.total_time / total if total > 0 else 0.0
+                lines.append(f"  {title:10} {name:18} {stats.total_time:12.6f} s {share:7.1%} {stats.calls:10} calls "
+                             f"{stats.laps:10} laps {stats.mean_time * 1e6:10.2f} us/call")
+        return "\n".join(lines)
+
+
+class PhaseProfiler:
+    """
+    シミュレーションループのフェーズごとの計測
+    Simulator.attach_profiler で登録したときだけ計測し、未登録時のループは None の判定のみ
+    lap は前回の mark / lap からの経過時間をフェーズに加算するため、区間の境界ごとに1回だけ時計を読む
+    report_interval を指定すると、その ステップ数ごとに callback (既定はログ出力) へ集計結果を渡す
+    """
+    def __init__(self, report_interval: Optional[int] = None,
+                 callback: Optional[Callable[[ProfileReport], None]] = None):
+        if report_interval is not None and report_interval <= 0:
+            raise_with_log(ValueError, f"Report_interval must be positive: {report_interval}.")
+        self._report_interval = report_interval
+        self._callback = callback if callback is not None else (lambda report: logger.info(f"Profile: {report}"))
+        self.reset()
+
+    def reset(self) -> None:
+        """ 集計を消去 """
+        self._phases: dict[str, PhaseStats] = {}
+        self._task_classes: dict[str, PhaseStats] = {}
+        self._touched: set[str] = set()  # 現在のステップで計測したフェーズ
+        self._touched_classes: set[str] = set()
+        self._steps = 0
+        self._last = perf_counter()
+
+    def mark(self) -> None:
+        """ 計測区間の始点を現在時刻にする """
+        self._last = perf_counter()
+
+    def lap(self, phase: str, task_class: Optional[str] = None) -> None:
+        """ 前回の始点からの経過時間を phase (と task_class) に加算し、始点を現在時刻にする """
+        now = perf_counter()
+        elapsed = now - self._last
+        self._last = now
+        stats = self._phases.get(phase)
+        if stats is None:
+            stats = self._phases[phase] = PhaseStats()
+        stats.laps += 1
+        stats.total_time += elapsed
+        self._touched.add(phase)
+        if task_class is not None:
+            stats = self._task_classes.get(task_class)
+            if stats is None:
+                stats = self._task_classes[task_class] = PhaseStats()
+            stats.laps += 1
+            stats.total_time += elapsed
+            self._touched_classes.add(task_class)
+
+    def step_finished(self, steps: int = 1) -> None:
+        """ steps ステップ分の計測を終え、報告周期に達していれば集計結果を渡す """
+        for phase in self._touched:
+            self._phases[phase].calls += 1
+        for task_class in self._touched_classes:
+            self._task_classes[task_class].calls += 1
+        self._touched.clear()
+        self._touched_classes.clear()
+        before = self._steps
+        self._steps += steps
+        if self._report_interval is not None and self._steps // self._report_interval > before // self._report_interval:
+            self._callback(self.report())
+
+    def report(self) -> ProfileReport:
+        """ 現在までの集計結果 (フェーズは PHASES の順) """
+        order = {name: i for i, name in enumerate(PHASES)}
+        return ProfileReport(
+            steps=self._steps,
+            phases={name: PhaseStats(stats.calls, stats.total_time, stats.laps)
+                    for name, stats in sorted(self._phases.items(), key=lambda item: order.get(item[0], len(order)))},
+            task_classes={name: PhaseStats(stats.calls, stats.total_time, stats.laps)
+                          for name, stats in sorted(self._task_classes.items())},
+        )
@@ -0,0 +1,78 @@
+from typing import Iterator, Optional
+import heapq, logging
+from modular_robot_task_allocator.core import *
+from modular_robot_task_allocator.utils import raise_with_log
+
+logger = logging.getLogger(__name__)
+
+
+class DependencyTracker:
+    """
+    タスク依存関係の解消状況を増分更新で追跡する
+    タスクごとに未完了の依存タスク数を保持し、タスクが完了したときに依存元の数を減らすため、
+    依存が解消済みか (BaseTask.are_dependencies_completed) の判定は O(1) になる
+    未完了の依存数は各タスクの pending_dependencies に書き込む (追跡をやめると None に戻す)
+    """
+    def __init__(self, tasks: dict[str, BaseTask]):
+        self._tasks = list(tasks.values())
+        self._index = {id(task): i for i, task in enumerate(self._tasks)}
+        self._dependents: list[list[int]] = [[] for _ in self._tasks]  # 依存元のタスク番号 (依存リストの重複も数える)
+        for i, task in enumerate(self._tasks):
+            for dependency in task.task_dependency:
+                if id(dependency) in self._index:
+                    self._dependents[self._index[id(dependency)]].append(i)
+        self._completed = [False] * len(self._tasks)
+        self._ready: set[int] = set()  # 依存が解消済みで未完了のタスク番号
+        self._iterating: Optional[tuple[list[int], int]] = None  # 走査中のヒープと現在のタスク番号
+        self.rebuild()
+
+    def rebuild(self) -> None:
+        """ 現在の完了仕事量から追跡状態を作り直す (スナップショットの復元後などに呼ぶ) """
+        for i, task in enumerate(self._tasks):
+            self._completed[i] = task.is_completed()
+            task.pending_dependencies = sum(1 for dependency in task.task_dependency if not dependency.is_completed())
+        self._ready = {i for i, task in enumerate(self._tasks)
+                       if not self._completed[i] and task.pending_dependencies == 0}
+
+    def detach(self) -> None:
+        """ 追跡をやめ、タスクの依存判定を依存リストの走査に戻す """
+        for task in self._tasks:
+            task.pending_dependencies = None
+
+    def is_ready(self, task: BaseTask) -> bool:
+        """ 依存が解消済みで未完了か """
+        return self._index[id(task)] in self._ready
+
+    def ready_tasks(self) -> Iterator[BaseTask]:
+        """
+        依存が解消済みで未完了のタスクを登録順に返す
+        走査中に mark_completed で依存が解消したタスクも、現在のタスクより後ろなら同じ走査で返す
+        (全タスクを登録順に更新していたときと同じ順序・同じステップで実行される)
+        """
+        if self._iterating is not None:
+            raise_with_log(RuntimeError, "Ready_tasks is already being iterated.")
+        heap = sorted(self._ready)
+        try:
+            while heap:
+                i = heapq.heappop(heap)
+                if i not in self._ready:
+                    continue
+                self._iterating = (heap, i)
+                yield self._tasks[i]
+        finally:
+            self._iterating = None
+
+    def mark_completed(self, task: BaseTask) -> None:
+        """ 仕事量が更新されたタスクを確認し、完了していれば依存元の未完了数を減らす """
+        i = self._index[id(task)]
+        if self._completed[i] or not task.is_completed():
+            return
+        self._completed[i] = True
+        self._ready.discard(i)
+        for j in self._dependents[i]:
+            dependent = self._tasks[j]
+            dependent.pending_dependencies -= 1
+            if dependent.pending_dependencies == 0 and not self._completed[j]:
+                self._ready.add(j)
+                if self._iterating is not None and j > self._iterating[1]:
+                    heapq.heappush(self._iterating[0], j)
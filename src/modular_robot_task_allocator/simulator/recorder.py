@@ -0,0 +1,202 @@
+from typing import Any, Optional, TYPE_CHECKING
+from numpy.typing import NDArray
+import json, logging, os
+import numpy as np
+from modular_robot_task_allocator.core import *
+from modular_robot_task_allocator.simulator.array_engine import NO_INDEX
+from modular_robot_task_allocator.utils import raise_with_log
+
+if TYPE_CHECKING:
+    from modular_robot_task_allocator.simulator.simulation import Simulator
+
+logger = logging.getLogger(__name__)
+
+META_FILE = "meta.json"
+# 列名 → (型, 対象のエンティティ, 1エンティティあたりの形)
+COLUMNS: dict[str, tuple[str, Optional[str], tuple[int, ...]]] = {
+    "step": ("<i8", None, ()),
+    "robot_coordinate": ("<f8", "robot", (2,)),
+    "robot_battery": ("<f8", "robot", ()),
+    "module_state": ("i1", "module", ()),  # ModuleState の値の番号
+    "agent_state": ("i1", "robot", ()),  # AgentState の値の番号
+    "task_completed_workload": ("<f8", "task", ()),
+    "assignment": ("<i8", "robot", ()),  # タスク番号 (充電ステーションはタスク数 + ステーション番号、未割り当ては -1)
+}
+MODULE_ACTIVE = ModuleState.ACTIVE.value[0]
+MODULE_ERROR = ModuleState.ERROR.value[0]
+
+
+class TrajectoryRecorder:
+    """
+    シミュレーションの軌跡をステップごとに列形式で記録する
+    事前に確保した chunk_size ステップ分のバッファに書き込み、満杯になるたびに列ごとのファイルへ追記する
+    記録したファイルは TrajectoryReader でメモリマップして読み出す
+    """
+    def __init__(self, directory: str, chunk_size: int = 1024):
+        if chunk_size <= 0:
+            raise_with_log(ValueError, f"Chunk_size must be positive: {chunk_size}.")
+        self._directory = directory
+        self._chunk_size = chunk_size
+        self._meta: Optional[dict[str, Any]] = None
+        self._buffers: dict[str, NDArray[Any]] = {}
+        self._filled = 0  # バッファに書き込んだステップ数
+        self._num_steps = 0  # ファイルに書き出したステップ数
+        self._task_index: dict[int, int] = {}
+        self._modules: list[Module] = []
+
+    @property
+    def num_steps(self) -> int:
+        """ 記録したステップ数 (未書き出しの分を含む) """
+        return self._num_steps + self._filled
+
+    def start(self, simulator: "Simulator") -> None:
+        """ 記録対象のエンティティを確定し、ディレクトリを初期化する """
+        if self._meta is not None:
+            raise_with_log(RuntimeError, f"Recorder is already started: {self._directory}.")
+        stations = list(simulator.simulation_map.charge_stations.values())
+        tasks = list(simulator.tasks.values())
+        self._task_index = {id(task): t for t, task in enumerate(tasks + stations)}
+        self._modules = simulator.modules
+        counts = {"robot": len(simulator.agents), "module": len(self._modules), "task": len(tasks)}
+        self._meta = {
+            "names": {
+                "robot": list(simulator.agents),
+                "module": [module.name for module in self._modules],
+                "task": list(simulator.tasks),
+                "station": list(simulator.simulation_map.charge_stations),
+            },
+            "columns": {name: {"dtype": dtype, "entity": entity,
+                               "shape": ([counts[entity]] if entity is not None else []) + list(shape)}
+                        for name, (dtype, entity, shape) in COLUMNS.items()},
+            "num_steps": 0,
+        }
+        self._buffers = {name: np.zeros([self._chunk_size] + spec["shape"], dtype=spec["dtype"])
+                         for name, spec in self._meta["columns"].items()}
+        os.makedirs(self._directory, exist_ok=True)
+        for name in COLUMNS:
+            open(os.path.join(self._directory, f"{name}.bin"), 'wb').close()
+        self._write_meta()
+
+    def record(self, simulator: "Simulator") -> None:
+        """ 現在の状態を1ステップ分記録 (配列バックエンドはオブジェクトへ反映せず配列から読む) """
+        if self._meta is None:
+            raise_with_log(RuntimeError, "Recorder is not started.")
+        i = self._filled
+        self._buffers["step"][i] = simulator.current_step
+        engine = simulator.engine
+        if engine is not None:
+            self._buffers["robot_coordinate"][i] = engine.r_coordinate[0]
+            self._buffers["robot_battery"][i] = engine.total_battery()[0]
+            self._buffers["module_state"][i] = np.where(engine.m_active[0], MODULE_ACTIVE, MODULE_ERROR)
+            self._buffers["agent_state"][i] = engine.a_state[0]
+            self._buffers["task_completed_workload"][i] = engine.t_completed[0]
+            self._buffers["assignment"][i] = engine.a_task[0]
+        else:
+            agents = simulator.agents.values()
+            self._buffers["robot_coordinate"][i] = [agent.robot.coordinate for agent in agents]
+            self._buffers["robot_battery"][i] = [agent.robot.total_battery() for agent in agents]
+            self._buffers["module_state"][i] = [module.state.value[0] for module in self._modules]
+            self._buffers["agent_state"][i] = [agent.state.value[0] for agent in agents]
+            self._buffers["task_completed_workload"][i] = [task.completed_workload for task in simulator.tasks.values()]
+            self._buffers["assignment"][i] = [NO_INDEX if agent.assigned_task is None else
+                                              self._task_index[id(agent.assigned_task)] for agent in agents]
+        self._filled += 1
+        if self._filled == self._chunk_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """ バッファに溜まったステップを列ごとのファイルへ追記 """
+        if self._meta is None or self._filled == 0:
+            return
+        for name, buffer in self._buffers.items():
+            with open(os.path.join(self._directory, f"{name}.bin"), 'ab') as f:
+                f.write(buffer[:self._filled].tobytes())
+        self._num_steps += self._filled
+        self._filled = 0
+        self._write_meta()
+
+    def close(self) -> None:
+        """ 残りを書き出して記録を終える """
+        self.flush()
+        self._buffers = {}
+        self._meta = None
+
+    def _write_meta(self) -> None:
+        """ ステップ数を含むメタデータを書き出す (途中で中断しても書き出し済みのステップは読める) """
+        assert self._meta is not None
+        self._meta["num_steps"] = self._num_steps
+        path = os.path.join(self._directory, META_FILE)
+        with open(path + ".tmp", 'w') as f:
+            json.dump(self._meta, f)
+        os.replace(path + ".tmp", path)
+
+
+class TrajectoryReader:
+    """
+    TrajectoryRecorder で記録した軌跡
+    列はファイルをメモリマップした (ステップ, エンティティ, ...) 形の読み取り専用の配列として返すため、
+    ステップやエンティティで切り出しても必要な部分しか読み込まない
+    """
+    def __init__(self, directory: str):
+        try:
+            with open(os.path.join(directory, META_FILE), 'r') as f:
+                self._meta = json.load(f)
+        except FileNotFoundError as e:
+            raise_with_log(FileNotFoundError, f"File not found: {e}.")
+        self._directory = directory
+        self._columns: dict[str, NDArray[Any]] = {}
+
+    @property
+    def num_steps(self) -> int:
+        return self._meta["num_steps"]
+
+    @property
+    def names(self) -> dict[str, list[str]]:
+        """ 種類 (robot, module, task, station) ごとの名前 (列のエンティティ軸の並び) """
+        return self._meta["names"]
+
+    @property
+    def column_names(self) -> list[str]:
+        return list(self._meta["columns"])
+
+    def column(self, name: str) -> NDArray[Any]:
+        """ 列全体 (先頭軸がステップ) """
+        if name not in self._columns:
+            spec = self._meta["columns"].get(name)
+            if spec is None:
+                raise_with_log(KeyError, f"Unknown column: {name}.")
+            shape = tuple([self.num_steps] + spec["shape"])
+            if self.num_steps == 0:
+                self._columns[name] = np.zeros(shape, dtype=spec["dtype"])
+            else:
+                self._columns[name] = np.memmap(os.path.join(self._directory, f"{name}.bin"), dtype=spec["dtype"],
+                                                mode='r', shape=shape)
+        return self._columns[name]
+
+    def row(self, step: int) -> int:
+        """
+        step 時点以前で最後に記録した行番号
+        イベント駆動 (Simulator.advance) では読み飛ばしたステップの途中状態は記録されないため直前の行を返す
+        """
+        row = int(np.searchsorted(self.column("step"), step, side='right')) - 1
+        if row < 0:
+            raise_with_log(ValueError, f"No record at or before step {step}.")
+        return row
+
+    def at_step(self, step: int) -> dict[str, NDArray[Any]]:
+        """ step 時点の全列の値 """
+        row = self.row(step)
+        return {name: np.asarray(self.column(name)[row]) for name in self._meta["columns"]}
+
+    def series(self, column: str, name: str) -> NDArray[Any]:
+        """ 1エンティティ (ロボット・モジュール・タスク名) の列の時系列 """
+        if column not in self._meta["columns"]:
+            raise_with_log(KeyError, f"Unknown column: {column}.")
+        entity = self._meta["columns"][column]["entity"]
+        if entity is None:
+            raise_with_log(ValueError, f"Column {column} is not per entity.")
+        try:
+            index = self.names[entity].index(name)
+        except ValueError:
+            raise_with_log(KeyError, f"Unknown {entity}: {name}.")
+        return self.column(column)[:, index]
@@ -1,60 +1,269 @@
+from typing import Optional
 import numpy as np
-from modutask.core import *
-from modutask.simulator.agent import RobotAgent
+from modular_robot_task_allocator.core import *
+from modular_robot_task_allocator.simulator.agent import RobotAgent
+from modular_robot_task_allocator.simulator.array_engine import ArrayEngine
+from modular_robot_task_allocator.simulator.profiler import (
+    PhaseProfiler, INACTIVE_CHECK, RECHARGE_DECISION, TASK_UPDATE, TRAVEL_READY, TASK_EXECUTION, CHARGING, STATE_RESET,
+    RECORDING, ENGINE_STEP, ENGINE_ADVANCE)
+from modular_robot_task_allocator.simulator.readiness import DependencyTracker
+from modular_robot_task_allocator.simulator.recorder import TrajectoryRecorder
+from modular_robot_task_allocator.simulator.snapshot import (
+    SimulationSnapshot, capture_objects, capture_scenarios, restore_objects, restore_scenarios)
+from modular_robot_task_allocator.utils import raise_with_log
+
+BACKENDS = ("object", "array")  # object: オブジェクトを逐次更新, array: 構造体配列をベクトル演算で更新
 
 
 class Simulator:
-    def __init__(self, tasks: dict[str, BaseTask], robots: dict[str, Robot], task_priorities: dict[str, list[str]], 
-                 scenarios: list[BaseRiskScenario], simulation_map: SimulationMap):
+    def __init__(self, tasks: dict[str, BaseTask], robots: dict[str, Robot], task_priorities: dict[str, list[str]],
+                 scenarios: list[BaseRiskScenario], simulation_map: SimulationMap, backend: str = "object"):
+        if backend not in BACKENDS:
+            raise_with_log(ValueError, f"Unknown backend: {backend}. Expected one of {BACKENDS}.")
         self.tasks = tasks
         self.agents = {robot.name: RobotAgent(robot, task_priorities[robot.name]) for _, robot in robots.items()}
         self.simulation_map = simulation_map
         self.scenarios = scenarios
+        modules = self.modules
+        check_fleet(robots, modules, tasks)  # 不整合のあるワールドはシミュレーション前にまとめて報告
         for scenario in self.scenarios:
             scenario.initialize()
+            scenario.bind(modules)
+        self.backend = backend
+        self._current_step = 0
+        self._engine = None
+        self._tracker = None
+        self._recorder: Optional[TrajectoryRecorder] = None
+        self._profiler: Optional[PhaseProfiler] = None
+        if backend == "array":
+            self._engine = ArrayEngine(self.tasks, self.agents, self.simulation_map, [self.scenarios])
+        else:
+            self._tracker = DependencyTracker(self.tasks)  # 依存が解消済みのタスクのみを更新する
+
+    @property
+    def current_step(self) -> int:
+        return self._current_step
+
+    @property
+    def engine(self) -> Optional[ArrayEngine]:
+        """ 配列バックエンドのエンジン (オブジェクトバックエンドでは None) """
+        return self._engine
+
+    def attach_recorder(self, recorder: TrajectoryRecorder) -> None:
+        """ 軌跡の記録を開始する (現在の状態を記録し、以降は各ステップの終わりに記録) """
+        recorder.start(self)
+        recorder.record(self)
+        self._recorder = recorder
+
+    def detach_recorder(self) -> Optional[TrajectoryRecorder]:
+        """ 軌跡の記録を終え、残りをファイルへ書き出す """
+        recorder, self._recorder = self._recorder, None
+        if recorder is not None:
+            recorder.close()
+        return recorder
+
+    def attach_profiler(self, profiler: PhaseProfiler) -> None:
+        """ フェーズごとの計測を開始する (集計結果は profiler.report で取得) """
+        self._profiler = profiler
+
+    def detach_profiler(self) -> Optional[PhaseProfiler]:
+        """ フェーズごとの計測を終える """
+        profiler, self._profiler = self._profiler, None
+        return profiler
+
+    def set_task_priorities(self, task_priorities: dict[str, list[str]]) -> None:
+        """ エージェントのタスク優先順位を差し替える (restore と組み合わせて同じワールドで別の解を評価) """
+        for name, agent in self.agents.items():
+            agent.task_priority = task_priorities[name]
+        if self._engine is not None:
+            self._engine.set_task_priorities([agent.task_priority for agent in self.agents.values()])
+
+    def consumed_priorities(self) -> dict[str, int]:
+        """ エージェントごとにこれまで読み出した優先順位の長さ (末尾まで読んだ場合は長さ+1) """
+        if self._engine is not None:
+            return {name: int(consumed) for name, consumed in zip(self.agents, self._engine.a_consumed[0])}
+        return {name: agent.consumed_priority for name, agent in self.agents.items()}
+
+    def set_scenarios(self, scenarios: list[BaseRiskScenario]) -> None:
+        """ 故障シナリオを差し替える (未初期化のシナリオは初期化し、現在のモジュールの状態を初期状態として登録する) """
+        modules = self.modules
+        for scenario in scenarios:
+            if scenario.rng is None:
+                scenario.initialize()
+            scenario.bind(modules)
+        self.scenarios = scenarios
+        if self._engine is not None:
+            self._engine.set_scenarios([self.scenarios])
+
+    def snapshot(self) -> SimulationSnapshot:
+        """ 可変状態 (バッテリー・稼働時間・状態・座標・完了仕事量・搭載モジュール・乱数状態) のみを保存 """
+        snapshot = SimulationSnapshot(current_step=self._current_step, scenarios=list(self.scenarios),
+                                      scenario_states=capture_scenarios(self.scenarios))
+        if self._engine is not None:
+            snapshot.engine = self._engine.snapshot()
+        else:
+            capture_objects(snapshot, self.modules, list(self.agents.values()), list(self.tasks.values()))
+        return snapshot
+
+    def restore(self, snapshot: SimulationSnapshot) -> None:
+        """ snapshot で保存した状態に戻す (同じスナップショットから何度でも復元可能) """
+        if (snapshot.engine is None) != (self._engine is None):
+            raise_with_log(ValueError, f"Snapshot was taken with a different backend: {self.backend}.")
+        self._current_step = snapshot.current_step
+        self.scenarios = list(snapshot.scenarios)
+        restore_scenarios(self.scenarios, snapshot.scenario_states)
+        if self._engine is not None:
+            self._engine.set_scenarios([self.scenarios])
+            self._engine.restore(snapshot.engine)
+            return
+        restore_objects(snapshot, self.modules, list(self.agents.values()), list(self.tasks.values()))
+        for station in self.simulation_map.charge_stations.values():
+            station.release_robot()
+        self._tracker.rebuild()
+
+    @property
+    def modules(self) -> list[Module]:
+        """ シミュレーション対象の全モジュール (ロボット順・重複なし) """
+        modules = {}
+        for agent in self.agents.values():
+            for module in agent.robot.component_required:
+                modules[id(module)] = module
+        for task in self.tasks.values():
+            if isinstance(task, TransportModule):
+                modules[id(task.target_module)] = task.target_module
+        return list(modules.values())
+
+    def total_remaining_workload(self) -> float:
+        """ 全タスクの残り仕事量の合計 """
+        if self._engine is not None:
+            return float(self._engine.total_remaining_workload()[0])
+        remaining = np.array([task.total_workload - task.completed_workload for task in self.tasks.values()])
+        return float(np.sum(remaining))
+
+    def variance_remaining_workload(self) -> float:
+        """ タスクごとの残り仕事量の分散 """
+        if self._engine is not None:
+            return float(self._engine.variance_remaining_workload()[0])
+        remaining = np.array([task.total_workload - task.completed_workload for task in self.tasks.values()])
+        return float(np.var(remaining))
+
+    def variance_operating_time(self) -> float:
+        """ モジュールの稼働時間の分散 """
+        if self._engine is not None:
+            return float(self._engine.variance_operating_time()[0])
+        return float(np.var(np.array([module.operating_time for module in self.modules])))
+
+    def synchronize(self):
+        """ 配列バックエンドの状態をタスク・ロボット・モジュールのオブジェクトへ反映 """
+        if self._engine is not None:
+            self._engine.synchronize()
+
+    def run(self, max_step: int, event_driven: bool = False) -> None:
+        """
+        current_step が max_step に達するまでシミュレーションを進める
+        event_driven が True のとき変化のないステップを読み飛ばす (配列バックエンドのみ)
+        """
+        if event_driven and self._engine is None:
+            raise_with_log(ValueError, "Event-driven simulation requires the array backend.")
+        while self._current_step < max_step:
+            if event_driven:
+                self.advance(max_step - self._current_step)
+            else:
+                self.run_simulation()
+
+    def advance(self, max_steps: int) -> int:
+        """
+        次のイベント (到着・充電判断・満充電・タスク完了・依存解消・故障) の直前まで最大 max_steps ステップ進める
+        配列バックエンドのみ
+        :return: 進めたステップ数
+        """
+        if self._engine is None:
+            raise_with_log(ValueError, "Event-driven simulation requires the array backend.")
+        if max_steps <= 0:
+            return 0
+        profiler = self._profiler
+        if profiler is not None:
+            profiler.mark()
+        steps = self._engine.advance(max_steps)
+        self._current_step += steps
+        if profiler is not None:
+            profiler.lap(ENGINE_ADVANCE)
+        if self._recorder is not None:
+            self._recorder.record(self)
+            if profiler is not None:
+                profiler.lap(RECORDING)
+        if profiler is not None:
+            profiler.step_finished(steps)
+        return steps
 
     def run_simulation(self):
+        self._current_step += 1
+        # 計測時のみ各区間の終わりで lap を呼ぶ (未計測時は None の判定のみ)
+        profiler = self._profiler
+        lap = None
+        if profiler is not None:
+            profiler.mark()
+            lap = profiler.lap
+        if self._engine is not None:
+            self._engine.step()
+            if lap:
+                lap(ENGINE_STEP)
+            if self._recorder is not None:
+                self._recorder.record(self)
+                if lap:
+                    lap(RECORDING)
+            if profiler is not None:
+                profiler.step_finished()
+            return
+
         # 各エージェントのループ
+        occupied: list[BaseTask] = []  # ロボットが配置されたタスク (充電以外)
         for _, agent in self.agents.items():
             # 稼働不可ならスキップ
-            if agent.is_inactive():
+            inactive = agent.is_inactive()
+            if lap:
+                lap(INACTIVE_CHECK)
+            if inactive:
                 continue
             # 充電が必要かチェック
-            agent.decide_recharge(self.simulation_map.charge_stations)
+            agent.decide_recharge(self.simulation_map)
+            if lap:
+                lap(RECHARGE_DECISION)
             # タスクの割り当て
             agent.update_task(self.tasks)
+            if lap:
+                lap(TASK_UPDATE)
             if agent.assigned_task is None:  # 全タスク終了
                 continue
             # 移動が必要なエージェントは移動
             if agent.is_on_site():
                 agent.ready()
+                if not isinstance(agent.assigned_task, Charge):
+                    occupied.append(agent.assigned_task)
             else:
                 agent.travel(self.scenarios)
+            if lap:
+                lap(TRAVEL_READY)
 
-        # 各タスクを一斉に実行
-        for _, task in self.tasks.items():
-            # if isinstance(task, Manufacture):
-            #     print(task.name)
-            #     print(task.required_performance)
-            #     print(len(task.assigned_robot))
-            #     total_assigned_performance = {attr: 0 for attr in PerformanceAttributes}
-            #     for robot in task.assigned_robot:
-            #         for attr, value in robot.type.performance.items():
-            #             total_assigned_performance[attr] += value
-            #     print(total_assigned_performance)
+        # 依存が解消済みの未完了タスクを一斉に実行 (実行中に依存が解消したタスクも登録順で後ろなら同じステップで実行)
+        for task in self._tracker.ready_tasks():
             if task.update():
                 for robot in task.assigned_robot:
                     self.agents[robot.name].set_state_work(self.scenarios)  # タスクを実行したエージェントのみ
-            # else:
-            #     if not isinstance(task, TransportModule):
-            #         print(task.name)
-            #         print(task.required_performance)
-            #         print(task.assign_robot)
+                self._tracker.mark_completed(task)
+            if lap:
+                lap(TASK_EXECUTION, task.__class__.__name__)
+        # 依存が未解消のタスクに配置されたロボットも解放する
+        for task in occupied:
             task.release_robot()
+        if lap:
+            lap(TASK_EXECUTION)
         # 充電を実行
         for _, station in self.simulation_map.charge_stations.items():
             station.update()
             station.release_robot()
+        if lap:
+            lap(CHARGING)
 
         # タスクをエージェントの目標から消す
         # 充電以外
@@ -62,4 +271,12 @@ class Simulator:
             agent.reset_task()
             agent.set_state_idle()
             agent.robot.update_state()  # ロボット状態更新
+        if lap:
+            lap(STATE_RESET)
+        if self._recorder is not None:
+            self._recorder.record(self)
+            if lap:
+                lap(RECORDING)
+        if profiler is not None:
+            profiler.step_finished()
 
@@ -0,0 +1,65 @@
+from dataclasses import dataclass, field
+from typing import Any, Optional
+import numpy as np
+from numpy.typing import NDArray
+from modular_robot_task_allocator.core import *
+from modular_robot_task_allocator.simulator.agent import RobotAgent, AgentState
+from modular_robot_task_allocator.utils import raise_with_log
+
+
+@dataclass
+class SimulationSnapshot:
+    """
+    シミュレーションの可変状態のみを保持するスナップショット
+    種類・名前・依存関係などの不変データは元のオブジェクトと共有する
+    """
+    current_step: int
+    scenarios: list[BaseRiskScenario]  # 故障シナリオ (乱数状態は scenario_states に保持)
+    scenario_states: list[Optional[dict[str, Any]]]
+    modules: list[tuple[float, float, ModuleState, tuple[float, float]]] = field(default_factory=list)
+    robots: list[tuple[tuple[float, float], RobotState, list[Module]]] = field(default_factory=list)
+    tasks: list[tuple[float, tuple[float, float]]] = field(default_factory=list)
+    agents: list[tuple[Optional[BaseTask], AgentState, int]] = field(default_factory=list)
+    engine: Optional[dict[str, NDArray[Any]]] = None  # 配列バックエンドの状態
+
+
+def capture_scenarios(scenarios: list[BaseRiskScenario]) -> list[Optional[dict[str, Any]]]:
+    """ 故障シナリオの乱数状態を取得 """
+    return [None if scenario.rng is None else scenario.rng.bit_generator.state for scenario in scenarios]
+
+def restore_scenarios(scenarios: list[BaseRiskScenario], states: list[Optional[dict[str, Any]]]) -> None:
+    """ 故障シナリオの乱数状態を復元 """
+    for scenario, state in zip(scenarios, states):
+        if state is None:
+            scenario.rng = None
+            continue
+        if scenario.rng is None:
+            scenario.rng = np.random.default_rng(scenario.seed)
+        scenario.rng.bit_generator.state = state
+
+def capture_objects(snapshot: SimulationSnapshot, modules: list[Module], agents: list[RobotAgent],
+                    tasks: list[BaseTask]) -> None:
+    """ モジュール・ロボット・タスク・エージェントの可変状態をスナップショットへ記録 """
+    snapshot.modules = [(module.battery, module.operating_time, module.state, module.coordinate) for module in modules]
+    snapshot.robots = [(agent.robot.coordinate, agent.robot.state, list(agent.robot.component_mounted))
+                       for agent in agents]
+    snapshot.tasks = [(task.completed_workload, task.coordinate) for task in tasks]
+    snapshot.agents = [(agent.assigned_task, agent.state, agent.consumed_priority) for agent in agents]
+
+def restore_objects(snapshot: SimulationSnapshot, modules: list[Module], agents: list[RobotAgent],
+                    tasks: list[BaseTask]) -> None:
+    """ スナップショットの可変状態をモジュール・ロボット・タスク・エージェントへ書き戻す """
+    if (len(snapshot.modules), len(snapshot.robots), len(snapshot.tasks)) != (len(modules), len(agents), len(tasks)):
+        raise_with_log(ValueError, "Snapshot does not match the simulation world.")
+    for module, (battery, operating_time, state, coordinate) in zip(modules, snapshot.modules):
+        module.restore_state(battery, operating_time, state, coordinate)
+    for agent, (coordinate, state, mounted) in zip(agents, snapshot.robots):
+        agent.robot.restore_state(coordinate, state, mounted)
+    for task, (completed_workload, coordinate) in zip(tasks, snapshot.tasks):
+        task.restore_state(completed_workload, coordinate)
+        task.release_robot()
+    for agent, (assigned_task, state, consumed_priority) in zip(agents, snapshot.agents):
+        agent.assigned_task = assigned_task
+        agent.state = state
+        agent.consumed_priority = consumed_priority
+        agent.reset_cursor()
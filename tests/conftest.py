@@ -0,0 +1,10 @@
+import pytest
+from modular_robot_task_allocator.core import Robot
+from modular_robot_task_allocator.simulator import ArrayEngine
+
+
+@pytest.fixture(autouse=True)
+def check_aggregates(monkeypatch):
+    """ 集計値を読むたびに再計算した値と照合する """
+    monkeypatch.setattr(Robot, "check_aggregates", True)
+    monkeypatch.setattr(ArrayEngine, "check_aggregates", True)
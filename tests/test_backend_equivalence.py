@@ -0,0 +1,81 @@
+import pytest
+from modular_robot_task_allocator.core import ExponentialFailure
+from modular_robot_task_allocator.simulator import BatchSimulator, Simulator
+from worlds import build_world, make_scenarios, make_simulator, objectives, state
+
+MAX_STEP = 80
+SAMPLINGS = ExponentialFailure.SAMPLINGS
+SEEDS = [0, 1, 2]
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_world_fails_and_progresses(seed):
+    """ 比較が意味を持つよう、ワールドで故障とタスクの進捗の両方が起きる """
+    simulator = make_simulator(seed)
+    initial = simulator.total_remaining_workload()
+    simulator.run(MAX_STEP)
+    assert simulator.total_remaining_workload() < initial
+    assert any(not module.is_active() for module in simulator.modules)
+
+@pytest.mark.parametrize("sampling", SAMPLINGS)
+@pytest.mark.parametrize("seed", SEEDS)
+def test_array_backend_matches_object_backend(seed, sampling):
+    """ 配列バックエンドはステップごとにオブジェクトバックエンドと同じ状態になる """
+    reference = make_simulator(seed, sampling, "object")
+    array = make_simulator(seed, sampling, "array")
+    for _ in range(MAX_STEP):
+        reference.run_simulation()
+        array.run_simulation()
+        assert state(array) == state(reference)
+    assert objectives(array) == objectives(reference)
+
+@pytest.mark.parametrize("sampling", SAMPLINGS)
+def test_batch_matches_sequential(sampling):
+    """ ロックステップの一括評価はシナリオごとの逐次評価と同じ目的関数値になる """
+    world = build_world(0)
+    batch = BatchSimulator(world.tasks, world.robots, world.task_priorities,
+                           [[scenario] for scenario in make_scenarios(sampling=sampling)], world.simulation_map)
+    batch.run(MAX_STEP)
+    batch_objectives = list(zip(batch.total_remaining_workload().tolist(), batch.variance_remaining_workload().tolist(),
+                                batch.variance_operating_time().tolist()))
+    for k in range(len(batch_objectives)):
+        world = build_world(0)
+        simulator = Simulator(world.tasks, world.robots, world.task_priorities, [make_scenarios(sampling=sampling)[k]],
+                              world.simulation_map)
+        simulator.run(MAX_STEP)
+        assert batch_objectives[k] == objectives(simulator)
+
+@pytest.mark.parametrize("sampling", SAMPLINGS)
+@pytest.mark.parametrize("seed", SEEDS)
+def test_event_driven_matches_stepwise(seed, sampling):
+    """ 変化のないステップを読み飛ばしても、1ステップずつ進めた場合と同じ結果になる """
+    reference = make_simulator(seed, sampling, "object")
+    reference.run(MAX_STEP)
+    event_driven = make_simulator(seed, sampling, "array")
+    event_driven.run(MAX_STEP, event_driven=True)
+    assert event_driven.current_step == MAX_STEP
+    assert state(event_driven) == state(reference)
+    assert objectives(event_driven) == objectives(reference)
+
+@pytest.mark.parametrize("sampling", SAMPLINGS)
+def test_event_driven_batch_matches_stepwise(sampling):
+    """ 一括評価でも変化のないステップを読み飛ばした結果は1ステップずつ進めた場合と同じになる """
+    world = build_world(0)
+    scenario_sets = [[scenario] for scenario in make_scenarios(sampling=sampling)]
+    stepwise = BatchSimulator(world.tasks, world.robots, world.task_priorities, scenario_sets, world.simulation_map)
+    stepwise.run(MAX_STEP)
+    world = build_world(0)
+    scenario_sets = [[scenario] for scenario in make_scenarios(sampling=sampling)]
+    event_driven = BatchSimulator(world.tasks, world.robots, world.task_priorities, scenario_sets, world.simulation_map)
+    event_driven.run(MAX_STEP, event_driven=True)
+    for method in ["total_remaining_workload", "variance_remaining_workload", "variance_operating_time"]:
+        assert getattr(event_driven, method)().tolist() == getattr(stepwise, method)().tolist()
+
+def test_event_driven_requires_array_backend():
+    """ オブジェクトバックエンドでは変化のないステップを読み飛ばせない """
+    simulator = make_simulator(backend="object")
+    with pytest.raises(ValueError):
+        simulator.run(MAX_STEP, event_driven=True)
+    with pytest.raises(ValueError):
+        simulator.advance(MAX_STEP)
+    assert simulator.current_step == 0
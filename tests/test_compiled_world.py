@@ -0,0 +1,140 @@
+import json, os, random
+import pytest
+from modular_robot_task_allocator.core import check_fleet
+from modular_robot_task_allocator.io import (
+    add_assembly_task, load_module_types, load_modules, load_property, load_risk_scenarios, load_robot_types,
+    load_robots, load_simulation_map, load_task_dependency, load_tasks, permutation_of_tasks)
+from modular_robot_task_allocator.io.compiled_world import (
+    _PREFIX, compile_world, load_capabilities, load_compiled_world)
+from modular_robot_task_allocator.simulator import Simulator
+from worlds import objectives
+
+SAMPLE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "exec", "small_sample",
+                      "property.yaml")
+EXPECTED = (91.0, 13.471074380165287, 41.35)  # exec/run_simulator.py を small_sample で実行した出力
+
+
+def load_sample():
+    """ run_simulator.py と同じ手順で small_sample を読み込む """
+    prop = load_property(file_path=SAMPLE)
+    load = prop["load"]
+    tasks = load_task_dependency(file_path=load["task_dependency"], tasks=load_tasks(file_path=load["task"]))
+    module_types = load_module_types(file_path=load["module_type"])
+    modules = load_modules(file_path=load["module"], module_types=module_types)
+    robot_types = load_robot_types(file_path=load["robot_type"], module_types=module_types)
+    robots = load_robots(file_path=load["robot"], robot_types=robot_types, modules=modules)
+    check_fleet(robots=robots, modules=modules.values(), tasks=tasks)
+    return (prop, add_assembly_task(tasks=tasks, robots=robots), robots, modules,
+            load_simulation_map(file_path=load["map"]), load_risk_scenarios(file_path=load["risk_scenario"]))
+
+def sample_objectives(tasks, robots, simulation_map, risk_scenarios, prop):
+    """ run_simulator.py の逐次評価と同じ優先順位で、訓練シナリオごとの目的関数値を平均する """
+    rng = random.Random(prop["simulation"]["seed"])
+    task_priorities = {}
+    for name in robots:
+        task_priorities[name] = list(tasks)
+        rng.shuffle(task_priorities[name])
+    permutation_of_tasks(task_priorities=task_priorities, tasks=tasks, robots=robots)
+    simulator = Simulator(tasks, robots, task_priorities, [], simulation_map)
+    initial_state = simulator.snapshot()
+    results = []
+    for scenario_names in prop["simulation"]["training_scenarios"]:
+        simulator.restore(initial_state)
+        simulator.set_scenarios([risk_scenarios[name] for name in scenario_names])
+        simulator.run(prop["simulation"]["max_step"])
+        results.append(objectives(simulator))
+    return tuple(float(sum(values) / len(values)) for values in zip(*results))
+
+@pytest.fixture
+def compiled(tmp_path):
+    prop, tasks, robots, modules, simulation_map, risk_scenarios = load_sample()
+    capabilities = load_capabilities(prop["load"]["task_capabilities"])
+    path = str(tmp_path / "world.bin")
+    compile_world(path, tasks=tasks, robots=robots, simulation_map=simulation_map, risk_scenarios=risk_scenarios,
+                  modules=modules.values(), capabilities=capabilities)
+    return path, capabilities
+
+def rewrite_header(path, output, **changes):
+    """ ヘッダーの項目を書き換えたファイルを作る (列の位置が変わらないよう長さを保つ) """
+    with open(path, 'rb') as f:
+        data = f.read()
+    magic, length = _PREFIX.unpack(data[:_PREFIX.size])
+    header = json.loads(data[_PREFIX.size:_PREFIX.size + length])
+    header.update(changes)
+    encoded = json.dumps(header).encode()
+    assert len(encoded) <= length
+    with open(output, 'wb') as f:
+        f.write(_PREFIX.pack(magic, length) + encoded.ljust(length) + data[_PREFIX.size + length:])
+
+
+def test_round_trip_matches_yaml_world(compiled):
+    """ 書き出したワールドは YAML から読み込んだワールドと同じ名前・目的関数値になる """
+    path, _ = compiled
+    prop, tasks, robots, modules, simulation_map, risk_scenarios = load_sample()
+    expected = sample_objectives(tasks, robots, simulation_map, risk_scenarios, prop)
+    assert expected == EXPECTED
+
+    world = load_compiled_world(path)
+    assert world.names["robot"] == list(robots)
+    assert world.names["task"] == list(tasks)
+    assert world.names["station"] == list(simulation_map.charge_stations)
+    assert set(world.names["module"]) == set(modules)
+    assert sample_objectives(world.tasks, world.robots, world.simulation_map, world.risk_scenarios(), prop) == expected
+
+def test_csr_columns_hold_dependencies_and_components(compiled):
+    """ 可変長の依存タスク・構成モジュールは先頭位置と連結した番号の列で保持する """
+    path, _ = compiled
+    _, tasks, robots, *_ = load_sample()
+    world = load_compiled_world(path)
+    task_names, module_names = world.names["task"], world.names["module"]
+    dependencies = world._rows("task_dependency_offset", "task_dependency")
+    assert len(dependencies) == len(tasks)
+    for task, row in zip(tasks.values(), dependencies):
+        expected = [dep.name for dep in task.task_dependency] if task.has_task_dependency() else []
+        assert [task_names[t] for t in row] == expected
+    assert any(dependencies)
+    components = world._rows("robot_component_offset", "robot_component")
+    for robot, row in zip(robots.values(), components):
+        assert [module_names[m] for m in row] == [module.name for module in robot.component_required]
+    assert world.column("task_dependency_offset")[-1] == len(world.column("task_dependency"))
+
+def test_capability_columns(compiled):
+    """ 能力表は列ごとに読み出せ、未知の列は KeyError になる """
+    path, capabilities = compiled
+    world = load_compiled_world(path)
+    assert world.capability_names == list(capabilities)
+    assert world.capabilities == capabilities
+    for column in capabilities:
+        assert f"capability:{column}" in world.column_names
+        assert not world.column(f"capability:{column}").flags.writeable
+    with pytest.raises(KeyError):
+        world.capability("unknown")
+    with pytest.raises(KeyError):
+        world.column("unknown")
+
+def test_rejects_incompatible_files(compiled, tmp_path):
+    """ マジックナンバー・版・列挙型の並びが一致しないファイルは読み込まない """
+    path, _ = compiled
+    with open(path, 'rb') as f:
+        data = f.read()
+    bad_magic = str(tmp_path / "magic.bin")
+    with open(bad_magic, 'wb') as f:
+        f.write(b"NOTWORLD" + data[8:])
+    with pytest.raises(ValueError, match="Not a compiled world"):
+        load_compiled_world(bad_magic)
+
+    bad_version = str(tmp_path / "version.bin")
+    rewrite_header(path, bad_version, version=99)
+    with pytest.raises(ValueError, match="version"):
+        load_compiled_world(bad_version)
+
+    for key in ["task_classes", "module_states", "robot_states", "performance_attributes"]:
+        with open(path, 'rb') as f:
+            _, length = _PREFIX.unpack(f.read(_PREFIX.size))
+            values = json.loads(f.read(length))[key]
+        incompatible = str(tmp_path / f"{key}.bin")
+        rewrite_header(path, incompatible, **{key: values[::-1]})
+        with pytest.raises(ValueError, match=key):
+            load_compiled_world(incompatible)
+    with pytest.raises(FileNotFoundError):
+        load_compiled_world(str(tmp_path / "missing.bin"))
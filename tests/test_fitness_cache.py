@@ -0,0 +1,47 @@
+from modular_robot_task_allocator.simulator import FitnessCache, evaluation_context, normalize_priorities
+from worlds import build_world, make_scenarios, make_simulator, objectives
+
+MAX_STEP = 80
+
+
+def make_context():
+    world = build_world(0)
+    return evaluation_context(world.tasks, world.robots, world.simulation_map, [make_scenarios()], MAX_STEP)
+
+def test_fitness_cache_reuses_unread_suffix():
+    """ 読み出されなかった部分だけが異なる候補には、実際に評価した場合と同じ目的関数値を返す """
+    cache = FitnessCache(make_context())
+    simulator = make_simulator(0)
+    priorities = normalize_priorities(build_world(0).task_priorities)
+    simulator.set_task_priorities(priorities)
+    simulator.run(MAX_STEP)
+    consumed = simulator.consumed_priorities()
+    cache.put(priorities, objectives(simulator), consumed)
+
+    candidate = {name: priority[:consumed[name]] + priority[consumed[name]:][::-1]
+                 for name, priority in priorities.items()}
+    assert cache.get(candidate) == objectives(simulator)
+    fresh = make_simulator(0)
+    fresh.set_task_priorities(candidate)
+    fresh.run(MAX_STEP)
+    assert objectives(fresh) == objectives(simulator)
+
+def test_disk_store_is_written_on_commit(tmp_path):
+    """ ディスクへの書き込みは commit か close で確定し、再実行時に読み出される """
+    path = str(tmp_path / "fitness.db")
+    priorities = build_world(0).task_priorities
+    reversed_priorities = {name: priority[::-1] for name, priority in priorities.items()}
+    cache = FitnessCache(make_context(), path=path)
+    cache.put(priorities, (1.0, 2.0, 3.0), {name: 2 for name in priorities})
+    assert FitnessCache(make_context(), path=path).get(priorities) is None  # 未確定の書き込みは見えない
+    cache.commit()
+    cache.put(reversed_priorities, (4.0, 5.0, 6.0))
+    cache.close()
+
+    reopened = FitnessCache(make_context(), path=path)
+    assert reopened.get(priorities) == (1.0, 2.0, 3.0)
+    assert reopened.get(reversed_priorities) == (4.0, 5.0, 6.0)
+    partial = {name: priority[:2] + priority[2:][::-1] for name, priority in priorities.items()}
+    assert reopened.get(partial) == (1.0, 2.0, 3.0)  # 読み出し長さの組も保存される
+    assert FitnessCache("other", path=path).get(priorities) is None
+    reopened.close()
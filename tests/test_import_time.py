@@ -0,0 +1,40 @@
+import json, os, subprocess, sys
+import pytest
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+# シミュレーションだけを行うプロセス (ワーカーなど) で読み込まれてはならない重い依存
+HEAVY_MODULES = {"pandas", "matplotlib", "sklearn", "pymoo", "networkx"}
+BUDGET_MS = 400.0  # exec/benchmark_import.py の既定の予算と同じ
+TARGETS = [
+    "modular_robot_task_allocator.core",
+    "modular_robot_task_allocator.simulator.simulation",
+    "modular_robot_task_allocator.simulator.parallel",
+]
+SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import {target}
+elapsed = (time.perf_counter() - start) * 1000.0
+print(json.dumps({{"elapsed": elapsed, "modules": sorted({{name.split(".")[0] for name in sys.modules}})}}))
+"""
+
+
+def import_in_subprocess(target):
+    """ 新しいプロセスで target を import したときの時間 (ミリ秒) と読み込まれたトップレベルのモジュール """
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [SRC, env.get("PYTHONPATH")]))
+    result = subprocess.run([sys.executable, "-c", SCRIPT.format(target=target)], env=env, capture_output=True,
+                            text=True, check=True)
+    report = json.loads(result.stdout)
+    return report["elapsed"], set(report["modules"])
+
+
+@pytest.mark.parametrize("target", TARGETS)
+def test_import_skips_heavy_dependencies(target):
+    _, modules = import_in_subprocess(target)
+    assert modules & HEAVY_MODULES == set()
+
+@pytest.mark.parametrize("target", TARGETS)
+def test_import_time_within_budget(target):
+    elapsed = min(import_in_subprocess(target)[0] for _ in range(3))  # ディスクキャッシュなどの揺らぎを除く
+    assert elapsed <= BUDGET_MS
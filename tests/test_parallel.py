@@ -0,0 +1,58 @@
+import random
+import numpy as np
+from modular_robot_task_allocator.simulator import Simulator
+from modular_robot_task_allocator.simulator.parallel import evaluate_population, evaluate_scenarios
+from worlds import build_world, make_scenarios, objectives
+
+MAX_STEP = 60
+SCENARIO_LISTS = [["s0"], ["s1"], ["s0", "s1"], ["s2"]]
+
+
+def risk_scenarios():
+    return {scenario.name: scenario for scenario in make_scenarios(3)}
+
+def simulate(task_priorities, scenario_names):
+    """ 同一プロセスで直接シミュレーションした目的関数値 """
+    world = build_world(0)
+    scenarios = risk_scenarios()
+    simulator = Simulator(world.tasks, world.robots, task_priorities, [scenarios[name] for name in scenario_names],
+                          world.simulation_map)
+    simulator.run(MAX_STEP)
+    return objectives(simulator)
+
+def evaluate(max_workers, task_priorities):
+    world = build_world(0)
+    return evaluate_scenarios(world.tasks, world.robots, task_priorities, risk_scenarios(), SCENARIO_LISTS,
+                              world.simulation_map, MAX_STEP, max_workers=max_workers)
+
+
+def test_parallel_matches_serial_in_order():
+    """ プロセスプールの結果は同一プロセスでの評価と同じ値を入力と同じ順序で返す """
+    task_priorities = build_world(0).task_priorities
+    expected = [simulate(task_priorities, names) for names in SCENARIO_LISTS]
+    assert evaluate(1, task_priorities) == expected
+    assert evaluate(2, task_priorities) == expected
+
+def test_population_matches_serial_in_order():
+    """ 個体×シナリオリストのジョブを分配しても、個体ごとのシナリオ平均は個体と同じ順序になる """
+    world = build_world(0)
+    population = [world.task_priorities]
+    for seed in range(3):
+        rng = random.Random(seed)
+        population.append({name: rng.sample(priority, len(priority)) for name, priority in world.task_priorities.items()})
+    serial = evaluate_population(world.tasks, world.robots, population, risk_scenarios(), SCENARIO_LISTS,
+                                 world.simulation_map, MAX_STEP, max_workers=1)
+    parallel = evaluate_population(world.tasks, world.robots, population, risk_scenarios(), SCENARIO_LISTS,
+                                   world.simulation_map, MAX_STEP, max_workers=2)
+    assert parallel == serial
+    assert len(set(serial)) > 1  # 個体の取り違えを検出できる
+
+def test_serial_keeps_global_random_state():
+    """ 評価は呼び出し元のグローバルな乱数状態を変えない """
+    random.seed(1)
+    np.random.seed(1)
+    expected = random.random(), np.random.random()
+    random.seed(1)
+    np.random.seed(1)
+    evaluate(1, build_world(0).task_priorities)
+    assert (random.random(), np.random.random()) == expected
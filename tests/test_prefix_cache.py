@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+from modular_robot_task_allocator.core import ExponentialFailure
+from modular_robot_task_allocator.simulator import PrefixCache
+from worlds import build_world, make_simulator, objectives
+
+MAX_STEP = 80
+SAMPLINGS = ExponentialFailure.SAMPLINGS
+
+
+@pytest.mark.parametrize("backend", ["object", "array"])
+@pytest.mark.parametrize("sampling", SAMPLINGS)
+def test_prefix_cache_matches_fresh_simulation(sampling, backend):
+    """ 接頭辞を共有する状態から再開した評価は、最初から実行した評価と同じ目的関数値になる """
+    task_priorities = build_world(0).task_priorities
+    reference = make_simulator(0, sampling, backend)
+    reference.run(MAX_STEP // 4)
+    consumed = reference.consumed_priorities()
+    rng = np.random.default_rng(0)
+    candidates = [task_priorities]
+    for _ in range(4):
+        # 途中までに読み出した先頭側を保ち、後ろ側だけを入れ替えた候補 (接頭辞の状態を再利用する)
+        candidates.append({name: priority[:consumed[name]] + rng.permutation(priority[consumed[name]:]).tolist()
+                           for name, priority in task_priorities.items()})
+    cache = PrefixCache(make_simulator(0, sampling, backend), MAX_STEP, interval=10, event_driven=backend == "array")
+    for candidate in candidates + candidates:
+        simulator = make_simulator(0, sampling, backend)
+        simulator.set_task_priorities(candidate)
+        simulator.run(MAX_STEP)
+        assert cache.evaluate(candidate) == objectives(simulator)
+    assert cache.stats["hits"] >= len(candidates)
+
+def test_event_driven_requires_array_backend():
+    with pytest.raises(ValueError):
+        PrefixCache(make_simulator(backend="object"), MAX_STEP, event_driven=True)
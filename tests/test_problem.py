@@ -0,0 +1,86 @@
+import numpy as np
+import pytest
+from modular_robot_task_allocator.optimizer import TaskAllocationProblem
+from modular_robot_task_allocator.simulator import FitnessCache, Simulator, evaluation_context
+from worlds import build_world, make_scenarios, objectives
+
+MAX_STEP = 60
+SCENARIO_LISTS = [["s0"], ["s1", "s0"]]
+
+
+def risk_scenarios():
+    return {scenario.name: scenario for scenario in make_scenarios(2)}
+
+def make_problem(**kwargs):
+    world = build_world(0)
+    return TaskAllocationProblem(world.tasks, world.robots, risk_scenarios(), SCENARIO_LISTS, world.simulation_map,
+                                 MAX_STEP, **kwargs)
+
+def simulate(task_priorities):
+    """ シナリオリストごとに直接シミュレーションした目的関数値の平均 """
+    results = []
+    for scenario_names in SCENARIO_LISTS:
+        world = build_world(0)
+        scenarios = risk_scenarios()
+        simulator = Simulator(world.tasks, world.robots, task_priorities, [scenarios[name] for name in scenario_names],
+                              world.simulation_map)
+        simulator.run(MAX_STEP)
+        results.append(objectives(simulator))
+    return np.mean(np.array(results), axis=0)
+
+def population(problem, size, seed=0):
+    return np.random.default_rng(seed).random((size, problem.n_var))
+
+
+def test_decode_inverts_encode():
+    """ 決定変数はロボットごとのキーの昇順でタスク優先順位になり、encode の逆変換になる """
+    problem = make_problem()
+    task_priorities = build_world(0).task_priorities
+    assert problem.decode(problem.encode(task_priorities)) == task_priorities
+    x = np.tile(np.arange(len(problem.task_names), 0, -1, dtype=np.float64), len(problem.robot_names))
+    assert problem.decode(x) == {name: problem.task_names[::-1] for name in problem.robot_names}
+    with pytest.raises(ValueError):
+        problem.encode({name: problem.task_names[1:] for name in problem.robot_names})
+
+@pytest.mark.parametrize("event_driven", [False, True])
+def test_batch_and_pool_match_simulation(event_driven):
+    """ 一括評価・プロセスプール・逐次評価は直接シミュレーションした場合と同じ目的関数値になる """
+    reference = make_problem()
+    X = population(reference, 4)
+    expected = np.array([simulate(reference.decode(x)) for x in X])
+    assert len(np.unique(expected, axis=0)) > 1  # 個体の取り違えを検出できる
+    for mode, max_workers in [("batch", 1), ("pool", 1), ("pool", 2)]:
+        problem = make_problem(mode=mode, max_workers=max_workers, event_driven=event_driven)
+        assert np.array_equal(problem.evaluate(X), expected)
+
+def test_batch_is_rebuilt_only_when_size_changes():
+    """ 同じ個体数ではバッチを使い回し、個体数が変わると作り直して1つだけ保持する """
+    problem = make_problem()
+    X = population(problem, 3)
+    F = problem.evaluate(X)
+    batch = problem._batch(3 * len(SCENARIO_LISTS))[0]
+    assert np.array_equal(problem.evaluate(X[::-1]), F[::-1])
+    assert problem._batch(3 * len(SCENARIO_LISTS))[0] is batch
+    assert np.array_equal(problem.evaluate(X[:2]), F[:2])
+    assert problem._batch_state[0].num_worlds == 2 * len(SCENARIO_LISTS)
+
+def test_cache_skips_evaluated_individuals(tmp_path):
+    """ キャッシュ済みの個体はシミュレーションせず、ディスクのストアは再実行時にも使われる """
+    world = build_world(0)
+    scenarios = risk_scenarios()
+    context = evaluation_context(world.tasks, world.robots, world.simulation_map,
+                                 [[scenarios[name] for name in names] for names in SCENARIO_LISTS], MAX_STEP)
+    path = str(tmp_path / "fitness.db")
+    cache = FitnessCache(context, path=path)
+    problem = make_problem(cache=cache)
+    X = population(problem, 4)
+    F = problem.evaluate(X)
+    assert (cache.hits, cache.misses) == (0, 4)
+    assert np.array_equal(problem.evaluate(X[[2, 0]]), F[[2, 0]])
+    assert (cache.hits, cache.misses) == (2, 4)
+    cache.close()
+
+    reopened = FitnessCache(context, path=path)
+    assert np.array_equal(make_problem(cache=reopened).evaluate(X), F)
+    assert (reopened.hits, reopened.misses) == (4, 0)
+    reopened.close()
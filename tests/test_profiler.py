@@ -0,0 +1,26 @@
+from modular_robot_task_allocator.core import ExponentialFailure
+from modular_robot_task_allocator.simulator import PhaseProfiler, Simulator
+from modular_robot_task_allocator.simulator.profiler import INACTIVE_CHECK, STATE_RESET, TASK_EXECUTION
+from worlds import build_world
+
+STEPS = 30
+
+
+def test_phase_calls_count_steps_and_laps_count_intervals():
+    """ calls はフェーズを含むステップ数、laps はエージェント・タスクごとの計測区間の数 """
+    world = build_world(0)
+    simulator = Simulator(world.tasks, world.robots, world.task_priorities, [ExponentialFailure("s0", 0.0002, 100)],
+                          world.simulation_map)
+    profiler = PhaseProfiler()
+    simulator.attach_profiler(profiler)
+    simulator.run(STEPS)
+    report = profiler.report()
+
+    assert report.steps == STEPS
+    assert report.phases[STATE_RESET].calls == STEPS
+    assert report.phases[STATE_RESET].laps == STEPS
+    assert report.phases[INACTIVE_CHECK].calls == STEPS
+    assert report.phases[INACTIVE_CHECK].laps == STEPS * len(simulator.agents)
+    assert report.phases[TASK_EXECUTION].calls == STEPS
+    assert sum(stats.laps for stats in report.task_classes.values()) + STEPS == report.phases[TASK_EXECUTION].laps
+    assert all(stats.calls <= min(stats.laps, STEPS) for stats in report.task_classes.values())
@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+from modular_robot_task_allocator.simulator import TrajectoryReader, TrajectoryRecorder
+from worlds import make_simulator
+
+STEPS = 50
+CHUNK_SIZE = 7  # ステップ数より小さく、割り切れない
+
+
+def record(directory, backend="object", event_driven=False):
+    simulator = make_simulator(0, backend=backend)
+    recorder = TrajectoryRecorder(str(directory), chunk_size=CHUNK_SIZE)
+    simulator.attach_recorder(recorder)
+    simulator.run(STEPS, event_driven=event_driven)
+    return simulator, recorder
+
+
+def test_chunks_are_flushed_when_full(tmp_path):
+    """ chunk_size ステップごとにファイルへ書き出し、残りは detach (close) で書き出す """
+    simulator, recorder = record(tmp_path)
+    assert recorder.num_steps == STEPS + 1  # 初期状態を含む
+    flushed = TrajectoryReader(str(tmp_path))
+    assert flushed.num_steps == (STEPS + 1) // CHUNK_SIZE * CHUNK_SIZE
+    simulator.detach_recorder()
+    reader = TrajectoryReader(str(tmp_path))
+    assert reader.num_steps == STEPS + 1
+    assert reader.column("step").tolist() == list(range(STEPS + 1))
+    assert reader.column("robot_coordinate").shape == (STEPS + 1, len(simulator.agents), 2)
+    assert not reader.column("robot_battery").flags.writeable
+
+def test_array_recording_matches_object_recording(tmp_path):
+    """ 配列バックエンドは配列から直接記録し、オブジェクトバックエンドと同じ記録になる """
+    for backend in ["object", "array"]:
+        record(tmp_path / backend, backend)[0].detach_recorder()
+    reference, array = TrajectoryReader(str(tmp_path / "object")), TrajectoryReader(str(tmp_path / "array"))
+    assert array.names == reference.names
+    for name in reference.column_names:
+        assert np.array_equal(array.column(name), reference.column(name)), name
+    assert len(np.unique(reference.column("task_completed_workload"), axis=0)) > 1
+
+def test_row_returns_last_record_before_event_driven_gap(tmp_path):
+    """ イベント駆動で読み飛ばしたステップは直前に記録した行を返し、記録したステップは1ステップずつの記録と一致する """
+    record(tmp_path / "stepwise", "array")[0].detach_recorder()
+    record(tmp_path / "event", "array", event_driven=True)[0].detach_recorder()
+    stepwise, event = TrajectoryReader(str(tmp_path / "stepwise")), TrajectoryReader(str(tmp_path / "event"))
+    steps = event.column("step").tolist()
+    assert steps[0] == 0 and steps[-1] == STEPS
+    assert event.num_steps < stepwise.num_steps
+    for step in range(STEPS + 1):
+        row = event.row(step)
+        assert steps[row] == max(recorded for recorded in steps if recorded <= step)
+        if steps[row] == step:
+            for name, value in event.at_step(step).items():
+                assert np.array_equal(value, stepwise.at_step(step)[name]), name
+    with pytest.raises(ValueError):
+        event.row(-1)
+
+def test_series_of_entity(tmp_path):
+    """ エンティティ名で時系列を切り出し、未知の列・名前は KeyError、エンティティのない列は ValueError """
+    simulator, _ = record(tmp_path)
+    simulator.detach_recorder()
+    reader = TrajectoryReader(str(tmp_path))
+    robot = reader.names["robot"][1]
+    assert np.array_equal(reader.series("robot_battery", robot), reader.column("robot_battery")[:, 1])
+    with pytest.raises(KeyError):
+        reader.series("unknown", robot)
+    with pytest.raises(KeyError):
+        reader.series("robot_battery", "unknown")
+    with pytest.raises(ValueError):
+        reader.series("step", robot)
+    with pytest.raises(KeyError):
+        reader.column("unknown")
+    with pytest.raises(FileNotFoundError):
+        TrajectoryReader(str(tmp_path / "missing"))
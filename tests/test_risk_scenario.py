@@ -0,0 +1,14 @@
+import numpy as np
+from worlds import make_scenarios
+
+
+def test_counter_sampling_is_order_independent():
+    """ カウンタベースの乱数はモジュールの並び順や呼び出し回数によらない """
+    scenario = make_scenarios(sampling="counter")[0]
+    scenario.initialize()
+    names = [f"m{i}" for i in range(20)]
+    counters = np.arange(20, dtype=np.float64) * 3.0
+    values = scenario.counter_random(names, counters)
+    order = np.random.default_rng(0).permutation(20)
+    assert np.array_equal(scenario.counter_random([names[i] for i in order], counters[order]), values[order])
+    assert np.array_equal(scenario.counter_random(names, counters), values)
@@ -0,0 +1,21 @@
+import pytest
+from modular_robot_task_allocator.core import ExponentialFailure
+from worlds import make_simulator, objectives, state
+
+MAX_STEP = 80
+SAMPLINGS = ExponentialFailure.SAMPLINGS
+
+
+@pytest.mark.parametrize("backend", ["object", "array"])
+@pytest.mark.parametrize("sampling", SAMPLINGS)
+def test_restore_reproduces_trajectory(sampling, backend):
+    """ スナップショットから再開すると、途中で保存しなかった場合と同じ結果になる """
+    simulator = make_simulator(0, sampling, backend)
+    simulator.run(MAX_STEP // 2)
+    snapshot = simulator.snapshot()
+    simulator.run(MAX_STEP)
+    expected = state(simulator), objectives(simulator)
+    simulator.restore(snapshot)
+    assert simulator.current_step == MAX_STEP // 2
+    simulator.run(MAX_STEP)
+    assert (state(simulator), objectives(simulator)) == expected
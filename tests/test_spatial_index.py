@@ -0,0 +1,17 @@
+import numpy as np
+from modular_robot_task_allocator.core.coodinate_utils import distance
+from modular_robot_task_allocator.core.spatial_index import GridIndex
+
+
+def test_grid_index_matches_linear_scan():
+    """ 空間索引の最近傍は全探索 (同距離なら番号の小さい点) と一致する """
+    rng = np.random.default_rng(0)
+    points = np.round(rng.uniform(-50.0, 50.0, size=(200, 2)), 0)  # 同距離の点を含むよう格子上に置く
+    queries = np.round(rng.uniform(-60.0, 60.0, size=(500, 2)), 0)
+    index = GridIndex(points)
+    expected = []
+    for query in queries.tolist():
+        distances = [distance(tuple(query), tuple(point)) for point in points.tolist()]
+        expected.append(int(np.argmin(distances)))
+        assert index.nearest(tuple(query)) == (expected[-1], distances[expected[-1]])
+    assert index.nearest_many(queries)[0].tolist() == expected
@@ -0,0 +1,49 @@
+import numpy as np
+from pymoo.algorithms.moo.nsga2 import NSGA2
+from pymoo.core.evaluator import Evaluator
+from pymoo.core.population import Population
+from pymoo.optimize import minimize
+from pymoo.problems import get_problem
+from modular_robot_task_allocator.optimizer import ResimulateFront, ScreenedProblem, SurrogateScreener
+
+
+def trained_screener(problem, **kwargs):
+    screener = SurrogateScreener(min_samples=20, n_estimators=10, **kwargs)
+    X = np.random.default_rng(0).random((40, problem.n_var))
+    screener.add(X, problem.evaluate(X))
+    return screener
+
+
+def test_select_returns_screen_fraction():
+    """ 学習前は全個体、学習後は screen_fraction の割合 (切り上げ) の個体を選ぶ """
+    problem = get_problem("zdt1", n_var=6)
+    X = np.random.default_rng(1).random((50, problem.n_var))
+    assert np.array_equal(SurrogateScreener(min_samples=20).select(X), np.arange(50))
+    for screen_fraction in [0.1, 0.3, 1.0]:
+        selected = trained_screener(problem, screen_fraction=screen_fraction).select(X)
+        assert len(selected) == int(np.ceil(screen_fraction * 50))
+        assert np.array_equal(selected, np.unique(selected))
+
+def test_resimulate_replaces_predicted_objectives():
+    """ 予測値を与えた個体を記録し、評価し直すと元の問題の目的関数値に置き換える """
+    base = get_problem("zdt1", n_var=6)
+    problem = ScreenedProblem(base, trained_screener(base, screen_fraction=0.3))
+    pop = Population.new(X=np.random.default_rng(2).random((20, base.n_var)))
+    Evaluator().eval(problem, pop)
+    predicted = problem.is_predicted(pop)
+    assert predicted.sum() == 14 and problem.num_predicted == 14
+    assert not np.allclose(pop.get("F")[predicted], base.evaluate(pop.get("X")[predicted]))
+
+    assert problem.resimulate(pop) == 14
+    assert not problem.is_predicted(pop).any()
+    assert np.array_equal(pop.get("F"), base.evaluate(pop.get("X")))
+    assert problem.resimulate(pop) == 0
+
+def test_resimulate_front_leaves_no_predicted_optimum():
+    """ コールバックを使うと、最終的な非優越解はすべてシミュレーションで評価した値を持つ """
+    base = get_problem("zdt1", n_var=6)
+    problem = ScreenedProblem(base, SurrogateScreener(min_samples=20, n_estimators=10))
+    result = minimize(problem, NSGA2(pop_size=20), ("n_gen", 8), seed=1, callback=ResimulateFront(problem))
+    assert problem.num_predicted > 0 and problem.num_resimulated > 0
+    assert not problem.is_predicted(result.opt).any()
+    assert np.array_equal(result.opt.get("F"), base.evaluate(result.opt.get("X")))
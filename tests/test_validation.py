@@ -0,0 +1,31 @@
+import pytest
+from modular_robot_task_allocator.core import Manufacture, Module, ModuleState, check_fleet, validate_fleet
+from worlds import build_world
+
+
+def test_valid_world_has_no_violations():
+    world = build_world(0)
+    assert validate_fleet(world.robots, tasks=world.tasks) == []
+    check_fleet(world.robots, tasks=world.tasks)
+
+def test_reports_all_violations_at_once():
+    """ 重複モジュール・必要数の不一致・範囲外のバッテリー・未知の依存タスクを1回の検査でまとめて報告する """
+    world = build_world(0)
+    r0, r1, r2 = list(world.robots.values())[:3]
+    duplicate = r1.component_required[0]
+    r0.component_required.append(Module(duplicate.type, duplicate.name, r0.coordinate, 0.0, 0.0, ModuleState.ACTIVE))
+    module = r2.component_required[0]
+    module.restore_state(module.type.max_battery + 1.0, module.operating_time, module.state, module.coordinate)
+    task = next(iter(world.tasks.values()))
+    unknown = Manufacture(name="unknown", coordinate=(0.0, 0.0), total_workload=1.0, completed_workload=0.0)
+    task.initialize_task_dependency([unknown])
+
+    violations = validate_fleet(world.robots, tasks=world.tasks)
+    assert sorted((violation.kind, violation.target) for violation in violations) == sorted([
+        ("duplicate_module", duplicate.name),
+        ("required_modules", r0.name),
+        ("battery", module.name),
+        ("dependency", task.name),
+    ])
+    with pytest.raises(ValueError, match="4 violations"):
+        check_fleet(world.robots, tasks=world.tasks)
@@ -0,0 +1,103 @@
+from typing import NamedTuple
+import random
+from modular_robot_task_allocator.core import (
+    Assembly, BaseTask, Charge, ExponentialFailure, Manufacture, Module, ModuleState, ModuleType, PerformanceAttributes,
+    Robot, RobotType, SimulationMap, Transport)
+from modular_robot_task_allocator.core.coodinate_utils import distance
+from modular_robot_task_allocator.simulator import Simulator
+
+FAILURE_RATE = 0.0002  # 数十ステップで故障が起きる故障率
+
+
+class World(NamedTuple):
+    """ テスト用の小さなワールド """
+    tasks: dict[str, BaseTask]
+    robots: dict[str, Robot]
+    task_priorities: dict[str, list[str]]
+    simulation_map: SimulationMap
+
+
+def build_world(seed: int, num_robots: int = 6, num_tasks: int = 10, num_stations: int = 2) -> World:
+    """
+    加工・運搬・組み立て・依存関係を含むワールドを作る (呼び出しごとに新しいオブジェクトを作る)
+    3台に1台のロボットは脚モジュールが外れており、組み立てタスクで搭載し直す
+    """
+    rng = random.Random(seed)
+    body, limb, battery = ModuleType("Body", 10.0), ModuleType("Limb", 6.0), ModuleType("Battery", 20.0)
+    performance = PerformanceAttributes
+    robot_types = [
+        RobotType("Carrier", {body: 1, limb: 2, battery: 1},
+                  {performance.TRANSPORT: 1, performance.MANUFACTURE: 0, performance.MOBILITY: 1.5}, 1.0, 12.0),
+        RobotType("Maker", {body: 1, limb: 1, battery: 2},
+                  {performance.TRANSPORT: 0, performance.MANUFACTURE: 1, performance.MOBILITY: 1.0}, 1.5, 15.0),
+    ]
+    robots: dict[str, Robot] = {}
+    for r in range(num_robots):
+        robot_type = robot_types[r % len(robot_types)]
+        coordinate = (rng.uniform(-5.0, 5.0), rng.uniform(-5.0, 5.0))
+        component = []
+        for module_type, required in robot_type.required_modules.items():
+            for j in range(required):
+                module_coordinate = coordinate
+                if r % 3 == 0 and module_type is limb and j == 0:
+                    module_coordinate = (coordinate[0] + 2.0, coordinate[1])
+                component.append(Module(module_type, f"m{r}_{module_type.name}_{j}", module_coordinate,
+                                        rng.uniform(0.3, 1.0) * module_type.max_battery, float(rng.randint(0, 20)),
+                                        ModuleState.ACTIVE))
+        robots[f"r{r}"] = Robot(robot_type, f"r{r}", coordinate, component)
+
+    tasks: dict[str, BaseTask] = {}
+    for t in range(num_tasks):
+        coordinate = (rng.uniform(-6.0, 6.0), rng.uniform(-6.0, 6.0))
+        if t % 2 == 0:
+            task: BaseTask = Manufacture(name=f"t{t}", coordinate=coordinate, total_workload=float(rng.randint(3, 8)),
+                                         completed_workload=0.0)
+        else:
+            destination = (coordinate[0] + 3.0, coordinate[1] + 4.0)
+            task = Transport(origin_coordinate=coordinate, destination_coordinate=destination, transport_resistance=2.0,
+                             name=f"t{t}", coordinate=coordinate, total_workload=2.0 * distance(destination, coordinate),
+                             completed_workload=0.0)
+        tasks[task.name] = task
+    names = list(tasks)
+    for t, name in enumerate(names):
+        tasks[name].initialize_task_dependency([tasks[other] for other in names[:t] if rng.random() < 0.2])
+    for robot in robots.values():
+        missing = robot.missing_components()
+        if missing:
+            assembly = Assembly(f"A_{robot.name}", robot)
+            tasks[assembly.name] = assembly
+            for module in missing:  # 外れたモジュールをロボットの位置に戻しておく (組み立てで搭載できる)
+                module.coordinate = robot.coordinate
+
+    stations = {f"c{s}": Charge(charging_speed=3.0, name=f"c{s}", coordinate=(rng.uniform(-8.0, 8.0), rng.uniform(-8.0, 8.0)),
+                                total_workload=0.0, completed_workload=0.0) for s in range(num_stations)}
+    task_priorities = {}
+    for name in robots:
+        priority = list(tasks)
+        rng.shuffle(priority)
+        task_priorities[name] = priority
+    return World(tasks, robots, task_priorities, SimulationMap(stations))
+
+
+def make_scenarios(count: int = 2, sampling: str = "step") -> list[ExponentialFailure]:
+    """ 故障率の異なる故障シナリオ (呼び出しごとに新しいオブジェクトを作る) """
+    return [ExponentialFailure(f"s{k}", FAILURE_RATE * (k + 1), 100 + k, sampling) for k in range(count)]
+
+def make_simulator(seed: int = 0, sampling: str = "step", backend: str = "object") -> Simulator:
+    world = build_world(seed)
+    return Simulator(world.tasks, world.robots, world.task_priorities, make_scenarios(sampling=sampling),
+                     world.simulation_map, backend=backend)
+
+def objectives(simulator: Simulator) -> tuple[float, float, float]:
+    return (simulator.total_remaining_workload(), simulator.variance_remaining_workload(),
+            simulator.variance_operating_time())
+
+def state(simulator: Simulator) -> tuple[list, list, list]:
+    """ モジュール・ロボット・エージェント・タスクの可変状態 """
+    simulator.synchronize()
+    modules = [(m.name, m.battery, m.operating_time, m.state, m.coordinate) for m in simulator.modules]
+    robots = [(agent.robot.coordinate, agent.robot.state, [m.name for m in agent.robot.component_mounted],
+               agent.state, None if agent.assigned_task is None else agent.assigned_task.name)
+              for agent in simulator.agents.values()]
+    tasks = [(task.name, task.completed_workload, task.coordinate) for task in simulator.tasks.values()]
+    return modules, robots, tasks